@@ -1,14 +1,22 @@
 from functools import lru_cache
+from typing import List, Optional
 
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from brain.config.settings import Settings
-from brain.infrastructure.persistence.database import get_async_db
+from brain.infrastructure.persistence.database import (
+    get_async_db,
+    get_async_read_db,
+    AsyncSessionLocal,
+    ASYNC_DATABASE_URL,
+)
+from brain.domain.entities.performance_event import PerformanceEvent
 from brain.application.ports.ai_service import AIService
 from brain.application.services.roi_analysis_service import ROIAnalysisService
 from brain.application.services.memory_analysis_service import MemoryAnalysisService
 from brain.domain.services.intelligence_engine import IntelligenceEngine
+from brain.domain.services.semantic_propagator import SemanticPropagator
 from brain.application.ports import repositories as ports
 
 # --- IMPORTS DOS SERVIÇOS DE IA ---
@@ -17,6 +25,9 @@ from brain.infrastructure.llm.groq_service import GroqService
 from brain.infrastructure.llm.mock_ai_service import MockAIService
 
 from brain.infrastructure.persistence.qdrant_repository import QdrantKnowledgeVectorRepository
+from brain.infrastructure.persistence.embedding_projection import load_projection
+from brain.infrastructure.persistence.embedding_cache import EmbeddingCache
+from brain.infrastructure.persistence.local_vector_repository import LocalKnowledgeVectorRepository
 from brain.application.ports.repositories import KnowledgeVectorRepository
 
 # Use Cases
@@ -36,6 +47,18 @@ from brain.infrastructure.persistence.postgres_repositories import (
     PostgresPerformanceRepository,
     PostgresCognitiveProfileRepository,
     PostgresErrorEventRepository,
+    PostgresSemanticNeighborRepository,
+    PostgresNodeContextRepository,
+)
+
+from brain.infrastructure.persistence.performance_event_buffer import (
+    PerformanceEventBuffer,
+    BufferedPerformanceRepository,
+)
+from brain.infrastructure.persistence.graph_snapshot import (
+    GraphSnapshotCache,
+    GraphVersionListener,
+    CachedKnowledgeRepository,
 )
 
 # In-Memory Repositories (for fallback or testing)
@@ -46,6 +69,8 @@ from brain.infrastructure.persistence.in_memory_repositories import (
     InMemoryPerformanceRepository,
     InMemoryCognitiveProfileRepository,
     InMemoryErrorEventRepository,
+    InMemorySemanticNeighborRepository,
+    InMemoryNodeContextRepository,
 )
 
 # =========================================================
@@ -82,18 +107,113 @@ def get_in_memory_cognitive_profile_repo() -> InMemoryCognitiveProfileRepository
 def get_in_memory_error_event_repo() -> InMemoryErrorEventRepository:
     return InMemoryErrorEventRepository()
 
+@lru_cache()
+def get_in_memory_semantic_neighbor_repo() -> InMemorySemanticNeighborRepository:
+    return InMemorySemanticNeighborRepository()
+
+@lru_cache()
+def get_in_memory_node_context_repo() -> InMemoryNodeContextRepository:
+    return InMemoryNodeContextRepository()
+
+
+async def _write_performance_events(events: List[PerformanceEvent]) -> None:
+    """Sink do buffer write-behind: um INSERT multi-row numa sessão própria."""
+    async with AsyncSessionLocal() as db:
+        await PostgresPerformanceRepository(db).save_many(events)
+        await db.commit()
+
+@lru_cache()
+def get_performance_event_buffer() -> PerformanceEventBuffer:
+    settings = get_settings()
+    return PerformanceEventBuffer(
+        _write_performance_events,
+        max_size=settings.PERFORMANCE_EVENT_BUFFER_MAX_SIZE,
+        batch_size=settings.PERFORMANCE_EVENT_BUFFER_BATCH_SIZE,
+        max_age_seconds=settings.PERFORMANCE_EVENT_BUFFER_MAX_AGE_SECONDS,
+        dead_letter_path=settings.PERFORMANCE_EVENT_DEAD_LETTER_PATH,
+    )
+
+@lru_cache()
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    settings = get_settings()
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return None
+    return EmbeddingCache(
+        settings.EMBEDDING_CACHE_PATH,
+        max_memory_entries=settings.EMBEDDING_CACHE_MEMORY_ENTRIES,
+        max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    )
+
+@lru_cache()
+def get_qdrant_vector_repo() -> QdrantKnowledgeVectorRepository:
+    settings = get_settings()
+    return QdrantKnowledgeVectorRepository(
+        url=settings.QDRANT_URL,
+        api_key=settings.QDRANT_API_KEY,
+        collection_name=settings.QDRANT_COLLECTION,
+        timeout=settings.QDRANT_TIMEOUT_SECONDS,
+        prefer_grpc=settings.QDRANT_PREFER_GRPC,
+        grpc_port=settings.QDRANT_GRPC_PORT,
+        max_connections=settings.QDRANT_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.QDRANT_POOL_MAX_KEEPALIVE,
+        keepalive_expiry_seconds=settings.QDRANT_KEEPALIVE_EXPIRY_SECONDS,
+        embedding_cache=get_embedding_cache(),
+        quantization=settings.VECTOR_QUANTIZATION,
+        oversampling=settings.VECTOR_RESCORE_OVERSAMPLING,
+        embedding_model=settings.EMBEDDING_MODEL,
+        model_refresh_seconds=settings.EMBEDDING_MODEL_REFRESH_SECONDS,
+        projection_dir=settings.EMBEDDING_PROJECTION_DIR,
+    )
+
+@lru_cache()
+def get_local_vector_repo() -> LocalKnowledgeVectorRepository:
+    settings = get_settings()
+    return LocalKnowledgeVectorRepository(
+        settings.LOCAL_VECTOR_INDEX_PATH,
+        dim=settings.LOCAL_VECTOR_INDEX_DIM,
+        ai_service=get_ai_service(settings),
+        quantization=settings.VECTOR_QUANTIZATION,
+        oversampling=settings.VECTOR_RESCORE_OVERSAMPLING,
+        # A API só lê: quem grava é o seed_rag --local-index, num processo à parte
+        read_only=True,
+        projection=(
+            load_projection(settings.EMBEDDING_PROJECTION_DIR, settings.EMBEDDING_PROJECTION)
+            if settings.EMBEDDING_PROJECTION else None
+        ),
+    )
+
+@lru_cache()
+def get_graph_snapshot_cache() -> GraphSnapshotCache:
+    return GraphSnapshotCache(poll_interval_seconds=get_settings().GRAPH_SNAPSHOT_POLL_INTERVAL_SECONDS)
+
+@lru_cache()
+def get_graph_version_listener() -> GraphVersionListener:
+    return GraphVersionListener(
+        ASYNC_DATABASE_URL,
+        get_graph_snapshot_cache(),
+        reconnect_seconds=get_settings().GRAPH_SNAPSHOT_RECONNECT_SECONDS,
+    )
+
 
 # =========================================================
 # Conditional Repository Providers
 # =========================================================
 
+async def get_read_db(
+    db: AsyncSession = Depends(get_async_db),
+    read_db: Optional[AsyncSession] = Depends(get_async_read_db),
+) -> AsyncSession:
+    """Sessão de leitura: a réplica, se configurada; senão a própria sessão do primário."""
+    return read_db if read_db is not None else db
+
 async def get_student_repository(
     db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_read_db),
     settings: Settings = Depends(get_settings),
 ) -> ports.StudentRepository:
     if settings.USE_IN_MEMORY_DB:
         return get_in_memory_student_repo()
-    return PostgresStudentRepository(db)
+    return PostgresStudentRepository(db, read_db)
 
 async def get_study_plan_repository(
     db: AsyncSession = Depends(get_async_db),
@@ -105,27 +225,38 @@ async def get_study_plan_repository(
 
 async def get_knowledge_repository(
     db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_read_db),
     settings: Settings = Depends(get_settings),
 ) -> ports.KnowledgeRepository:
     if settings.USE_IN_MEMORY_DB:
         return get_in_memory_knowledge_repo()
-    return PostgresKnowledgeRepository(db)
+    # O snapshot depende da sequência/triggers de versão, que só existem no Postgres
+    if settings.GRAPH_SNAPSHOT_ENABLED and "postgresql" in ASYNC_DATABASE_URL:
+        # Carrega do primário: a versão notificada precisa ser a do conteúdo lido,
+        # e uma réplica atrasada fixaria um snapshot velho até a próxima escrita
+        return CachedKnowledgeRepository(PostgresKnowledgeRepository(db), get_graph_snapshot_cache(), session=db)
+    return PostgresKnowledgeRepository(db, read_db)
 
 async def get_performance_repository(
     db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_read_db),
     settings: Settings = Depends(get_settings),
 ) -> ports.PerformanceRepository:
     if settings.USE_IN_MEMORY_DB:
         return get_in_memory_performance_repo()
-    return PostgresPerformanceRepository(db)
+    repo = PostgresPerformanceRepository(db, read_db)
+    if settings.PERFORMANCE_EVENT_DURABILITY == "buffered":
+        return BufferedPerformanceRepository(repo, get_performance_event_buffer())
+    return repo
 
 async def get_cognitive_profile_repository(
     db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_read_db),
     settings: Settings = Depends(get_settings),
 ) -> ports.CognitiveProfileRepository:
     if settings.USE_IN_MEMORY_DB:
         return get_in_memory_cognitive_profile_repo()
-    return PostgresCognitiveProfileRepository(db)
+    return PostgresCognitiveProfileRepository(db, read_db)
 
 async def get_error_event_repository(
     db: AsyncSession = Depends(get_async_db),
@@ -135,14 +266,29 @@ async def get_error_event_repository(
         return get_in_memory_error_event_repo()
     return PostgresErrorEventRepository(db)
 
-def get_knowledge_vector_repository(
+async def get_semantic_neighbor_repository(
+    db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_read_db),
     settings: Settings = Depends(get_settings),
-) -> KnowledgeVectorRepository:
-    """Provides a vector repository instance based on settings."""
-    return QdrantKnowledgeVectorRepository(
-        url=settings.QDRANT_URL,
-        api_key=settings.QDRANT_API_KEY
-    )
+) -> ports.SemanticNeighborRepository:
+    if settings.USE_IN_MEMORY_DB:
+        return get_in_memory_semantic_neighbor_repo()
+    return PostgresSemanticNeighborRepository(db, read_db)
+
+async def get_node_context_repository(
+    db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_read_db),
+    settings: Settings = Depends(get_settings),
+) -> ports.NodeContextRepository:
+    if settings.USE_IN_MEMORY_DB:
+        return get_in_memory_node_context_repo()
+    return PostgresNodeContextRepository(db, read_db)
+
+def get_knowledge_vector_repository() -> KnowledgeVectorRepository:
+    """Provides the process-wide vector repository (pooled Qdrant client or local index)."""
+    if get_settings().VECTOR_STORE == "local":
+        return get_local_vector_repo()
+    return get_qdrant_vector_repo()
 
 
 # =========================================================
@@ -179,6 +325,13 @@ def get_ai_service(settings: Settings = Depends(get_settings)) -> AIService:
 def get_intelligence_engine() -> IntelligenceEngine:
     return IntelligenceEngine()
 
+async def get_semantic_propagator(
+    knowledge_repo: ports.KnowledgeRepository = Depends(get_knowledge_repository),
+    vector_repo: KnowledgeVectorRepository = Depends(get_knowledge_vector_repository),
+    neighbor_repo: ports.SemanticNeighborRepository = Depends(get_semantic_neighbor_repository),
+) -> SemanticPropagator:
+    return SemanticPropagator(knowledge_repo, vector_repo, neighbor_repo)
+
 async def get_roi_analysis_service(
     engine: IntelligenceEngine = Depends(get_intelligence_engine),
 ) -> ROIAnalysisService:
@@ -203,6 +356,7 @@ async def get_generate_study_plan_use_case(
     cognitive_profile_repo: ports.CognitiveProfileRepository = Depends(get_cognitive_profile_repository),
     vector_repo: KnowledgeVectorRepository = Depends(get_knowledge_vector_repository),
     ai_service: AIService = Depends(get_ai_service),
+    node_context_repo: ports.NodeContextRepository = Depends(get_node_context_repository),
     settings: Settings = Depends(get_settings),
 ) -> GenerateStudyPlanUseCase:
     return GenerateStudyPlanUseCase(
@@ -215,6 +369,7 @@ async def get_generate_study_plan_use_case(
         ai_service=ai_service,
         adaptive_rules=[StressTestRule()],  # Inject StressTestRule to start monitoring response speed
         settings=settings,
+        node_context_repo=node_context_repo,
     )
 
 async def get_analyze_student_performance_use_case(
@@ -230,11 +385,13 @@ async def get_record_review_use_case(
     performance_repo: ports.PerformanceRepository = Depends(get_performance_repository),
     knowledge_repo: ports.KnowledgeRepository = Depends(get_knowledge_repository),
     intelligence_engine: IntelligenceEngine = Depends(get_intelligence_engine),
+    semantic_propagator: SemanticPropagator = Depends(get_semantic_propagator),
 ) -> RecordReviewUseCase:
     return RecordReviewUseCase(
         performance_repo=performance_repo,
         node_repo=knowledge_repo,
         intelligence_engine=intelligence_engine,
+        semantic_propagator=semantic_propagator,
     )
 
 
@@ -246,6 +403,7 @@ async def get_start_exam_simulator_use_case(
     vector_repo: ports.KnowledgeVectorRepository = Depends(get_knowledge_vector_repository),
     performance_repo: ports.PerformanceRepository = Depends(get_performance_repository),
     ai_service: AIService = Depends(get_ai_service),
+    node_context_repo: ports.NodeContextRepository = Depends(get_node_context_repository),
 ) -> StartExamSimulatorUseCase:
     return StartExamSimulatorUseCase(
         student_repo=student_repo,
@@ -255,4 +413,5 @@ async def get_start_exam_simulator_use_case(
         vector_repo=vector_repo,
         performance_repo=performance_repo,
         ai_service=ai_service,
+        node_context_repo=node_context_repo,
     )
\ No newline at end of file
@@ -1,5 +1,7 @@
 # brain/api/fastapi/main.py
 
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
@@ -13,23 +15,62 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from brain.api.fastapi.routes import study_routes, performance_routes, roi_routes, memory_routes
+from brain.config.settings import settings
+from brain.infrastructure.persistence.database import async_engine, ASYNC_DATABASE_URL
+from brain.infrastructure.persistence.partition_maintenance import maintain_partitions_async
+from brain.api.fastapi.dependencies import (
+    get_performance_event_buffer,
+    get_graph_version_listener,
+    get_qdrant_vector_repo,
+    get_embedding_cache,
+)
+
+logger = logging.getLogger(__name__)
 
 
 # =========================================================
 # Application Lifespan
 # =========================================================
 
-# @asynccontextmanager
-# async def lifespan(app: FastAPI):
-#     """
-#     Ponto único de inicialização e finalização da aplicação.
-#     Ideal para:
-#     - conexões externas
-#     - warmup de cache
-#     - verificação de dependências
-#     """
-#     yield
-#     # shutdown hooks aqui se necessário
+async def _partition_maintenance_loop() -> None:
+    """Cria partições futuras de performance_events e aposenta as antigas."""
+    while True:
+        try:
+            await maintain_partitions_async(async_engine)
+        except Exception as e:
+            logger.error(f"Falha na manutenção de partições: {e}", exc_info=True)
+        await asyncio.sleep(settings.PERFORMANCE_PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ponto único de inicialização e finalização da aplicação.
+    """
+    tasks = []
+    use_postgres = not settings.USE_IN_MEMORY_DB and "postgresql" in ASYNC_DATABASE_URL
+    if use_postgres:
+        tasks.append(asyncio.create_task(_partition_maintenance_loop()))
+        if settings.GRAPH_SNAPSHOT_ENABLED:
+            get_graph_version_listener().start()
+
+    yield
+
+    for task in tasks:
+        task.cancel()
+    await get_graph_version_listener().stop()
+
+    # Grava os PerformanceEvent ainda pendentes no buffer write-behind
+    await get_performance_event_buffer().stop()
+
+    # Fecha o pool do cliente Qdrant, se chegou a ser criado
+    if get_qdrant_vector_repo.cache_info().currsize:
+        await get_qdrant_vector_repo().close()
+
+    embedding_cache = get_embedding_cache() if get_embedding_cache.cache_info().currsize else None
+    if embedding_cache is not None:
+        logger.info(f"Cache de embeddings: {embedding_cache.stats()}")
+        embedding_cache.close()
 
 
 # =========================================================
@@ -39,7 +80,7 @@ from brain.api.fastapi.routes import study_routes, performance_routes, roi_route
 app = FastAPI(
     title="Athena Brain - Intelligent Adaptive Engine",
     version="1.0.0",
-    # lifespan=lifespan,
+    lifespan=lifespan,
 )
 
 
@@ -17,5 +17,5 @@ async def get_memory_status(
     student = await student_repo.get_by_id(student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
-    history = await performance_repo.get_history_for_student(student_id)
-    return await service.get_student_memory_status(student, history)
+    topic_stats = await performance_repo.get_topic_stats(student_id)
+    return await service.get_student_memory_status_from_stats(student, topic_stats)
@@ -1,10 +1,16 @@
+import base64
+from datetime import datetime
+from typing import Optional, Tuple
 from fastapi import APIRouter, Depends, Query, Path, status, HTTPException
 from uuid import UUID
 from pydantic import BaseModel
 from brain.api.fastapi.dependencies import (
     get_analyze_student_performance_use_case,
     get_record_review_use_case,
+    get_performance_repository,
 )
+from brain.application.ports.repositories import PerformanceRepository
+from brain.domain.entities.performance_event import PerformanceEvent
 from brain.application.use_cases.analyze_student_performance import (
     AnalyzeStudentPerformance,
 )
@@ -62,3 +68,50 @@ async def analyze_performance(
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail="An unexpected error occurred during analysis.")
+
+
+# Cursor opaco da exportação: base64 de "<occurred_at ISO>|<id>" do último item
+def _encode_cursor(event: PerformanceEvent) -> str:
+    raw = f"{event.occurred_at.isoformat()}|{event.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        occurred_at, event_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(occurred_at), UUID(event_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
+
+@router.get(
+    "/{student_id}/history",
+    status_code=status.HTTP_200_OK,
+    summary="Export student performance history (keyset-paginated)",
+)
+async def export_history(
+    student_id: UUID = Path(..., description="UUID do estudante"),
+    cursor: Optional[str] = Query(None, description="`next_cursor` da página anterior"),
+    limit: int = Query(500, ge=1, le=5000),
+    performance_repo: PerformanceRepository = Depends(get_performance_repository),
+):
+    """
+    Exporta o histórico em ordem cronológica. Cada página é uma busca por
+    keyset (occurred_at, id), com custo constante mesmo no fim do histórico.
+    """
+    after = _decode_cursor(cursor) if cursor else None
+    events = await performance_repo.get_history_page(student_id, after=after, limit=limit)
+    return {
+        "items": [
+            {
+                "id": str(e.id),
+                "event_type": e.event_type.value,
+                "occurred_at": e.occurred_at.isoformat(),
+                "topic": e.topic,
+                "metric": e.metric.value,
+                "value": e.value,
+                "baseline": e.baseline,
+                "event_metadata": e.event_metadata,
+            }
+            for e in events
+        ],
+        "next_cursor": _encode_cursor(events[-1]) if len(events) == limit else None,
+    }
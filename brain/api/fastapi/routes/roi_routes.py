@@ -1,5 +1,7 @@
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
 from brain.api.fastapi.dependencies import get_student_repository, get_roi_analysis_service, get_performance_repository
 from brain.application.services.roi_analysis_service import ROIAnalysisService
 from brain.application.ports.repositories import StudentRepository, PerformanceRepository
@@ -9,6 +11,7 @@ router = APIRouter(prefix="/students", tags=["ROI"])
 @router.get("/{student_id}/roi-report")
 async def get_roi_report(
     student_id: UUID,
+    since: Optional[datetime] = Query(None, description="Restringe o relatório a eventos a partir desta data"),
     student_repo: StudentRepository = Depends(get_student_repository),
     performance_repo: PerformanceRepository = Depends(get_performance_repository),
     service: ROIAnalysisService = Depends(get_roi_analysis_service),
@@ -16,6 +19,12 @@ async def get_roi_report(
     student = await student_repo.get_by_id(student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
-    
-    history = await performance_repo.get_history_for_student(student_id)
-    return service.analyze(student, history)
+
+    if since is not None:
+        # Janela arbitrária: os agregados são acumulados desde sempre, então
+        # o histórico da janela é agregado em streaming (memória constante)
+        events = performance_repo.stream_history_for_student(student_id, since=since)
+        return await service.analyze_stream(student, events)
+
+    topic_stats = await performance_repo.get_topic_stats(student_id)
+    return service.analyze(student, topic_stats=topic_stats)
@@ -29,4 +29,16 @@ class AIService(ABC):
     @abstractmethod
     async def generate_embedding(self, text: str) -> List[float]:
         """Gera representação vetorial."""
+        pass
+
+    @abstractmethod
+    async def generate_embeddings(
+        self,
+        texts: List[str],
+        task_type: str = "retrieval_document",
+    ) -> List[List[float]]:
+        """
+        Gera vetores para vários textos, na mesma ordem, usando as requisições
+        em lote do provedor (fatiadas no limite dele). Textos vazios recebem `[]`.
+        """
         pass
\ No newline at end of file
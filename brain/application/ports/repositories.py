@@ -1,13 +1,16 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
 from uuid import UUID
 from datetime import datetime
 from brain.domain.entities.student import Student
 from brain.domain.entities.cognitive_profile import CognitiveProfile
 from brain.domain.entities.performance_event import PerformanceEvent
+from brain.domain.entities.student_topic_stats import StudentTopicStats
 from brain.domain.entities.knowledge_node import KnowledgeNode
 from brain.domain.entities.study_plan import StudyPlan
 from brain.domain.entities.error_event import ErrorEvent
+from brain.domain.value_objects.dependency_graph import DependencyGraph
 
 class StudentRepository(ABC):
     @abstractmethod
@@ -20,20 +23,78 @@ class PerformanceRepository(ABC):
         pass
 
     @abstractmethod
-    async def get_history_for_student(self, student_id: UUID) -> List[PerformanceEvent]:
+    async def get_history_for_student(self, student_id: UUID, since: Optional[datetime] = None) -> List[PerformanceEvent]:
+        """
+        Histórico do aluno, do mais recente para o mais antigo.
+        `since` limita a leitura a eventos a partir dessa data (poda de partições).
+        """
         pass
 
     @abstractmethod
-    async def get_history(self, student_id: UUID, node_id: UUID) -> List[PerformanceEvent]:
+    def stream_history_for_student(
+        self, student_id: UUID, since: Optional[datetime] = None, batch_size: int = 1000
+    ) -> AsyncIterator[PerformanceEvent]:
+        """
+        Histórico do aluno em ordem cronológica, entregue aos poucos (memória
+        constante); use em vez de `get_history_for_student` para agregações.
+        """
+        pass
+
+    @abstractmethod
+    async def get_history_page(
+        self, student_id: UUID, after: Optional[Tuple[datetime, UUID]] = None, limit: int = 500
+    ) -> List[PerformanceEvent]:
+        """
+        Página do histórico em ordem cronológica, paginada por keyset:
+        `after` é o (occurred_at, id) do último evento da página anterior.
+        """
+        pass
+
+    @abstractmethod
+    async def get_history(self, student_id: UUID, node_id: UUID, limit: int = 50) -> List[PerformanceEvent]:
+        """
+        Os `limit` eventos mais recentes do aluno num nó, em ordem cronológica
+        (o mais recente por último).
+        """
         pass
 
     @abstractmethod
     async def save(self, event: PerformanceEvent) -> None:
         pass
 
+    @abstractmethod
+    async def save_many(self, events: Iterable[PerformanceEvent]) -> None:
+        """Grava vários eventos numa única ida ao banco."""
+        pass
+
+    @abstractmethod
+    async def get_topic_stats(self, student_id: UUID) -> List[StudentTopicStats]:
+        """Agregados por (tópico, métrica), mantidos a cada `save`; O(tópicos), não O(histórico)."""
+        pass
+
 class KnowledgeRepository(ABC):
     @abstractmethod
-    async def get_full_graph(self) -> List[KnowledgeNode]:
+    async def get_full_graph(self) -> Sequence[KnowledgeNode]:
+        """
+        Grafo completo. O resultado pode ser um snapshot compartilhado entre
+        requisições: trate-o como somente leitura (use `dataclasses.replace`
+        para derivar nós alterados).
+        """
+        pass
+
+    @abstractmethod
+    async def get_dependency_graph(self) -> DependencyGraph:
+        """Toda a tabela de dependências numa consulta, como adjacência CSR."""
+        pass
+
+    @abstractmethod
+    async def get_prerequisite_closure(self, node_ids: Iterable[UUID]) -> Set[UUID]:
+        """IDs de todos os pré-requisitos transitivos dos nós informados."""
+        pass
+
+    @abstractmethod
+    async def get_dependent_closure(self, node_ids: Iterable[UUID]) -> Set[UUID]:
+        """IDs de todos os nós que dependem, direta ou transitivamente, dos informados."""
         pass
 
     @abstractmethod
@@ -56,6 +117,16 @@ class KnowledgeRepository(ABC):
     async def save(self, node: KnowledgeNode) -> None:
         pass
 
+    @abstractmethod
+    async def update_many(self, nodes: Iterable[KnowledgeNode]) -> None:
+        """Atualiza o estado de vários nós existentes numa única ida ao banco."""
+        pass
+
+    @abstractmethod
+    async def save_many(self, nodes: Iterable[KnowledgeNode]) -> None:
+        """Upsert de vários nós numa única ida ao banco."""
+        pass
+
 class StudyPlanRepository(ABC):
     @abstractmethod
     async def save(self, study_plan: StudyPlan) -> None:
@@ -79,6 +150,15 @@ class ErrorEventRepository(ABC):
     async def get_by_student_and_subject(self, student_id: UUID, subject: str) -> List[ErrorEvent]:
         pass
 
+    @abstractmethod
+    async def save(self, error: ErrorEvent) -> None:
+        pass
+
+    @abstractmethod
+    async def save_many(self, errors: Iterable[ErrorEvent]) -> None:
+        """Grava vários erros num único INSERT multi-row."""
+        pass
+
 
 class KnowledgeVectorRepository(ABC):
     """
@@ -88,9 +168,35 @@ class KnowledgeVectorRepository(ABC):
     Nenhuma regra de negócio deve viver aqui.
     """
     @abstractmethod
-    async def search_context(self, query_vector: List[float], limit: int = 3) -> str:
+    async def search_context(
+        self,
+        query: str,
+        limit: int = 3,
+        *,
+        filters: Optional[Mapping[str, Any]] = None,
+    ) -> str:
+        """
+        Busca trechos de texto relevantes para a consulta.
+
+        `filters` restringe a busca a pontos cujo payload tem exatamente esses
+        valores (ex.: {"subject": "Direito Constitucional"}).
+        """
+        pass
+
+    @abstractmethod
+    async def search_context_many(
+        self,
+        queries: Sequence[str],
+        limit: int = 3,
+        *,
+        filters: Optional[Mapping[str, Mapping[str, Any]]] = None,
+    ) -> Dict[str, str]:
         """
-        Busca trechos de texto relevantes usando um vetor de consulta.
+        `search_context` para várias consultas de uma vez: um único lote de
+        embeddings e uma única ida ao índice. Retorna {consulta: contexto};
+        consultas sem resultado (ou vazias) mapeiam para "".
+
+        `filters` é indexado pela consulta: {consulta: {campo: valor}}.
         """
         pass
 
@@ -111,4 +217,88 @@ class KnowledgeVectorRepository(ABC):
         Returns:
             Lista de UUIDs de nós semanticamente relacionados.
         """
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_node_vectors_version(self, node_ids: Iterable[UUID]) -> str:
+        """
+        Impressão digital dos vetores dos nós informados: muda sempre que algum
+        embedding é criado, alterado ou removido.
+        """
+        pass
+
+    @abstractmethod
+    async def get_corpus_version(self) -> str:
+        """
+        Impressão digital do corpus inteiro: muda a cada escrita no índice
+        (revisão gravada por quem escreve) e a cada troca de coleção ou modelo.
+        """
+        pass
+
+    async def get_cached_corpus_version(self) -> Optional[str]:
+        """
+        Versão do corpus para o caminho da requisição, sem ida ao índice remoto:
+        adaptadores remotos devolvem a última versão conhecida (None se ainda
+        não há) e a atualizam em segundo plano. O padrão serve aos adaptadores
+        em que `get_corpus_version` já é barata.
+        """
+        return await self.get_corpus_version()
+
+    @abstractmethod
+    async def compute_node_neighbors(
+        self,
+        node_ids: Iterable[UUID],
+        *,
+        limit: int = 5,
+    ) -> Dict[UUID, List[Tuple[UUID, float]]]:
+        """
+        k vizinhos mais próximos de cada nó, restritos aos próprios nós, em
+        buscas em lote. Retorna {nó: [(vizinho, score), ...]} por score decrescente.
+        """
+        pass
+
+
+class SemanticNeighborRepository(ABC):
+    """Vizinhança semântica pré-calculada (tabela node_semantic_neighbors)."""
+
+    @abstractmethod
+    async def get_version(self) -> Optional[str]:
+        """Versão dos vetores usada no último cálculo, ou None se nunca calculada."""
+        pass
+
+    @abstractmethod
+    async def get_neighbor_ids(self, node_id: UUID, limit: int = 5) -> List[UUID]:
+        pass
+
+    @abstractmethod
+    async def replace_all(self, version: str, neighbors: Mapping[UUID, Sequence[Tuple[UUID, float]]]) -> None:
+        """Substitui a tabela inteira pelo novo cálculo, na mesma transação."""
+        pass
+
+
+@dataclass(frozen=True)
+class NodeContext:
+    """Contexto RAG pré-calculado de um nó para uma versão do corpus."""
+    node_id: UUID
+    query: str
+    subject: Optional[str]
+    context: str
+    corpus_version: str
+
+
+class NodeContextRepository(ABC):
+    """Contexto RAG pré-calculado por nó (tabela node_contexts)."""
+
+    @abstractmethod
+    async def get_version(self) -> Optional[str]:
+        """Versão do corpus usada no último cálculo, ou None se nunca calculado."""
+        pass
+
+    @abstractmethod
+    async def get_contexts(self, node_ids: Iterable[UUID]) -> Dict[UUID, NodeContext]:
+        pass
+
+    @abstractmethod
+    async def replace_all(self, version: str, contexts: Iterable[NodeContext]) -> None:
+        """Substitui a tabela inteira pelo novo cálculo, na mesma transação."""
+        pass
@@ -71,4 +71,29 @@ class MemoryAnalysisService:
             }
             reports.append(report)
 
+        return reports
+
+    async def get_student_memory_status_from_stats(self, student: object, topic_stats: list) -> list:
+        """
+        Mesmo relatório de `get_student_memory_status`, a partir dos agregados
+        por (tópico, métrica) em vez do histórico completo.
+        """
+        reports = []
+        if not self.engine:
+            return reports
+
+        topics = {}
+        for stats in topic_stats:
+            topics.setdefault(stats.topic, []).append(stats)
+
+        for topic, stats in topics.items():
+            analysis = self.engine.analyze_memory_state_from_stats(stats)
+            reports.append({
+                "subject_name": topic,
+                "current_retention": analysis.get("current_retention"),
+                "stability_days": analysis.get("stability_days"),
+                "needs_review": analysis.get("needs_review", False),
+                "status": "Crítico - Revisar Agora" if analysis.get("needs_review") else "Consolidado",
+            })
+
         return reports
\ No newline at end of file
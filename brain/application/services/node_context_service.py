@@ -0,0 +1,150 @@
+import logging
+from typing import Dict, List, Optional, Sequence
+
+from brain.application.ports.repositories import (
+    KnowledgeRepository,
+    KnowledgeVectorRepository,
+    NodeContext,
+    NodeContextRepository,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _node_query(node) -> str:
+    return getattr(node, 'name', str(node))
+
+
+def _node_subject(node) -> Optional[str]:
+    subject = getattr(node, 'subject', None)
+    return subject if isinstance(subject, str) and subject else None
+
+
+class NodeContextService:
+    """
+    Contexto RAG dos nós de um plano, indexado pelo nome do nó.
+
+    Lê primeiro o contexto pré-calculado (node_contexts), sem embedding nem
+    busca vetorial; só os nós sem entrada, ou cuja entrada foi calculada para
+    outro nome/assunto ou outra versão do corpus, vão à busca ao vivo.
+    """
+
+    def __init__(
+        self,
+        vector_repo: Optional[KnowledgeVectorRepository],
+        context_repo: Optional[NodeContextRepository] = None,
+        *,
+        limit: int = 1,
+    ) -> None:
+        self._vector_repo = vector_repo
+        self._context_repo = context_repo
+        self._limit = limit
+
+    async def search_live(self, nodes: Sequence) -> Dict[str, str]:
+        """Busca em lote restrita ao assunto de cada nó; sem resultado, tenta o corpus inteiro."""
+        if not nodes or self._vector_repo is None:
+            return {}
+        names = [_node_query(node) for node in nodes]
+        filters = {_node_query(node): {"subject": _node_subject(node)} for node in nodes if _node_subject(node)}
+        contexts = await self._vector_repo.search_context_many(names, limit=self._limit, filters=filters)
+        # Documentos antigos não têm `subject` no payload
+        missing = [name for name in names if name in filters and not contexts.get(name)]
+        if missing:
+            contexts.update(await self._vector_repo.search_context_many(missing, limit=self._limit))
+        return contexts
+
+    async def _current_corpus_version(self) -> Optional[str]:
+        """Cópia da versão do corpus mantida pelo repositório (sem ida ao índice); None se não der para saber."""
+        if self._vector_repo is None:
+            return None
+        try:
+            return await self._vector_repo.get_cached_corpus_version()
+        except Exception as e:
+            # Sem o índice vetorial a busca ao vivo também falharia: fica com o pré-calculado
+            logger.warning(f"Versão do corpus indisponível, usando o contexto pré-calculado: {e}")
+            return None
+
+    async def get_contexts(self, nodes: Sequence) -> Dict[str, str]:
+        if not nodes:
+            return {}
+        contexts: Dict[str, str] = {}
+        pending = list(nodes)
+        if self._context_repo is not None:
+            try:
+                stored = await self._context_repo.get_contexts(
+                    node.id for node in nodes if getattr(node, 'id', None) is not None
+                )
+            except Exception as e:
+                logger.warning(f"Contexto pré-calculado indisponível, usando busca ao vivo: {e}")
+                stored = {}
+            current_version = await self._current_corpus_version() if stored else None
+            pending = []
+            for node in nodes:
+                entry = stored.get(getattr(node, 'id', None))
+                if (
+                    entry is not None
+                    and entry.query == _node_query(node)
+                    and entry.subject == _node_subject(node)
+                    and (current_version is None or entry.corpus_version == current_version)
+                ):
+                    contexts[entry.query] = entry.context
+                else:
+                    pending.append(node)
+            if pending:
+                logger.info(f"RAG: {len(nodes) - len(pending)} contextos pré-calculados, {len(pending)} ao vivo.")
+        if pending:
+            contexts.update(await self.search_live(pending))
+        return contexts
+
+
+class NodeContextRefresher:
+    """
+    Job em lote que calcula o contexto RAG de todos os nós e grava em
+    node_contexts. Só recalcula quando a versão do corpus muda.
+    """
+
+    def __init__(
+        self,
+        knowledge_repo: KnowledgeRepository,
+        vector_repo: KnowledgeVectorRepository,
+        context_repo: NodeContextRepository,
+        *,
+        limit: int = 1,
+        batch_size: int = 100,
+    ) -> None:
+        self._knowledge_repo = knowledge_repo
+        self._vector_repo = vector_repo
+        self._context_repo = context_repo
+        self._service = NodeContextService(vector_repo, limit=limit)
+        self._batch_size = batch_size
+
+    async def refresh(self, *, force: bool = False) -> bool:
+        """Retorna True se a tabela foi recalculada."""
+        version = await self._vector_repo.get_corpus_version()
+        if not force and version == await self._context_repo.get_version():
+            return False
+
+        nodes = list(await self._knowledge_repo.get_full_graph())
+        entries: List[NodeContext] = []
+        for start in range(0, len(nodes), self._batch_size):
+            batch = nodes[start:start + self._batch_size]
+            contexts = await self._service.search_live(batch)
+            entries.extend(
+                NodeContext(
+                    node_id=node.id,
+                    query=_node_query(node),
+                    subject=_node_subject(node),
+                    context=contexts.get(_node_query(node), ""),
+                    corpus_version=version,
+                )
+                for node in batch
+            )
+
+        # A busca engole falhas (contexto vazio): não grava um cálculo todo vazio
+        if entries and not any(entry.context for entry in entries):
+            logger.warning("Contexto pré-calculado: nenhum nó com contexto; mantendo o cálculo anterior.")
+            return False
+
+        await self._context_repo.replace_all(version, entries)
+        logger.info(f"Contexto RAG pré-calculado: {len(entries)} nós (corpus {version[:12]}).")
+        return True
@@ -1,5 +1,6 @@
-from typing import List, Dict, Optional
+from typing import AsyncIterable, List, Dict, Optional
 from brain.domain.entities.knowledge_node import KnowledgeNode
+from brain.domain.entities.student_topic_stats import StudentTopicStats
 from brain.domain.value_objects.roi_status import ROIStatus
 
 
@@ -30,9 +31,24 @@ class ROIAnalysisService:
         if score > 0.4: return "ESTRATÉGICO: Reforço Necessário"
         return "MANUTENÇÃO: Ajuste Fino"
 
-    def analyze(self, student: object, history: List[object]) -> List[dict]:
+    async def analyze_stream(self, student: object, events: AsyncIterable[object]) -> List[dict]:
+        """
+        Mesmo relatório de `analyze`, agregando os eventos à medida que chegam:
+        a memória usada é proporcional ao número de tópicos, não ao histórico.
+        """
+        stats: Dict[tuple, StudentTopicStats] = {}
+        async for event in events:
+            key = (event.topic or "", event.metric)
+            if key not in stats:
+                stats[key] = StudentTopicStats(event.student_id, event.topic or "", event.metric)
+            stats[key].add(event)
+        return self.analyze(student, topic_stats=list(stats.values()))
+
+    def analyze(self, student: object, history: Optional[List[object]] = None, topic_stats: Optional[List[object]] = None) -> List[dict]:
         """
         Gera um relatório por matéria baseado no engine configurado.
+        Com `topic_stats` (agregados de StudentTopicStats) o score vem direto
+        dos agregados; `history` é mantido para chamadores antigos.
         Compatível com os testes que injetam um `engine` mock.
         """
         report = []
@@ -40,13 +56,16 @@ class ROIAnalysisService:
             return report
 
         # Permite que o motor retorne um dict {subject_name: score}
-        try:
-            scores = self.engine.calculate_roi_per_subject()
-        except TypeError:
-            # Caso o mock espere argumentos, tente passar history
-            scores = self.engine.calculate_roi_per_subject(history)
-        except Exception:
-            scores = {}
+        if topic_stats is not None:
+            scores = self.engine.calculate_roi_from_stats(topic_stats)
+        else:
+            try:
+                scores = self.engine.calculate_roi_per_subject()
+            except TypeError:
+                # Caso o mock espere argumentos, tente passar history
+                scores = self.engine.calculate_roi_per_subject(history)
+            except Exception:
+                scores = {}
 
         for subj in getattr(student, "subjects", []):
             name = getattr(subj, "name", str(subj))
@@ -0,0 +1,41 @@
+import logging
+
+from brain.application.ports.repositories import (
+    KnowledgeRepository,
+    KnowledgeVectorRepository,
+    SemanticNeighborRepository,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticNeighborRefresher:
+    """
+    Job em lote que recalcula a vizinhança semântica de todos os nós e grava
+    em node_semantic_neighbors. Só recalcula quando a versão dos vetores muda.
+    """
+
+    def __init__(
+        self,
+        knowledge_repo: KnowledgeRepository,
+        vector_repo: KnowledgeVectorRepository,
+        neighbor_repo: SemanticNeighborRepository,
+        *,
+        neighborhood_size: int = 5,
+    ) -> None:
+        self._knowledge_repo = knowledge_repo
+        self._vector_repo = vector_repo
+        self._neighbor_repo = neighbor_repo
+        self._neighborhood_size = neighborhood_size
+
+    async def refresh(self, *, force: bool = False) -> bool:
+        """Retorna True se a tabela foi recalculada."""
+        node_ids = [node.id for node in await self._knowledge_repo.get_full_graph()]
+        version = await self._vector_repo.get_node_vectors_version(node_ids)
+        if not force and version == await self._neighbor_repo.get_version():
+            return False
+
+        neighbors = await self._vector_repo.compute_node_neighbors(node_ids, limit=self._neighborhood_size)
+        await self._neighbor_repo.replace_all(version, neighbors)
+        logger.info(f"Vizinhança semântica recalculada: {len(neighbors)} nós (versão {version[:12]}).")
+        return True
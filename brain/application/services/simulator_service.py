@@ -1,3 +1,4 @@
+from dataclasses import is_dataclass, replace
 from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
@@ -80,14 +81,19 @@ class SimulatorService:
             selected = [n for n, _ in candidates[:num_questions]]
 
         # Aplicar redução de tempo estimado por questão conforme stress_level e progresso
+        # Os nós vêm do snapshot compartilhado do grafo: o tempo estimado vai numa
+        # cópia, nunca no objeto original.
         total = len(selected)
-        for idx, node in enumerate(selected):
+        for idx, node in enumerate(list(selected)):
             base_time = getattr(node, 'estimated_study_time', 60) if hasattr(node, 'estimated_study_time') else 60
             progress = idx / max(1, total - 1) if total > 1 else 0.0
             # Redução proporcional ao progresso e stress_level
             reduction_factor = 1.0 - (progress * 0.5 * float(stress_level))
             reduction_factor = max(0.5, reduction_factor)  # nunca reduzir mais que 50%
             estimated_seconds = max(min_time_sec, int(base_time * reduction_factor))
-            setattr(node, 'estimated_time_seconds', estimated_seconds)
+            if is_dataclass(node):
+                selected[idx] = replace(node, estimated_time_seconds=estimated_seconds)
+            else:
+                setattr(node, 'estimated_time_seconds', estimated_seconds)
 
         return selected
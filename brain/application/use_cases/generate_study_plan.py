@@ -17,6 +17,7 @@ from brain.application.ports.repositories import (
     StudyPlanRepository,
     CognitiveProfileRepository,
     KnowledgeVectorRepository,
+    NodeContextRepository,
 )
 from brain.application.ports.ai_service import AIService
 from brain.application.dto.study_plan_dto import (
@@ -27,6 +28,7 @@ from brain.application.dto.study_plan_dto import (
 )
 from brain.application.services.roi_analysis_service import ROIAnalysisService
 from brain.application.services.memory_analysis_service import MemoryAnalysisService
+from brain.application.services.node_context_service import NodeContextService
 
 
 # Configuração do Logger
@@ -49,6 +51,7 @@ class GenerateStudyPlanUseCase:
         ai_service: AIService = None,
         adaptive_rules: List[AdaptiveRule] = None,
         settings: Settings = None,
+        node_context_repo: NodeContextRepository = None,
     ):
         self.student_repo = student_repo
         self.performance_repo = performance_repo
@@ -57,6 +60,8 @@ class GenerateStudyPlanUseCase:
         self.cognitive_profile_repo = cognitive_profile_repo
         self.vector_repo = vector_repo
         self.ai_service = ai_service
+        # Contexto pré-calculado por nó; busca ao vivo só para o que faltar
+        self.node_context_service = NodeContextService(vector_repo, node_context_repo)
         self.adaptive_rules = adaptive_rules or []
         self.memory_service = MemoryAnalysisService()
         self.roi_service = ROIAnalysisService()
@@ -81,6 +86,7 @@ class GenerateStudyPlanUseCase:
                 raise CognitiveProfileNotFoundError(f"Perfil cognitivo do estudante {student_id} não encontrado.")
             recent_events = await self.performance_repo.get_recent_events(student_id)
             all_nodes = await self.knowledge_repo.get_full_graph()
+            dependency_graph = await self.knowledge_repo.get_dependency_graph()
             
             # 2. Calcular retenção de todos os nós estudados
             logger.info("[PLAN-FLOW] Calculando retenção atual (Ebbinghaus)...")
@@ -127,7 +133,8 @@ class GenerateStudyPlanUseCase:
             generator = StudyPlanGenerator(
                 knowledge_graph_data=all_nodes,
                 roi_service=self.roi_service,
-                memory_service=self.memory_service
+                memory_service=self.memory_service,
+                dependency_graph=dependency_graph,
             )
             
             study_plan = generator.generate(
@@ -151,6 +158,10 @@ class GenerateStudyPlanUseCase:
             # 8. Gerar conteúdo via IA (Mantendo o RAG e Retries) — protegido quando não há serviços injetados
             logger.info(f"[PLAN-FLOW] Gerando conteúdo para {len(study_plan.knowledge_nodes)} nós selecionados...")
             generated_cards = []
+            # RAG do plano inteiro numa ida só (um lote de embeddings + uma busca em lote)
+            rag_contexts = {}
+            if self.vector_repo and self.ai_service:
+                rag_contexts = await self._retrieve_contexts(study_plan.knowledge_nodes)
             for i, node in enumerate(study_plan.knowledge_nodes):
                 node_name = getattr(node, 'name', str(node))
                 node_difficulty = getattr(node, 'difficulty', getattr(node, 'difficulty', 5))
@@ -173,11 +184,7 @@ class GenerateStudyPlanUseCase:
                     else:
                         raise RuntimeError("AI services unavailable and fake fallback is disabled (FAIL_FAST).")
 
-                try:
-                    rag_context = await self.vector_repo.search_context(query=node.name, limit=1)
-                except Exception:
-                    rag_context = None
-
+                rag_context = rag_contexts.get(node_name)
                 final_context = rag_context if rag_context else f"Conceitos de {node.name}"
 
                 try:
@@ -210,6 +217,14 @@ class GenerateStudyPlanUseCase:
             logger.critical(f"[PLAN-FLOW] 💀 CRITICAL ERROR: {e}", exc_info=True)
             raise e
 
+    async def _retrieve_contexts(self, nodes) -> Dict[str, str]:
+        """Contexto RAG de todos os nós, indexado pelo nome; falhas viram contexto vazio."""
+        try:
+            return await self.node_context_service.get_contexts(nodes)
+        except Exception as e:
+            logger.warning(f"[PLAN-FLOW] Falha no RAG em lote, seguindo sem contexto: {e}")
+            return {}
+
     def _format_dto(self, study_plan, student_id, generated_cards, focus_level) -> StudyPlanDTO:
         logger.info("[PLAN-FLOW] Formatando resposta (DTO)...")
         sessions_dto = []
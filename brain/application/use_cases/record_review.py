@@ -10,6 +10,7 @@ from brain.domain.entities.performance_event import (
 )
 from brain.domain.entities.knowledge_node import KnowledgeNode, ReviewGrade
 from brain.domain.services.intelligence_engine import IntelligenceEngine
+from brain.domain.services.semantic_propagator import SemanticPropagator
 
 
 class RecordReviewUseCase:
@@ -26,10 +27,13 @@ class RecordReviewUseCase:
         performance_repo: PerformanceRepository,
         node_repo: KnowledgeRepository,
         intelligence_engine: IntelligenceEngine,
+        semantic_propagator: Optional[SemanticPropagator] = None,
     ):
         self.performance_repo = performance_repo
         self.node_repo = node_repo
         self.intelligence_engine = intelligence_engine
+        # Em erro (AGAIN), reforça preventivamente os vizinhos semânticos do nó
+        self.semantic_propagator = semantic_propagator
 
     async def execute(
         self,
@@ -47,11 +51,10 @@ class RecordReviewUseCase:
         if not node:
             raise ValueError(f"Knowledge Node {node_id} not found")
 
-        # 2. Buscar histórico
-        recent_history = await self.performance_repo.get_recent_events(
-            student_id, limit=50
+        # 2. Buscar histórico do nó (índice por aluno + nó)
+        node_history = await self.performance_repo.get_history(
+            student_id, node.id, limit=50
         )
-        node_history = [e for e in recent_history if e.topic == node.name]
 
         # 3. Determinar a nota (Explícita > Inferida)
         if explicit_grade:
@@ -75,6 +78,11 @@ class RecordReviewUseCase:
         # 5. Persistir
         await self.node_repo.update(updated_node)
 
+        # 5.1 Propagar o erro para a vizinhança (tabela pré-calculada, Qdrant
+        # só para nós ainda sem linha)
+        if grade == ReviewGrade.AGAIN and self.semantic_propagator is not None:
+            await self.semantic_propagator.propagate_boost(updated_node.id)
+
         # 6. Registrar evento
         event = PerformanceEvent(
             id=uuid4(),
@@ -82,6 +90,7 @@ class RecordReviewUseCase:
             event_type=PerformanceEventType.QUIZ,
             occurred_at=datetime.now(timezone.utc),
             topic=updated_node.name,
+            knowledge_node_id=updated_node.id,
             metric=PerformanceMetric.ACCURACY,
             value=1.0 if grade != ReviewGrade.AGAIN else 0.0,
             baseline=updated_node.stability,
@@ -93,6 +102,8 @@ class RecordReviewUseCase:
             },
         )
 
+        # Em modo "buffered" o repositório só enfileira o evento (write-behind);
+        # a resposta não espera o INSERT.
         await self.performance_repo.save(event)
 
         return {
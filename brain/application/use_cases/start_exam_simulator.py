@@ -2,7 +2,7 @@ import logging
 import asyncio
 from uuid import UUID, uuid4
 from datetime import datetime, timezone
-from typing import List
+from typing import Dict, List, Optional
 
 from brain.application.ports.repositories import (
     StudentRepository,
@@ -11,12 +11,14 @@ from brain.application.ports.repositories import (
     CognitiveProfileRepository,
     KnowledgeVectorRepository,
     PerformanceRepository,
+    NodeContextRepository,
 )
 from brain.application.ports.ai_service import AIService
 from brain.application.dto.study_plan_dto import StudyPlanDTO, StudySessionDTO, StudyItemDTO, StudyPlanType
 from brain.domain.entities.study_plan import StudyPlan
 
 from brain.application.services.simulator_service import SimulatorService
+from brain.application.services.node_context_service import NodeContextService
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +41,7 @@ class StartExamSimulatorUseCase:
         vector_repo: KnowledgeVectorRepository,
         performance_repo: PerformanceRepository,
         ai_service: AIService,
+        node_context_repo: Optional[NodeContextRepository] = None,
     ):
         self.student_repo = student_repo
         self.knowledge_repo = knowledge_repo
@@ -48,6 +51,14 @@ class StartExamSimulatorUseCase:
         self.performance_repo = performance_repo
         self.ai_service = ai_service
         self.simulator_service = SimulatorService(knowledge_repo, performance_repo)
+        self.node_context_service = NodeContextService(vector_repo, node_context_repo)
+
+    async def _retrieve_contexts(self, nodes) -> Dict[str, str]:
+        try:
+            return await self.node_context_service.get_contexts(nodes)
+        except Exception as e:
+            logger.warning(f"RAG em lote falhou, seguindo sem contexto: {e}")
+            return {}
 
     async def execute(self, student_id: UUID, num_questions: int = 20, time_limit_seconds: int = 3600, stress_level: float = 1.0) -> StudyPlanDTO:
         logger.info(f"Iniciando simulador EXAM para {student_id}")
@@ -70,11 +81,10 @@ class StartExamSimulatorUseCase:
 
         # 2. Gerar conteúdo via IA (mantendo RAG e retries), mas OMITE explicação no DTO
         generated_cards = []
+        # Contexto RAG de todas as questões numa ida só
+        rag_contexts = await self._retrieve_contexts(selected_nodes)
         for i, node in enumerate(selected_nodes):
-            try:
-                rag_context = await self.vector_repo.search_context(query=node.name, limit=1)
-            except Exception:
-                rag_context = None
+            rag_context = rag_contexts.get(node.name)
 
             final_context = rag_context if rag_context else f"Conceitos de {node.name}"
 
@@ -6,13 +6,93 @@ class Settings(BaseSettings):
     # Default para Postgres (Docker)
     DATABASE_URL: str = "postgresql+asyncpg://athena_user:athena_password@db:5432/athena_db"
     USE_IN_MEMORY_DB: bool = False
+    # Réplica de leitura opcional: leituras pesadas (grafo, histórico, perfis)
+    # vão para ela; escritas continuam no DATABASE_URL
+    DATABASE_READ_URL: Optional[str] = None
+
+    # --- performance_events (particionamento mensal por occurred_at) ---
+    PERFORMANCE_PARTITION_MONTHS_AHEAD: int = 3
+    PERFORMANCE_PARTITION_RETENTION_MONTHS: int = 24
+    # True: partições antigas vão para o schema `archive`; False: são removidas
+    PERFORMANCE_PARTITION_ARCHIVE: bool = True
+    PERFORMANCE_PARTITION_MAINTENANCE_INTERVAL_SECONDS: int = 86400
+    # Janelas de leitura (permitem ao planner podar partições)
+    PERFORMANCE_RECENT_WINDOW_DAYS: int = 90
+
+    # Gravação dos PerformanceEvent de revisões:
+    # "sync" grava na transação da requisição; "buffered" confirma a revisão
+    # assim que o nó é persistido e grava os eventos em lote (write-behind).
+    # No modo buffered, só o processo que enfileirou vê os eventos ainda não
+    # gravados; os outros workers leem do banco.
+    PERFORMANCE_EVENT_DURABILITY: str = "sync"
+    PERFORMANCE_EVENT_BUFFER_MAX_SIZE: int = 10000
+    PERFORMANCE_EVENT_BUFFER_BATCH_SIZE: int = 500
+    PERFORMANCE_EVENT_BUFFER_MAX_AGE_SECONDS: float = 1.0
+    # Lotes que esgotam as tentativas vão para este JSONL em vez de se perder
+    PERFORMANCE_EVENT_DEAD_LETTER_PATH: str = ".cache/performance_events_dead_letter.jsonl"
+
+    # Snapshot do grafo compartilhado pelo processo (invalidado via LISTEN/NOTIFY;
+    # sem LISTEN, a versão é conferida no banco a cada POLL_INTERVAL)
+    GRAPH_SNAPSHOT_ENABLED: bool = True
+    GRAPH_SNAPSHOT_POLL_INTERVAL_SECONDS: float = 5.0
+    GRAPH_SNAPSHOT_RECONNECT_SECONDS: float = 5.0
+
+    # Vizinhança semântica pré-calculada (node_semantic_neighbors); o job
+    # (brain/refresh_semantic_tables.py --loop) confere a versão dos vetores a
+    # cada intervalo e só recalcula se mudou
+    SEMANTIC_NEIGHBORS_K: int = 5
+    SEMANTIC_NEIGHBORS_REFRESH_INTERVAL_SECONDS: int = 3600
+
+    # Contexto RAG pré-calculado por nó (node_contexts); recalculado só quando
+    # a versão do corpus muda
+    NODE_CONTEXTS_LIMIT: int = 1
+    NODE_CONTEXTS_REFRESH_INTERVAL_SECONDS: int = 3600
 
     # --- Qdrant (Memória Vetorial) ---
     QDRANT_URL: str = "http://qdrant:6333"
     QDRANT_API_KEY: Optional[str] = None
+    # Alias (ou coleção legada) servido às buscas; a re-embedding troca a
+    # coleção por trás do alias sem downtime
+    QDRANT_COLLECTION: str = "athena_knowledge"
+    # Coleções antigas ficam disponíveis para rollback por este tempo após a troca
+    QDRANT_RETIRED_COLLECTION_GRACE_SECONDS: int = 7 * 24 * 3600
+    # Cliente único por processo: pool keep-alive e timeouts
+    QDRANT_TIMEOUT_SECONDS: int = 10
+    QDRANT_PREFER_GRPC: bool = False
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_POOL_MAX_CONNECTIONS: int = 20
+    QDRANT_POOL_MAX_KEEPALIVE: int = 10
+    QDRANT_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+
+    # Backend vetorial: "qdrant" (servidor) ou "local" (índice NumPy em
+    # processo, memory-mapped em LOCAL_VECTOR_INDEX_PATH)
+    VECTOR_STORE: str = "qdrant"
+    LOCAL_VECTOR_INDEX_PATH: str = ".cache/vector_index"
+    LOCAL_VECTOR_INDEX_DIM: int = 768
+    # Quantização dos vetores ("none", "int8", "binary"), no índice local ou
+    # na coleção do Qdrant: primeira passada nos códigos e reordenação de
+    # limit * OVERSAMPLING candidatos com os vetores float32
+    VECTOR_QUANTIZATION: str = "none"
+    VECTOR_RESCORE_OVERSAMPLING: float = 4.0
+
+    # Cache de embeddings de consulta (LRU em memória + SQLite local)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = ".cache/query_embeddings.sqlite3"
+    EMBEDDING_CACHE_MEMORY_ENTRIES: int = 4096
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 200000
 
     # --- IA: Google Gemini (Embeddings & Backup) ---
     GEMINI_API_KEY: Optional[str] = None
+    # Modelo de embedding de documentos e consultas. As buscas usam o modelo
+    # gravado nos metadados da coleção atrás do alias, com este como padrão
+    EMBEDDING_MODEL: str = "models/text-embedding-004"
+    EMBEDDING_MODEL_REFRESH_SECONDS: float = 60.0
+    # Projeção opcional dos embeddings (PCA ou truncamento) aplicada na
+    # ingestão de coleções/índices novos: versão do artefato <versão>.npz em
+    # EMBEDDING_PROJECTION_DIR. As buscas no Qdrant seguem a versão gravada
+    # nos metadados da coleção
+    EMBEDDING_PROJECTION: Optional[str] = None
+    EMBEDDING_PROJECTION_DIR: str = "data/projections"
     # Usamos o 2.0 Flash como default seguro se o 1.5 não existir
     GEMINI_MODEL: str = "models/gemini-2.0-flash" 
 
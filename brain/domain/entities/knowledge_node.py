@@ -4,7 +4,7 @@ from dataclasses import dataclass, field
 from datetime import datetime, timezone, timedelta
 from enum import IntEnum
 from uuid import UUID
-from typing import Optional
+from typing import Optional, Sequence
 
 
 class ReviewGrade(IntEnum):
@@ -18,8 +18,9 @@ class ReviewGrade(IntEnum):
     EASY = 4    # Recuperação imediato
 
 
-@dataclass
+@dataclass(slots=True)
 class KnowledgeNode:
+    # slots: grafos com 100k+ nós são carregados inteiros em memória
     id: UUID
     name: str
     subject: str
@@ -31,6 +32,10 @@ class KnowledgeNode:
     weight: float = 1.0  # Fator de prioridade no algoritmo de seleção
     last_reviewed_at: Optional[datetime] = None
     next_review_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    # Pré-requisitos (preenchidos pelo gerador de plano / validação do grafo)
+    dependencies: Sequence["KnowledgeNode"] = field(default=(), repr=False, compare=False)
+    # Tempo por questão calculado pelo simulador
+    estimated_time_seconds: Optional[int] = field(default=None, repr=False, compare=False)
 
     def apply_penalty(self, factor: float = 1.5):
         """Aumenta a prioridade do nó quando detectada fraqueza cognitiva."""
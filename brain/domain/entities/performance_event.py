@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Optional
 from uuid import UUID
 from enum import Enum
 
@@ -41,6 +42,8 @@ class PerformanceEvent:
     value: float
     baseline: float
     event_metadata: dict = field(default_factory=dict)
+    # Nó avaliado (None em eventos que não se referem a um nó específico)
+    knowledge_node_id: Optional[UUID] = None
 
     # ==============================
     # Domain Semantics
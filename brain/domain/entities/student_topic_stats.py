@@ -0,0 +1,53 @@
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from brain.domain.entities.performance_event import PerformanceEvent, PerformanceMetric
+
+
+@dataclass
+class StudentTopicStats:
+    """
+    Agregado incremental dos PerformanceEvent de um aluno por (tópico, métrica).
+
+    Guarda só somas (count, soma, soma dos quadrados) e o último valor, então
+    média e variância saem em O(1) sem reler o histórico.
+    """
+    student_id: UUID
+    topic: str
+    metric: PerformanceMetric
+    count: int = 0
+    value_sum: float = 0.0
+    value_sum_sq: float = 0.0
+    last_value: Optional[float] = None
+    last_occurred_at: Optional[datetime] = None
+
+    # ==============================
+    # Domain Semantics
+    # ==============================
+
+    @property
+    def mean(self) -> float:
+        return self.value_sum / self.count if self.count else 0.0
+
+    @property
+    def variance(self) -> float:
+        """Variância populacional."""
+        if not self.count:
+            return 0.0
+        return max(self.value_sum_sq / self.count - self.mean ** 2, 0.0)
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+    def add(self, event: PerformanceEvent) -> None:
+        """Acumula um evento; eventos fora de ordem não sobrescrevem o último valor."""
+        self.count += 1
+        self.value_sum += event.value
+        self.value_sum_sq += event.value ** 2
+        if self.last_occurred_at is None or event.occurred_at >= self.last_occurred_at:
+            self.last_value = event.value
+            self.last_occurred_at = event.occurred_at
@@ -1,6 +1,7 @@
-from typing import List, Dict, Set, Deque
+from typing import List, Dict, Set, Deque, Optional
 from collections import deque
 from brain.domain.entities.knowledge_node import KnowledgeNode
+from brain.domain.value_objects.dependency_graph import DependencyGraph
 
 class GraphValidationError(Exception):
     """Custom exception for graph-related errors."""
@@ -8,13 +9,17 @@ class GraphValidationError(Exception):
 
 class KnowledgeGraphValidator:
     @staticmethod
-    def get_topological_order(nodes: List[KnowledgeNode]) -> List[KnowledgeNode]:
+    def get_topological_order(
+        nodes: List[KnowledgeNode], dependency_graph: Optional[DependencyGraph] = None
+    ) -> List[KnowledgeNode]:
         """
         Performs a topological sort on a list of KnowledgeNode objects using Kahn's algorithm.
         This not only provides the correct learning sequence but also detects cycles.
 
         Args:
             nodes: A list of KnowledgeNode domain entities.
+            dependency_graph: Bulk-loaded adjacency (CSR). When given, edges come from it
+                instead of each node's `dependencies`.
 
         Returns:
             A list of KnowledgeNode objects in topological order.
@@ -22,6 +27,9 @@ class KnowledgeGraphValidator:
         Raises:
             GraphValidationError: If the graph contains a cycle.
         """
+        if dependency_graph is not None:
+            return KnowledgeGraphValidator._topological_order_csr(nodes, dependency_graph)
+
         # 1. Build in-degree map and adjacency list
         in_degree: Dict[str, int] = {node.id: 0 for node in nodes}
         adj: Dict[str, List[str]] = {node.id: [] for node in nodes}
@@ -65,3 +73,35 @@ class KnowledgeGraphValidator:
             )
 
         return topo_order
+
+    @staticmethod
+    def _topological_order_csr(nodes: List[KnowledgeNode], graph: DependencyGraph) -> List[KnowledgeNode]:
+        """Kahn over integer indices: position in `nodes` <-> index in the CSR."""
+        local_to_graph = [graph.index_of(node.id) for node in nodes]
+        graph_to_local: Dict[int, int] = {i: position for position, i in enumerate(local_to_graph) if i >= 0}
+
+        in_degree = [0] * len(nodes)
+        for i, position in graph_to_local.items():
+            in_degree[position] = sum(1 for p in graph.parents(i) if p in graph_to_local)
+
+        queue: Deque[int] = deque(position for position, degree in enumerate(in_degree) if degree == 0)
+        topo_order: List[KnowledgeNode] = []
+        while queue:
+            u = queue.popleft()
+            topo_order.append(nodes[u])
+            i = local_to_graph[u]
+            if i < 0:
+                continue
+            for c in graph.children(i):
+                v = graph_to_local.get(c)
+                if v is None:
+                    continue
+                in_degree[v] -= 1
+                if in_degree[v] == 0:
+                    queue.append(v)
+
+        if len(topo_order) != len(nodes):
+            raise GraphValidationError(
+                "Cycle detected! The curriculum has circular dependencies that cannot be resolved."
+            )
+        return topo_order
@@ -1,10 +1,11 @@
 import math
 from datetime import datetime, timezone, timedelta
-from typing import List
+from typing import Iterable, List
 from statistics import mean
 
 from brain.domain.entities.performance_event import PerformanceEvent, PerformanceMetric
 from brain.domain.entities.knowledge_node import KnowledgeNode, ReviewGrade
+from brain.domain.entities.student_topic_stats import StudentTopicStats
 
 
 class IntelligenceEngine:
@@ -48,6 +49,17 @@ class IntelligenceEngine:
         
         return subject_roi
 
+    def calculate_roi_from_stats(self, topic_stats: Iterable[StudentTopicStats]) -> dict[str, float]:
+        """
+        Mesmo score de `calculate_roi_per_subject` (média de acurácia por tópico),
+        lido dos agregados em vez de percorrer o histórico.
+        """
+        return {
+            stats.topic: stats.mean
+            for stats in topic_stats
+            if stats.metric == PerformanceMetric.ACCURACY and stats.count
+        }
+
     def analyze_low_accuracy_trend(self, history: List[PerformanceEvent], threshold: float = 0.6) -> bool:
         """Verifica se a acurácia média recente está abaixo do limite aceitável."""
         if not history: return False
@@ -241,6 +253,23 @@ class IntelligenceEngine:
             "needs_review": needs_review,
         }
 
+    def analyze_memory_state_from_stats(self, topic_stats: List[StudentTopicStats]) -> dict:
+        """
+        Equivalente a `analyze_memory_state` a partir dos agregados de um tópico:
+        o "último evento" é a métrica com o `last_occurred_at` mais recente.
+        """
+        dated = [s for s in topic_stats if s.last_occurred_at is not None]
+        if not dated:
+            return self.analyze_memory_state([])
+
+        latest = max(dated, key=lambda s: s.last_occurred_at)
+        current_retention = latest.last_value if latest.metric == PerformanceMetric.ACCURACY else 0.0
+        return {
+            "current_retention": current_retention,
+            "stability_days": 1.0,  # Mesmo valor fixo de analyze_memory_state
+            "needs_review": current_retention < 0.7,
+        }
+
     @staticmethod
     def _clamp(value: float, min_v: float, max_v: float) -> float:
         return max(min_v, min(max_v, value))
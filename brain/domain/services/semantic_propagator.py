@@ -1,24 +1,40 @@
 import logging
 from uuid import UUID
-from typing import Iterable
+from typing import Iterable, List, Optional
 from brain.application.ports.repositories import (
     KnowledgeRepository,
     KnowledgeVectorRepository,
+    SemanticNeighborRepository,
 )
 
 class SemanticPropagator:
     """
     Serviço de domínio responsável por propagar efeitos cognitivos
     (boosts / penalidades suaves) para microconceitos semanticamente próximos.
+
+    Com `neighbor_repository`, a vizinhança vem da tabela pré-calculada
+    (uma busca de índice); o Qdrant só é consultado para nós ainda sem linha.
     """
 
     def __init__(
         self,
         node_repository: KnowledgeRepository,
         vector_repository: KnowledgeVectorRepository,
+        neighbor_repository: Optional[SemanticNeighborRepository] = None,
     ) -> None:
         self._node_repo = node_repository
         self._vector_repo = vector_repository
+        self._neighbor_repo = neighbor_repository
+
+    async def _find_neighbors(self, origin_node_id: UUID, neighborhood_size: int) -> List[UUID]:
+        if self._neighbor_repo is not None:
+            neighbor_ids = await self._neighbor_repo.get_neighbor_ids(origin_node_id, limit=neighborhood_size)
+            if neighbor_ids:
+                return neighbor_ids
+        return await self._vector_repo.find_semantically_related(
+            origin_node_id,
+            limit=neighborhood_size,
+        )
 
     async def propagate_boost(
         self,
@@ -31,10 +47,7 @@ class SemanticPropagator:
         Propaga um boost/penalidade preventiva para conceitos semanticamente vizinhos.
         """
         try:
-            neighbor_ids = await self._vector_repo.find_semantically_related(
-                origin_node_id,
-                limit=neighborhood_size,
-            )
+            neighbor_ids = await self._find_neighbors(origin_node_id, neighborhood_size)
 
             await self._apply_penalty_to_neighbors(
                 origin_node_id,
@@ -56,6 +69,7 @@ class SemanticPropagator:
         neighbor_ids: Iterable[UUID],
         factor: float,
     ) -> None:
+        penalized = []
         for neighbor_id in neighbor_ids:
             # Proteção defensiva
             if neighbor_id == origin_node_id:
@@ -66,5 +80,8 @@ class SemanticPropagator:
                 continue
 
             neighbor_node.apply_penalty(factor=factor)
-            
-            await self._node_repo.update(neighbor_node)
\ No newline at end of file
+            penalized.append(neighbor_node)
+
+        # Uma única escrita para toda a vizinhança
+        if penalized:
+            await self._node_repo.update_many(penalized)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 from brain.domain.entities.student import Student
 from brain.domain.entities.cognitive_profile import CognitiveProfile
 from brain.domain.entities.performance_event import PerformanceEvent
@@ -6,10 +6,12 @@ from brain.domain.entities.study_plan import StudyPlan, StudyFocusLevel
 from brain.domain.entities.knowledge_node import KnowledgeNode
 from brain.infrastructure.persistence.models import KnowledgeNodeModel as KnowledgeNodeData
 from brain.domain.services.graph_validator import KnowledgeGraphValidator, GraphValidationError
+from brain.domain.value_objects.dependency_graph import DependencyGraph
 from brain.application.services.roi_analysis_service import ROIAnalysisService
 from brain.application.services.memory_analysis_service import MemoryAnalysisService
 from uuid import uuid4, UUID as UUIDType
 from datetime import datetime, timezone
+from dataclasses import replace
 
 class StudyPlanGenerator:
     """
@@ -23,6 +25,7 @@ class StudyPlanGenerator:
         roi_service: ROIAnalysisService = None,
         memory_service: MemoryAnalysisService = None,
         adaptive_rules: List = None,
+        dependency_graph: Optional[DependencyGraph] = None,
     ):
         # Recebe os nós do banco de dados (camada de persistência)
         # Suporte compatível com o argumento `knowledge_graph` usado pelos testes
@@ -34,14 +37,82 @@ class StudyPlanGenerator:
         self.roi_service = roi_service or ROIAnalysisService()
         self.memory_service = memory_service or MemoryAnalysisService()
         self.adaptive_rules = adaptive_rules or []
+        # Adjacência carregada em lote (KnowledgeRepository.get_dependency_graph);
+        # sem ela, cai no `node.dependencies` de cada nó (relação lazy do ORM)
+        self.dependency_graph = dependency_graph
+
+    def _prerequisite_ids(self, node) -> List[str]:
+        if self.dependency_graph is not None:
+            return [str(dep_id) for dep_id in self.dependency_graph.prerequisites_of(node.id)]
+        return [str(getattr(dep, "id", dep)) for dep in getattr(node, "dependencies", []) or []]
+
+    def _ordered_nodes(self) -> List[KnowledgeNodeData]:
+        """Nós em ordem topológica (pré-requisitos primeiro); em caso de ciclo, na ordem original."""
+        if self.dependency_graph is not None:
+            try:
+                return KnowledgeGraphValidator.get_topological_order(
+                    list(self.knowledge_graph_data), dependency_graph=self.dependency_graph
+                )
+            except GraphValidationError:
+                return list(self.knowledge_graph_data)
+
+        # Sem adjacência em lote: converte os nós em entidades de domínio e
+        # resolve `dependencies` de cada um
+        domain_node_map: Dict[str, KnowledgeNode] = {}
+        for n in self.knowledge_graph_data:
+            node_id = str(getattr(n, "id", n))
+            if isinstance(n, KnowledgeNode):
+                # Já é uma entidade de domínio; copia para não reescrever as
+                # dependências dos nós do snapshot compartilhado do grafo
+                domain_node_map[node_id] = replace(n)
+            else:
+                domain_node_map[node_id] = KnowledgeNode(
+                    id=node_id,
+                    name=getattr(n, "name", getattr(n, "title", "")),
+                    subject=getattr(n, "subject", ""),
+                )
+
+        for node_data in self.knowledge_graph_data:
+            node_id = str(getattr(node_data, "id", node_data))
+            domain_node = domain_node_map[node_id]
+            # Assumindo que node_data.dependencies possa existir (em models)
+            deps = getattr(node_data, "dependencies", []) or []
+            resolved_deps = []
+            for dep in deps:
+                dep_id = str(getattr(dep, "id", dep))
+                if dep_id in domain_node_map:
+                    resolved_deps.append(domain_node_map[dep_id])
+            # Atribui dinamicamente (compatível com dataclasses simples)
+            setattr(domain_node, "dependencies", resolved_deps)
+
+        # 2. Validar e obter a ordem lógica global a partir das entidades de domínio
+        try:
+            ordered_domain_nodes = KnowledgeGraphValidator.get_topological_order(list(domain_node_map.values()))
+        except GraphValidationError:
+            # Em produção, um ciclo não deveria existir, mas como fallback, usa a lista sem ordem
+            ordered_domain_nodes = list(domain_node_map.values())
+
+        # Mapeia a ordem de volta para os objetos de dados (que têm todos os atributos)
+        ordered_nodes_data = [self.node_data_map.get(str(node.id)) for node in ordered_domain_nodes]
+        # Filtra eventuais nós não mapeados (defensivo para dados mistos)
+        ordered_nodes_data = [n for n in ordered_nodes_data if n is not None]
+        return ordered_nodes_data
 
     def _calculate_proficiencies(self, performance_events: List[PerformanceEvent]) -> Dict[str, float]:
-        # Implementação simplificada para os testes: mapeia tópicos para um score 0-1
+        # Implementação simplificada: score 0-1 por id de nó, a mesma chave dos
+        # pré-requisitos (`_prerequisite_ids`) e do nó em `generate`
+        ids_by_name = {
+            getattr(node, "name", None): str(node.id)
+            for node in self.knowledge_graph_data
+            if getattr(node, "name", None)
+        }
         proficiencies: Dict[str, float] = {}
         for ev in performance_events:
             try:
-                # Usa topic como chave quando não houver node_id explícito
-                key = str(getattr(ev, "node_id", getattr(ev, "topic", "")))
+                # Eventos sem knowledge_node_id (legados) são associados pelo nome do tópico
+                node_id = getattr(ev, "knowledge_node_id", None)
+                topic = getattr(ev, "topic", "")
+                key = str(node_id) if node_id is not None else ids_by_name.get(topic, topic)
                 # Normaliza event.value se estiver na escala 0-1 ou 0-100
                 val = getattr(ev, "value", 0.0)
                 if val > 1.0:
@@ -78,44 +149,8 @@ class StudyPlanGenerator:
             performance_events: Lista de eventos recentes
             node_scores: Dicionário {node_id: score} para priorização customizada
         """
-        # 1. Converter modelos de persistência em entidades de domínio para validação
-        domain_node_map: Dict[str, KnowledgeNode] = {}
-        for n in self.knowledge_graph_data:
-            node_id = str(getattr(n, "id", n))
-            if isinstance(n, KnowledgeNode):
-                # Já é uma entidade de domínio
-                domain_node_map[node_id] = n
-            else:
-                domain_node_map[node_id] = KnowledgeNode(
-                    id=node_id,
-                    name=getattr(n, "name", getattr(n, "title", "")),
-                    subject=getattr(n, "subject", ""),
-                )
-
-        for node_data in self.knowledge_graph_data:
-            node_id = str(getattr(node_data, "id", node_data))
-            domain_node = domain_node_map[node_id]
-            # Assumindo que node_data.dependencies possa existir (em models)
-            deps = getattr(node_data, "dependencies", []) or []
-            resolved_deps = []
-            for dep in deps:
-                dep_id = str(getattr(dep, "id", dep))
-                if dep_id in domain_node_map:
-                    resolved_deps.append(domain_node_map[dep_id])
-            # Atribui dinamicamente (compatível com dataclasses simples)
-            setattr(domain_node, "dependencies", resolved_deps)
-        
-        # 2. Validar e obter a ordem lógica global a partir das entidades de domínio
-        try:
-            ordered_domain_nodes = KnowledgeGraphValidator.get_topological_order(list(domain_node_map.values()))
-        except GraphValidationError:
-            # Em produção, um ciclo não deveria existir, mas como fallback, usa a lista sem ordem
-            ordered_domain_nodes = list(domain_node_map.values())
-
-        # Mapeia a ordem de volta para os objetos de dados (que têm todos os atributos)
-        ordered_nodes_data = [self.node_data_map.get(str(node.id)) for node in ordered_domain_nodes]
-        # Filtra eventuais nós não mapeados (defensivo para dados mistos)
-        ordered_nodes_data = [n for n in ordered_nodes_data if n is not None]
+        # 1-2. Ordem lógica global (pré-requisitos primeiro)
+        ordered_nodes_data = self._ordered_nodes()
 
         # 3. Calcular proficiências
         proficiencies = self._calculate_proficiencies(performance_events)
@@ -124,7 +159,7 @@ class StudyPlanGenerator:
         eligible_nodes: List[KnowledgeNodeData] = []
         for node in ordered_nodes_data:
             # Um nó só é elegível se todos os seus pré-requisitos foram dominados
-            is_ready = all(proficiencies.get(str(dep.id), 0) >= 0.7 for dep in node.dependencies)
+            is_ready = all(proficiencies.get(dep_id, 0) >= 0.7 for dep_id in self._prerequisite_ids(node))
             is_mastered = proficiencies.get(str(node.id), 0) >= 0.9
 
             if is_ready and not is_mastered:
@@ -0,0 +1,110 @@
+from array import array
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+from uuid import UUID
+
+
+def _as_uuid(value) -> UUID:
+    return value if isinstance(value, UUID) else UUID(str(value))
+
+
+def _csr(n: int, pairs: Sequence[Tuple[int, int]]) -> Tuple[array, array]:
+    """(offsets, indices): os vizinhos do nó i são indices[offsets[i]:offsets[i + 1]]."""
+    offsets = array("i", [0]) * (n + 1)
+    for source, _ in pairs:
+        offsets[source + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+    indices = array("i", [0]) * len(pairs)
+    cursor = array("i", offsets[:-1])
+    for source, target in pairs:
+        indices[cursor[source]] = target
+        cursor[source] += 1
+    return offsets, indices
+
+
+@dataclass(frozen=True)
+class DependencyGraph:
+    """
+    Adjacência de `node_dependencies` em formato CSR (compressed sparse row)
+    sobre índices inteiros: dois arrays por direção em vez de uma lista de
+    objetos por nó.
+
+    `node_ids[i]` é o UUID do nó de índice i. Nós sem arestas não aparecem e
+    são tratados como sem pré-requisitos.
+    """
+    node_ids: Tuple[UUID, ...] = ()
+    # pré-requisitos (pais) de cada nó
+    parent_offsets: array = field(default_factory=lambda: array("i", [0]))
+    parent_indices: array = field(default_factory=lambda: array("i"))
+    # dependentes (filhos) de cada nó
+    child_offsets: array = field(default_factory=lambda: array("i", [0]))
+    child_indices: array = field(default_factory=lambda: array("i"))
+    _index: Dict[UUID, int] = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[Tuple[UUID, UUID]]) -> "DependencyGraph":
+        """`edges` são pares (parent_id, child_id): parent é pré-requisito de child."""
+        index: Dict[UUID, int] = {}
+        pairs: List[Tuple[int, int]] = []
+        for parent_id, child_id in edges:
+            parent = index.setdefault(_as_uuid(parent_id), len(index))
+            child = index.setdefault(_as_uuid(child_id), len(index))
+            pairs.append((parent, child))
+
+        n = len(index)
+        parent_offsets, parent_indices = _csr(n, [(child, parent) for parent, child in pairs])
+        child_offsets, child_indices = _csr(n, pairs)
+        return cls(
+            node_ids=tuple(index),
+            parent_offsets=parent_offsets,
+            parent_indices=parent_indices,
+            child_offsets=child_offsets,
+            child_indices=child_indices,
+            _index=index,
+        )
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.parent_indices)
+
+    def index_of(self, node_id) -> int:
+        """Índice do nó, ou -1 se ele não tem arestas."""
+        try:
+            return self._index.get(_as_uuid(node_id), -1)
+        except ValueError:
+            return -1
+
+    def parents(self, i: int) -> array:
+        return self.parent_indices[self.parent_offsets[i]:self.parent_offsets[i + 1]]
+
+    def children(self, i: int) -> array:
+        return self.child_indices[self.child_offsets[i]:self.child_offsets[i + 1]]
+
+    def prerequisites_of(self, node_id) -> List[UUID]:
+        i = self.index_of(node_id)
+        return [self.node_ids[p] for p in self.parents(i)] if i >= 0 else []
+
+    def dependents_of(self, node_id) -> List[UUID]:
+        i = self.index_of(node_id)
+        return [self.node_ids[c] for c in self.children(i)] if i >= 0 else []
+
+    def _closure(self, node_ids: Iterable, neighbours) -> Set[UUID]:
+        """BFS a partir de `node_ids`; as sementes só entram se forem alcançadas (ciclo)."""
+        queue = deque(i for i in (self.index_of(n) for n in node_ids) if i >= 0)
+        seen = set()
+        while queue:
+            for j in neighbours(queue.popleft()):
+                if j not in seen:
+                    seen.add(j)
+                    queue.append(j)
+        return {self.node_ids[j] for j in seen}
+
+    def prerequisite_closure(self, node_ids: Iterable) -> Set[UUID]:
+        """Todos os pré-requisitos transitivos."""
+        return self._closure(node_ids, self.parents)
+
+    def dependent_closure(self, node_ids: Iterable) -> Set[UUID]:
+        """Todos os dependentes transitivos."""
+        return self._closure(node_ids, self.children)
@@ -0,0 +1,55 @@
+"""
+Embeddings em lote na API do Gemini (batchEmbedContents).
+
+Uma chamada de `embed_content_async` com lista de textos vira uma única
+requisição de lote; a API aceita até `GEMINI_EMBED_BATCH_LIMIT` textos por
+requisição, então listas maiores são fatiadas aqui.
+"""
+
+from typing import Awaitable, Callable, List, Optional, Sequence
+
+import google.generativeai as genai
+
+from brain.config.settings import settings
+
+GEMINI_EMBEDDING_MODEL = settings.EMBEDDING_MODEL
+GEMINI_EMBED_BATCH_LIMIT = 100
+
+
+def chunked(items: Sequence, size: int) -> List[Sequence]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+async def embed_batch(
+    texts: Sequence[str],
+    *,
+    model: str = GEMINI_EMBEDDING_MODEL,
+    task_type: str = "retrieval_document",
+) -> List[List[float]]:
+    """Um lote (<= GEMINI_EMBED_BATCH_LIMIT textos) numa única requisição."""
+    result = await genai.embed_content_async(model=model, content=list(texts), task_type=task_type)
+    return result["embedding"]
+
+
+async def embed_texts(
+    texts: Sequence[str],
+    *,
+    model: str = GEMINI_EMBEDDING_MODEL,
+    task_type: str = "retrieval_document",
+    batch_size: int = GEMINI_EMBED_BATCH_LIMIT,
+    call: Optional[Callable[[Sequence[str]], Awaitable[List[List[float]]]]] = None,
+) -> List[List[float]]:
+    """
+    Embeddings de `texts` na mesma ordem, uma requisição por lote. Textos
+    vazios (rejeitados pela API) não são enviados e recebem `[]`.
+
+    `call` permite envolver cada lote (ex.: retries do serviço).
+    """
+    call = call or (lambda batch: embed_batch(batch, model=model, task_type=task_type))
+    positions = [i for i, text in enumerate(texts) if text and text.strip()]
+    embeddings: List[List[float]] = [[] for _ in texts]
+    for batch in chunked(positions, min(batch_size, GEMINI_EMBED_BATCH_LIMIT)):
+        vectors = await call([texts[i] for i in batch])
+        for i, vector in zip(batch, vectors):
+            embeddings[i] = vector
+    return embeddings
@@ -10,6 +10,7 @@ from pydantic import BaseModel, Field
 
 from brain.application.ports.ai_service import AIService
 from brain.domain.entities.error_event import ErrorEvent
+from brain.infrastructure.llm.gemini_embeddings import GEMINI_EMBEDDING_MODEL, embed_batch, embed_texts
 
 logger = logging.getLogger(__name__)
 
@@ -70,9 +71,8 @@ class GeminiService(AIService):
 
     async def generate_embedding(self, text: str) -> List[float]:
         async def _call_embed():
-            result = await asyncio.to_thread(
-                genai.embed_content,
-                model="models/text-embedding-004",
+            result = await genai.embed_content_async(
+                model=GEMINI_EMBEDDING_MODEL,
                 content=text,
                 task_type="retrieval_query"
             )
@@ -83,6 +83,17 @@ class GeminiService(AIService):
         except:
             return []
 
+    async def generate_embeddings(self, texts: List[str], task_type: str = "retrieval_document") -> List[List[float]]:
+        async def _call_batch(batch):
+            return await self._retry_operation(
+                embed_batch, f"Embedding em lote ({len(batch)})", batch, task_type=task_type
+            )
+
+        try:
+            return await embed_texts(texts, task_type=task_type, call=_call_batch)
+        except:
+            return [[] for _ in texts]
+
     async def analyze_student_errors(self, errors: List[ErrorEvent], subject: str) -> str:
         if not errors: return "Sem dados."
         prompt = f"Analise erros em {subject}: {errors}"
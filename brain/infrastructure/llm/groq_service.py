@@ -18,6 +18,7 @@ from pydantic import BaseModel, Field, ValidationError
 
 from brain.application.ports.ai_service import AIService
 from brain.domain.entities.error_event import ErrorEvent
+from brain.infrastructure.llm.gemini_embeddings import GEMINI_EMBEDDING_MODEL, embed_texts
 
 # ============================================================
 # LOGGING CONFIG (Docker-friendly)
@@ -69,7 +70,7 @@ class GroqService(AIService):
         if gemini_api_key:
             genai.configure(api_key=gemini_api_key)
 
-        self.embedding_model = "models/text-embedding-004"
+        self.embedding_model = GEMINI_EMBEDDING_MODEL
 
         logger.info(
             "[INIT] Serviço Groq híbrido iniciado | "
@@ -224,8 +225,7 @@ RETORNE EXCLUSIVAMENTE JSON VÁLIDO no formato:
                 f"[EMBEDDING] Gerando embedding | Size={len(text)} chars"
             )
 
-            result = await asyncio.to_thread(
-                genai.embed_content,
+            result = await genai.embed_content_async(
                 model=self.embedding_model,
                 content=text,
                 task_type="retrieval_query",
@@ -245,3 +245,14 @@ RETORNE EXCLUSIVAMENTE JSON VÁLIDO no formato:
                 exc_info=e,
             )
             raise RuntimeError("Embedding indisponível")
+
+    async def generate_embeddings(self, texts: List[str], task_type: str = "retrieval_document") -> List[List[float]]:
+        try:
+            logger.info(f"[EMBEDDING] Gerando embeddings em lote | Textos={len(texts)}")
+            return await embed_texts(texts, model=self.embedding_model, task_type=task_type)
+        except Exception as e:
+            logger.critical(
+                "[EMBEDDING-ERROR] Falha ao gerar embeddings em lote",
+                exc_info=e,
+            )
+            raise RuntimeError("Embedding indisponível")
@@ -1,6 +1,9 @@
 import time
 import logging
 import asyncio
+import hashlib
+import math
+import random
 from typing import List, Dict, Any
 
 from brain.application.ports.ai_service import AIService
@@ -8,6 +11,17 @@ from brain.domain.entities.error_event import ErrorEvent
 
 logger = logging.getLogger(__name__)
 
+MOCK_EMBEDDING_DIM = 768
+
+
+def deterministic_embedding(text: str, dim: int = MOCK_EMBEDDING_DIM) -> List[float]:
+    """Vetor unitário derivado do hash do texto: mesmo texto, mesmo vetor, em qualquer processo."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = math.sqrt(sum(v * v for v in vector))
+    return [v / norm for v in vector]
+
 
 class MockAIService(AIService):
     """
@@ -31,7 +45,17 @@ class MockAIService(AIService):
         if self.delay_seconds > 0:
             await asyncio.sleep(self.delay_seconds)
         
-        return [0.1] * 768
+        return [0.1] * MOCK_EMBEDDING_DIM
+
+    async def generate_embeddings(self, texts: List[str], task_type: str = "retrieval_document") -> List[List[float]]:
+        """
+        Simula o embedding em lote: uma única "requisição" (um delay) para
+        todos os textos, com vetores determinísticos por texto.
+        """
+        if self.delay_seconds > 0:
+            await asyncio.sleep(self.delay_seconds)
+
+        return [deterministic_embedding(text) if text.strip() else [] for text in texts]
 
     async def generate_flashcard(
         self, topic: str, difficulty: int, context: str
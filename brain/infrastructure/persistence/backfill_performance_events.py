@@ -0,0 +1,242 @@
+"""
+Migração de `performance_events` para tipos nativos:
+
+- `occurred_at`: String -> timestamptz
+- `event_metadata`: dict serializado em String -> JSONB
+- índice composto (student_id, occurred_at DESC) para `get_recent_events`
+- `knowledge_node_id` preenchido a partir do nome do tópico, com índice
+  (student_id, knowledge_node_id, occurred_at DESC) para `get_history`
+
+A conversão é feita em colunas-sombra, em lotes curtos (keyset por id), para
+não segurar um lock longo sobre a tabela. Só a troca final das colunas roda
+sob ACCESS EXCLUSIVE, e ela também converte as linhas inseridas no meio tempo.
+"""
+
+import sys
+import os
+import ast
+import json
+from datetime import datetime, timezone
+from typing import Any, Optional, Tuple
+
+# Ajusta PYTHONPATH para importar o pacote `brain` quando executado como script
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from brain.infrastructure.persistence.database import engine, SYNC_DATABASE_URL
+from brain.infrastructure.persistence.partition_maintenance import is_partitioned
+
+BATCH_SIZE = 5000
+INDEX_NAME = "ix_performance_events_student_occurred_at"
+NODE_INDEX_NAME = "ix_performance_events_student_node_occurred_at"
+
+# Usado quando o timestamp legado não pode ser interpretado; mantém a linha
+# consultável (NOT NULL) e fácil de localizar depois.
+UNPARSEABLE_TIMESTAMP = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def parse_occurred_at(raw: Any) -> Optional[datetime]:
+    """
+    Converte o valor legado (texto ISO / str(datetime)) em datetime com timezone.
+    Valores sem timezone são tratados como UTC.
+    """
+    if raw is None:
+        return None
+    if isinstance(raw, datetime):
+        value = raw
+    else:
+        try:
+            value = datetime.fromisoformat(str(raw).strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def parse_event_metadata(raw: Any) -> dict:
+    """
+    Converte o metadata legado em dict. Aceita JSON válido e também o `repr`
+    de dicts Python (aspas simples), que era o que acabava gravado na coluna.
+    """
+    if raw is None or raw == "":
+        return {}
+    if isinstance(raw, dict):
+        return raw
+    try:
+        value = json.loads(raw)
+    except (TypeError, ValueError):
+        try:
+            value = ast.literal_eval(raw)
+        except (ValueError, SyntaxError):
+            return {"raw": str(raw)}
+    return value if isinstance(value, dict) else {"value": value}
+
+
+def _is_legacy_schema(conn: Connection) -> bool:
+    data_type = conn.execute(text(
+        """
+        SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'performance_events' AND column_name = 'occurred_at'
+        """
+    )).scalar()
+    return data_type in ("character varying", "text")
+
+
+def _convert_batch(conn: Connection, after_id, batch_size: int) -> Tuple[int, Any, int]:
+    """
+    Converte um lote de linhas ainda não migradas (id > after_id).
+    Retorna (linhas convertidas, último id visto, timestamps inválidos).
+    """
+    query = """
+        SELECT id, occurred_at, event_metadata FROM performance_events
+        WHERE occurred_at_tz IS NULL {cursor}
+        ORDER BY id
+        LIMIT :limit
+    """.format(cursor="AND id > :after_id" if after_id is not None else "")
+    rows = conn.execute(text(query), {"after_id": after_id, "limit": batch_size}).all()
+    if not rows:
+        return 0, after_id, 0
+
+    invalid = 0
+    params = []
+    for row in rows:
+        occurred_at = parse_occurred_at(row.occurred_at)
+        if occurred_at is None:
+            invalid += 1
+            occurred_at = UNPARSEABLE_TIMESTAMP
+        params.append({
+            "id": row.id,
+            "occurred_at": occurred_at,
+            "metadata": json.dumps(parse_event_metadata(row.event_metadata)),
+        })
+
+    conn.execute(
+        text(
+            """
+            UPDATE performance_events
+            SET occurred_at_tz = :occurred_at,
+                event_metadata_jsonb = CAST(:metadata AS jsonb)
+            WHERE id = :id
+            """
+        ),
+        params,
+    )
+    return len(rows), rows[-1].id, invalid
+
+
+def _create_index(name: str = INDEX_NAME, columns: str = "student_id, occurred_at DESC") -> None:
+    # CONCURRENTLY não pode rodar dentro de transação
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # Em tabela particionada o índice é criado no pai (propaga para as
+        # partições) e o Postgres não aceita CONCURRENTLY
+        concurrently = "" if is_partitioned(conn) else "CONCURRENTLY "
+        conn.execute(text(
+            f"CREATE INDEX {concurrently}IF NOT EXISTS {name} "
+            f"ON performance_events ({columns});"
+        ))
+
+
+def _link_batch(conn: Connection, after_id, batch_size: int) -> Tuple[int, Any]:
+    """
+    Preenche knowledge_node_id de um lote (id > after_id) casando topic com
+    knowledge_nodes.name. Retorna (linhas examinadas, último id visto).
+    """
+    ids = conn.execute(text(
+        """
+        SELECT id FROM performance_events
+        WHERE knowledge_node_id IS NULL AND topic IS NOT NULL {cursor}
+        ORDER BY id
+        LIMIT :limit
+        """.format(cursor="AND id > :after_id" if after_id is not None else "")
+    ), {"after_id": after_id, "limit": batch_size}).scalars().all()
+    if not ids:
+        return 0, after_id
+
+    # Nomes duplicados: fica o menor id, para o resultado ser determinístico
+    conn.execute(text(
+        """
+        UPDATE performance_events pe
+        SET knowledge_node_id = kn.id
+        FROM (SELECT DISTINCT ON (name) id, name FROM knowledge_nodes ORDER BY name, id) kn
+        WHERE pe.id = ANY(:ids) AND pe.knowledge_node_id IS NULL AND kn.name = pe.topic
+        """
+    ), {"ids": list(ids)})
+    return len(ids), ids[-1]
+
+
+def backfill_knowledge_node_ids(batch_size: int = BATCH_SIZE) -> None:
+    """Adiciona e preenche performance_events.knowledge_node_id em lotes curtos."""
+    if "postgresql" not in (SYNC_DATABASE_URL or ""):
+        return
+
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE performance_events ADD COLUMN IF NOT EXISTS knowledge_node_id uuid;"))
+
+    total, last_id = 0, None
+    while True:
+        with engine.begin() as conn:
+            examined, last_id = _link_batch(conn, last_id, batch_size)
+        if not examined:
+            break
+        total += examined
+    print(f"knowledge_node_id: {total} eventos examinados (tópicos sem nó correspondente ficam NULL).")
+
+    _create_index(NODE_INDEX_NAME, "student_id, knowledge_node_id, occurred_at DESC")
+    print(f"Índice {NODE_INDEX_NAME} garantido.")
+
+
+def backfill_performance_events(batch_size: int = BATCH_SIZE) -> None:
+    if "postgresql" not in (SYNC_DATABASE_URL or ""):
+        print("Banco não-Postgres detectado — o schema vem de create_all, nada a migrar.")
+        return
+
+    with engine.begin() as conn:
+        legacy = _is_legacy_schema(conn)
+        if legacy:
+            conn.execute(text("ALTER TABLE performance_events ADD COLUMN IF NOT EXISTS occurred_at_tz timestamptz;"))
+            conn.execute(text("ALTER TABLE performance_events ADD COLUMN IF NOT EXISTS event_metadata_jsonb jsonb;"))
+
+    if legacy:
+        print("Convertendo performance_events em lotes...")
+        total, invalid, last_id = 0, 0, None
+        while True:
+            with engine.begin() as conn:
+                converted, last_id, bad = _convert_batch(conn, last_id, batch_size)
+            if not converted:
+                break
+            total += converted
+            invalid += bad
+            print(f"  {total} linhas convertidas...")
+
+        with engine.begin() as conn:
+            conn.execute(text("LOCK TABLE performance_events IN ACCESS EXCLUSIVE MODE;"))
+            # Linhas gravadas durante o backfill (sob o lock, ninguém mais escreve)
+            last_id = None
+            while True:
+                converted, last_id, bad = _convert_batch(conn, last_id, batch_size)
+                if not converted:
+                    break
+                total += converted
+                invalid += bad
+
+            conn.execute(text("ALTER TABLE performance_events DROP COLUMN occurred_at;"))
+            conn.execute(text("ALTER TABLE performance_events RENAME COLUMN occurred_at_tz TO occurred_at;"))
+            conn.execute(text("ALTER TABLE performance_events ALTER COLUMN occurred_at SET NOT NULL;"))
+            conn.execute(text("ALTER TABLE performance_events DROP COLUMN event_metadata;"))
+            conn.execute(text("ALTER TABLE performance_events RENAME COLUMN event_metadata_jsonb TO event_metadata;"))
+
+        print(f"Conversão concluída: {total} linhas ({invalid} com timestamp inválido -> {UNPARSEABLE_TIMESTAMP.isoformat()}).")
+    else:
+        print("performance_events já usa timestamptz/JSONB.")
+
+    _create_index()
+    print(f"Índice {INDEX_NAME} garantido.")
+
+
+if __name__ == '__main__':
+    backfill_performance_events()
+    backfill_knowledge_node_ids()
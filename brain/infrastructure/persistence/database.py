@@ -1,7 +1,11 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import hashlib
+from contextlib import asynccontextmanager
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from typing import AsyncGenerator
+from sqlalchemy.sql.elements import TextClause
+from typing import AsyncGenerator, AsyncIterator, Optional
 
 from brain.config.settings import settings
 
@@ -15,23 +19,124 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # ----------------------
 # Configuração da DB Async
 # ----------------------
-ASYNC_DATABASE_URL = SYNC_DATABASE_URL.replace("sqlite:///", "sqlite+aiosqlite:///")
-if "postgresql" in ASYNC_DATABASE_URL:
-    ASYNC_DATABASE_URL = ASYNC_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
+def _to_async_url(url: str) -> str:
+    url = url.replace("sqlite:///", "sqlite+aiosqlite:///")
+    if "postgresql" in url:
+        url = url.replace("postgresql://", "postgresql+asyncpg://")
+    return url
+
+
+ASYNC_DATABASE_URL = _to_async_url(SYNC_DATABASE_URL)
 
 async_engine = create_async_engine(
     ASYNC_DATABASE_URL,
     pool_pre_ping=True,
 )
 
+# Marca em `session.info` que a transação escreveu algo
+HAS_WRITES = "has_writes"
+
+
+class PrimarySession(Session):
+    """
+    Sessão do primário que registra se houve escrita (flush ou statement que
+    não é SELECT). Requisições só de leitura não precisam de COMMIT.
+    """
+
+
+@event.listens_for(PrimarySession, "do_orm_execute")
+def _track_statement_writes(orm_execute_state) -> None:
+    statement = orm_execute_state.statement
+    if isinstance(statement, TextClause):
+        is_read = statement.text.lstrip().upper().startswith("SELECT")
+    else:
+        is_read = orm_execute_state.is_select
+    if not is_read:
+        orm_execute_state.session.info[HAS_WRITES] = True
+
+
+@event.listens_for(PrimarySession, "after_flush")
+def _track_flush_writes(session, flush_context) -> None:
+    session.info[HAS_WRITES] = True
+
+
+def has_writes(db: AsyncSession) -> bool:
+    return bool(db.info.get(HAS_WRITES) or db.new or db.dirty or db.deleted)
+
+
+def advisory_lock_key(name: str) -> int:
+    """Chave bigint estável de um advisory lock nomeado."""
+    return int.from_bytes(hashlib.sha256(name.encode("utf-8")).digest()[:8], "big", signed=True)
+
+
+@asynccontextmanager
+async def advisory_lock(name: str) -> AsyncIterator[bool]:
+    """
+    `pg_try_advisory_lock` de sessão, com chave derivada de `name`, numa
+    conexão dedicada em autocommit: só um processo por vez segue com o job, e
+    ele pode fazer transações curtas à vontade enquanto segura o lock (um lock
+    de transação deixaria uma transação aberta pelo job inteiro, segurando
+    snapshot e autovacuum). Fora do Postgres (sqlite em testes/dev) não há
+    concorrência e entrega True.
+    """
+    if async_engine.dialect.name != "postgresql":
+        yield True
+        return
+    key = advisory_lock_key(name)
+    async with async_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        acquired = bool((await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key})).scalar())
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+
+
 AsyncSessionLocal = async_sessionmaker(
     bind=async_engine,
     class_=AsyncSession,
+    sync_session_class=PrimarySession,
     autocommit=False,
     autoflush=False,
     expire_on_commit=False
 )
 
+# Leituras de jobs longos: cada SELECT confirma sozinho, sem transação aberta
+# entre uma leitura e as chamadas externas (Qdrant, LLM) que vêm depois
+AutocommitSessionLocal = async_sessionmaker(
+    bind=async_engine.execution_options(isolation_level="AUTOCOMMIT"),
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# ----------------------
+# Réplica de leitura (opcional)
+# ----------------------
+# Sem DATABASE_READ_URL as leituras usam a própria sessão do primário.
+ASYNC_READ_DATABASE_URL: Optional[str] = (
+    _to_async_url(settings.DATABASE_READ_URL) if settings.DATABASE_READ_URL else None
+)
+
+read_async_engine = (
+    create_async_engine(ASYNC_READ_DATABASE_URL, pool_pre_ping=True)
+    if ASYNC_READ_DATABASE_URL
+    else None
+)
+
+AsyncReadSessionLocal = (
+    async_sessionmaker(
+        bind=read_async_engine,
+        class_=AsyncSession,
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+    if read_async_engine is not None
+    else None
+)
+
 Base = declarative_base()
 
 # ----------------------
@@ -40,12 +145,25 @@ Base = declarative_base()
 async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Fornece uma sessão de banco de dados SQLAlchemy assíncrona.
-    Garante fechamento da sessão após uso.
+    Garante fechamento da sessão após uso; só faz COMMIT se houve escrita.
     """
     async with AsyncSessionLocal() as db:
         try:
             yield db
-            await db.commit()
+            if has_writes(db):
+                await db.commit()
         except Exception:
             await db.rollback()
             raise
+
+
+async def get_async_read_db() -> AsyncGenerator[Optional[AsyncSession], None]:
+    """
+    Sessão na réplica de leitura, ou None se não houver réplica configurada.
+    Nunca faz COMMIT: a transação (só de leitura) é descartada ao fechar.
+    """
+    if AsyncReadSessionLocal is None:
+        yield None
+        return
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -0,0 +1,194 @@
+"""
+Cache persistente de embeddings de consulta.
+
+As buscas de RAG embutem quase sempre os mesmos textos (o nome do nó), então
+o vetor de (modelo, task_type, texto) é guardado:
+
+- num LRU em memória (OrderedDict) para os textos quentes do processo;
+- num arquivo SQLite local, compartilhado entre processos e reinícios, com o
+  vetor empacotado em float32 (4 bytes por dimensão).
+
+O arquivo é limitado a `max_entries`: ao passar do limite, as entradas usadas
+há mais tempo são removidas em lote. Leituras em SQLite local por chave
+primária custam microssegundos, por isso são feitas direto no event loop; a
+recência no disco só é regravada quando passa de `touch_interval_seconds`,
+para um hit não virar uma escrita disputando o lock com os outros processos.
+O cache é só um atalho: falha de SQLite (arquivo travado, disco cheio) vira
+log e a chamada segue para a API de embeddings.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_embeddings (
+    key BLOB PRIMARY KEY,
+    vector BLOB NOT NULL,
+    last_used_at REAL NOT NULL
+)
+"""
+
+_INDEX = "CREATE INDEX IF NOT EXISTS ix_query_embeddings_last_used_at ON query_embeddings (last_used_at)"
+
+
+def embedding_key(model: str, task_type: str, text: str) -> bytes:
+    return hashlib.sha256(f"{model}\0{task_type}\0{text}".encode("utf-8")).digest()
+
+
+def pack_vector(vector: Sequence[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def unpack_vector(blob: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+class EmbeddingCache:
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_memory_entries: int = 4096,
+        max_entries: int = 200_000,
+        evict_fraction: float = 0.1,
+        touch_interval_seconds: float = 3600.0,
+        busy_timeout_ms: int = 5000,
+    ) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Outro processo escrevendo: espera o lock em vez de falhar na hora
+        self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        self._conn.execute(_SCHEMA)
+        self._conn.execute(_INDEX)
+
+        self._memory: "OrderedDict[bytes, List[float]]" = OrderedDict()
+        self._max_memory_entries = max_memory_entries
+        self._max_entries = max_entries
+        # Remove uma fração de uma vez, para não pagar um DELETE a cada inserção
+        self._evict_batch = max(1, int(max_entries * evict_fraction))
+        self._touch_interval = touch_interval_seconds
+        self._disk_entries = self._conn.execute("SELECT count(*) FROM query_embeddings").fetchone()[0]
+
+        # Métricas simples para observabilidade
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    # ==============================
+    # Métricas
+    # ==============================
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "errors": self.errors,
+            "hit_ratio": self.hit_ratio,
+            "memory_entries": len(self._memory),
+            "disk_entries": self._disk_entries,
+        }
+
+    # ==============================
+    # Leitura / escrita
+    # ==============================
+
+    def _remember(self, key: bytes, vector: List[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, model: str, task_type: str, text: str) -> Optional[List[float]]:
+        key = embedding_key(model, task_type, text)
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return vector
+
+        try:
+            row = self._conn.execute(
+                "SELECT vector, last_used_at FROM query_embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Cache de embeddings indisponível na leitura: {e}")
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+
+        now = time.time()
+        if now - row[1] >= self._touch_interval:
+            try:
+                self._conn.execute("UPDATE query_embeddings SET last_used_at = ? WHERE key = ?", (now, key))
+            except sqlite3.Error as e:
+                # Só a recência da eviction fica para trás; o vetor lido vale
+                self.errors += 1
+                logger.warning(f"Cache de embeddings: recência não gravada: {e}")
+        vector = unpack_vector(row[0])
+        self._remember(key, vector)
+        self.disk_hits += 1
+        return vector
+
+    def put(self, model: str, task_type: str, text: str, vector: Sequence[float]) -> List[float]:
+        """Grava o vetor e devolve-o como será lido do cache (arredondado a float32)."""
+        key = embedding_key(model, task_type, text)
+        blob = pack_vector(vector)
+        stored = unpack_vector(blob)
+        self._remember(key, stored)
+        now = time.time()
+        try:
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO query_embeddings (key, vector, last_used_at) VALUES (?, ?, ?)",
+                (key, blob, now),
+            ).rowcount
+            if inserted:
+                self._disk_entries += 1
+            else:
+                self._conn.execute(
+                    "UPDATE query_embeddings SET vector = ?, last_used_at = ? WHERE key = ?", (blob, now, key)
+                )
+            if self._disk_entries > self._max_entries:
+                self._evict()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Cache de embeddings indisponível na escrita: {e}")
+        return stored
+
+    def _evict(self) -> None:
+        excess = self._disk_entries - self._max_entries + self._evict_batch
+        removed = self._conn.execute(
+            "DELETE FROM query_embeddings WHERE key IN ("
+            "SELECT key FROM query_embeddings ORDER BY last_used_at, rowid LIMIT ?)",
+            (excess,),
+        ).rowcount
+        self._disk_entries = self._conn.execute("SELECT count(*) FROM query_embeddings").fetchone()[0]
+        self.evictions += removed
+        logger.info(f"Cache de embeddings: {removed} entradas antigas removidas.")
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,123 @@
+"""
+Redução de dimensionalidade dos embeddings (ex.: 768 -> 256) antes da busca.
+
+Dois métodos:
+- "pca": projeção nas `dim` componentes principais do corpus, ajustada
+  offline sobre os vetores já gravados (ver
+  brain/scripts/benchmark_embedding_dims.py);
+- "truncate": prefixo das `dim` primeiras coordenadas, para modelos treinados
+  no estilo Matryoshka (o prefixo já é um embedding válido).
+
+Nos dois casos a entrada é normalizada antes e a saída depois (cosseno). A
+projeção precisa ser a mesma na ingestão e na consulta: por isso é um artefato
+versionado (`<versão>.npz` em EMBEDDING_PROJECTION_DIR) e a versão fica nos
+metadados da coleção (Qdrant) ou no meta.json do índice local.
+"""
+
+import hashlib
+import os
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+PROJECTION_METHODS = ("pca", "truncate")
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class EmbeddingProjection:
+    def __init__(
+        self,
+        method: str,
+        input_dim: int,
+        dim: int,
+        *,
+        components: Optional[np.ndarray] = None,
+        mean: Optional[np.ndarray] = None,
+    ) -> None:
+        if method not in PROJECTION_METHODS:
+            raise ValueError(f"Projeção desconhecida: {method!r} (use {', '.join(PROJECTION_METHODS)})")
+        if not 0 < dim <= input_dim:
+            raise ValueError(f"Dimensão {dim} fora de 1..{input_dim}")
+        if method == "pca" and (components is None or components.shape != (dim, input_dim)):
+            raise ValueError(f"PCA precisa de componentes ({dim}, {input_dim})")
+        self.method = method
+        self.input_dim = input_dim
+        self.dim = dim
+        self._components = None if components is None else np.asarray(components, dtype=np.float32)
+        self._mean = None if mean is None else np.asarray(mean, dtype=np.float32)
+
+    @classmethod
+    def truncate(cls, input_dim: int, dim: int) -> "EmbeddingProjection":
+        return cls("truncate", input_dim, dim)
+
+    @classmethod
+    def fit_pca(cls, vectors: np.ndarray, dim: int) -> "EmbeddingProjection":
+        """Componentes principais dos vetores normalizados (autovetores da covariância, input_dim x input_dim)."""
+        matrix = _normalize(np.asarray(vectors, dtype=np.float64))
+        if matrix.shape[0] < 2:
+            raise ValueError("PCA precisa de pelo menos 2 vetores")
+        mean = matrix.mean(axis=0)
+        centered = matrix - mean
+        covariance = centered.T @ centered / (len(matrix) - 1)
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        order = np.argsort(eigenvalues)[::-1][:dim]
+        return cls("pca", matrix.shape[1], dim, components=eigenvectors[:, order].T, mean=mean)
+
+    @property
+    def version(self) -> str:
+        """Identificador estável do artefato: método, dimensões e hash dos parâmetros."""
+        digest = hashlib.sha256(f"{self.method}:{self.input_dim}:{self.dim}".encode())
+        for array in (self._components, self._mean):
+            if array is not None:
+                digest.update(np.ascontiguousarray(array).tobytes())
+        return f"{self.method}{self.dim}-{digest.hexdigest()[:12]}"
+
+    def apply(self, vectors) -> np.ndarray:
+        """(n, input_dim) -> (n, dim), normalizado; aceita um único vetor (input_dim,)."""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.shape[-1] != self.input_dim:
+            raise ValueError(f"Embedding com {matrix.shape[-1]} dimensões; a projeção espera {self.input_dim}")
+        matrix = _normalize(matrix)
+        if self.method == "truncate":
+            return _normalize(matrix[..., : self.dim])
+        return _normalize((matrix - self._mean) @ self._components.T)
+
+    def apply_one(self, vector: Sequence[float]) -> List[float]:
+        return self.apply(vector).tolist()
+
+    def save(self, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.version}.npz")
+        tmp_path = path + ".tmp.npz"
+        arrays = {"components": self._components, "mean": self._mean}
+        np.savez(
+            tmp_path,
+            method=np.array(self.method),
+            input_dim=np.array(self.input_dim),
+            dim=np.array(self.dim),
+            **{name: array for name, array in arrays.items() if array is not None},
+        )
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "EmbeddingProjection":
+        with np.load(path) as data:
+            return cls(
+                str(data["method"]),
+                int(data["input_dim"]),
+                int(data["dim"]),
+                components=data["components"] if "components" in data else None,
+                mean=data["mean"] if "mean" in data else None,
+            )
+
+
+def load_projection(directory: str, version: str) -> EmbeddingProjection:
+    projection = EmbeddingProjection.load(os.path.join(directory, f"{version}.npz"))
+    if projection.version != version:
+        raise ValueError(f"Artefato {version}.npz corrompido (versão calculada {projection.version})")
+    return projection
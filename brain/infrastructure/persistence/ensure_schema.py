@@ -8,6 +8,9 @@ if project_root not in sys.path:
 
 from sqlalchemy import text
 from brain.infrastructure.persistence.database import engine, SYNC_DATABASE_URL, Base
+from brain.infrastructure.persistence.backfill_performance_events import backfill_performance_events, backfill_knowledge_node_ids
+from brain.infrastructure.persistence.partition_maintenance import convert_to_partitioned, maintain_partitions
+from brain.infrastructure.persistence.models import GRAPH_VERSION_DDL, StudentTopicStatsModel, NodeSemanticNeighborModel, NodeContextModel
 
 
 def ensure_schema():
@@ -40,6 +43,20 @@ def ensure_schema():
             conn.execute(text("ALTER TABLE knowledge_nodes ADD COLUMN IF NOT EXISTS lapses integer DEFAULT 0;"))
             conn.execute(text("ALTER TABLE knowledge_nodes ADD COLUMN IF NOT EXISTS last_reviewed_at timestamp;"))
             conn.execute(text("ALTER TABLE knowledge_nodes ADD COLUMN IF NOT EXISTS next_review_at timestamp;"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_node_dependencies_child_id ON node_dependencies (child_id);"))
+
+            # error_events: colunas do esquema real + índices (aluno, nó) e (aluno, data)
+            conn.execute(text("ALTER TABLE error_events ADD COLUMN IF NOT EXISTS knowledge_node_id uuid REFERENCES knowledge_nodes(id);"))
+            conn.execute(text("ALTER TABLE error_events ADD COLUMN IF NOT EXISTS error_type varchar NOT NULL DEFAULT 'conteudo';"))
+            conn.execute(text("ALTER TABLE error_events ADD COLUMN IF NOT EXISTS occurred_at timestamptz NOT NULL DEFAULT now();"))
+            conn.execute(text("ALTER TABLE error_events ADD COLUMN IF NOT EXISTS severity double precision NOT NULL DEFAULT 0.0;"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_error_events_student_node ON error_events (student_id, knowledge_node_id) "
+                "INCLUDE (id, error_type, occurred_at, severity);"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_error_events_student_occurred_at ON error_events (student_id, occurred_at DESC);"
+            ))
 
             # Adiciona constraint FK somente se não existir
             conn.execute(text(
@@ -59,6 +76,50 @@ def ensure_schema():
                 """
             ))
         print("Alterações aplicadas (Postgres).")
+
+        # performance_events: String/str(dict) -> timestamptz/JSONB + índice (em lotes)
+        backfill_performance_events()
+
+        # performance_events particionada por mês + partições futuras/retenção
+        with engine.begin() as conn:
+            if convert_to_partitioned(conn):
+                print("performance_events convertida para tabela particionada.")
+            maintain_partitions(conn)
+
+        # performance_events.knowledge_node_id (a partir do tópico) + índice de get_history
+        backfill_knowledge_node_ids()
+
+        # Versão do grafo: sequência + triggers que publicam NOTIFY a cada escrita
+        with engine.begin() as conn:
+            conn.execute(text("CREATE SEQUENCE IF NOT EXISTS graph_version_seq;"))
+            for ddl in GRAPH_VERSION_DDL:
+                conn.exec_driver_sql(ddl)
+        print("Triggers de versão do grafo garantidos.")
+
+        # Agregado por (aluno, tópico, métrica); populado a partir do histórico na criação
+        with engine.begin() as conn:
+            table = StudentTopicStatsModel.__table__
+            if not conn.dialect.has_table(conn, table.name):
+                table.create(conn)
+                conn.execute(text(
+                    """
+                    INSERT INTO student_topic_stats
+                        (student_id, topic, metric, count, value_sum, value_sum_sq, last_value, last_occurred_at)
+                    SELECT student_id, COALESCE(topic, ''), metric, count(*), sum(value), sum(value * value),
+                           (array_agg(value ORDER BY occurred_at DESC))[1], max(occurred_at)
+                    FROM performance_events
+                    GROUP BY student_id, COALESCE(topic, ''), metric;
+                    """
+                ))
+                print("student_topic_stats criada e populada a partir de performance_events.")
+
+        # Vizinhança semântica pré-calculada (preenchida pelo job de refresh)
+        with engine.begin() as conn:
+            NodeSemanticNeighborModel.__table__.create(conn, checkfirst=True)
+
+        # Contexto RAG pré-calculado por nó (preenchido pelo job de refresh)
+        with engine.begin() as conn:
+            NodeContextModel.__table__.create(conn, checkfirst=True)
     else:
         # Para outros bancos (ex: sqlite) usamos create_all para alinhar o schema local
         print("Banco não-Postgres detectado — executando create_all para sincronizar modelos locais.")
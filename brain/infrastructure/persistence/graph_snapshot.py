@@ -0,0 +1,270 @@
+"""
+Snapshot do grafo de conhecimento compartilhado por todas as requisições do
+processo.
+
+O grafo inteiro era recarregado a cada plano/simulado. Aqui ele é carregado uma
+vez por versão e servido como tupla imutável. A versão vem da sequência
+`graph_version_seq`, avançada por trigger a cada escrita em knowledge_nodes /
+node_dependencies (inclusive as do worker Go):
+
+- `GraphVersionListener` escuta o canal `graph_version` (LISTEN/NOTIFY) e marca o
+  snapshot como sujo assim que outro worker confirma uma escrita;
+- sem conexão de LISTEN, o cache volta a conferir a versão no banco a cada
+  `poll_interval_seconds` (fallback por polling).
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime
+from types import MappingProxyType
+from typing import Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import event
+
+from brain.application.ports.repositories import KnowledgeRepository
+from brain.domain.entities.knowledge_node import KnowledgeNode
+from brain.domain.value_objects.dependency_graph import DependencyGraph
+from brain.infrastructure.persistence.models import GRAPH_VERSION_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class GraphSnapshot:
+    version: int
+    nodes: Tuple[KnowledgeNode, ...]
+    by_name: Mapping[str, KnowledgeNode]
+    dependencies: DependencyGraph
+
+    @classmethod
+    def build(cls, version: int, nodes: Iterable[KnowledgeNode], dependencies: DependencyGraph) -> "GraphSnapshot":
+        nodes = tuple(nodes)
+        return cls(
+            version=version,
+            nodes=nodes,
+            by_name=MappingProxyType({n.name: n for n in nodes}),
+            dependencies=dependencies,
+        )
+
+
+class GraphSnapshotCache:
+    """
+    Guarda o snapshot atual e decide quando recarregá-lo. Recargas concorrentes
+    são coalescidas num único SELECT (single-flight).
+    """
+
+    def __init__(self, poll_interval_seconds: float = 5.0) -> None:
+        self._poll_interval_seconds = poll_interval_seconds
+        self._snapshot: Optional[GraphSnapshot] = None
+        self._dirty = True
+        # Conta invalidações: uma que chegue durante a carga mantém o snapshot sujo
+        self._invalidations = 0
+        self._listening = False
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+        # Métricas simples para observabilidade
+        self.loads = 0
+        self.hits = 0
+
+    @property
+    def snapshot(self) -> Optional[GraphSnapshot]:
+        return self._snapshot
+
+    def set_listening(self, listening: bool) -> None:
+        self._listening = listening
+
+    def invalidate(self, version: Optional[int] = None) -> None:
+        """
+        Marca o snapshot como sujo (sem versão, ou versão igual ou mais nova que a
+        atual). Igual conta: o trigger avança a sequência antes do commit, então o
+        snapshot pode ter lido a versão nova junto com as linhas antigas.
+        """
+        if version is None or self._snapshot is None or version >= self._snapshot.version:
+            self._invalidations += 1
+            self._dirty = True
+
+    def _is_fresh(self) -> bool:
+        if self._snapshot is None or self._dirty:
+            return False
+        # Com LISTEN ativo, qualquer escrita já teria marcado o snapshot como sujo
+        return self._listening or time.monotonic() - self._checked_at < self._poll_interval_seconds
+
+    async def get(self, repo) -> GraphSnapshot:
+        """`repo` precisa expor `get_full_graph()`, `get_dependency_graph()` e `get_graph_version()`."""
+        if self._is_fresh():
+            self.hits += 1
+            return self._snapshot
+
+        async with self._lock:
+            if self._is_fresh():
+                self.hits += 1
+                return self._snapshot
+
+            version = await repo.get_graph_version()
+            if self._snapshot is not None and not self._dirty and self._snapshot.version == version:
+                # Polling: nada mudou desde a última carga
+                self._checked_at = time.monotonic()
+                self.hits += 1
+                return self._snapshot
+
+            invalidations = self._invalidations
+            nodes = await repo.get_full_graph()
+            dependencies = await repo.get_dependency_graph()
+            self._snapshot = GraphSnapshot.build(version, nodes, dependencies)
+            # Só fica limpo se a carga terminou e nenhum NOTIFY chegou durante o SELECT
+            self._dirty = self._invalidations != invalidations
+            self._checked_at = time.monotonic()
+            self.loads += 1
+            logger.info(f"Snapshot do grafo carregado: versão {version}, {len(self._snapshot.nodes)} nós.")
+            return self._snapshot
+
+
+class GraphVersionListener:
+    """
+    Mantém uma conexão asyncpg dedicada em LISTEN no canal de versão do grafo.
+    Reconecta com backoff; enquanto desconectado o cache opera por polling.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        cache: GraphSnapshotCache,
+        *,
+        channel: str = GRAPH_VERSION_CHANNEL,
+        reconnect_seconds: float = 5.0,
+    ) -> None:
+        # asyncpg não entende o sufixo de driver do SQLAlchemy
+        self._dsn = dsn.replace("+asyncpg", "")
+        self._cache = cache
+        self._channel = channel
+        self._reconnect_seconds = reconnect_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            self._cache.invalidate(int(payload))
+        except (TypeError, ValueError):
+            self._cache.invalidate()
+
+    async def _run(self) -> None:
+        import asyncpg
+
+        while True:
+            connection = None
+            lost = asyncio.Event()
+            try:
+                connection = await asyncpg.connect(self._dsn)
+                connection.add_termination_listener(lambda _conn: lost.set())
+                await connection.add_listener(self._channel, self._on_notify)
+                self._cache.set_listening(True)
+                # Escritas feitas enquanto não escutávamos não geraram notificação
+                self._cache.invalidate()
+                logger.info(f"LISTEN {self._channel} ativo.")
+                await lost.wait()
+                logger.warning(f"Conexão de LISTEN {self._channel} perdida; usando polling até reconectar.")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Falha no LISTEN {self._channel}: {e}")
+            finally:
+                self._cache.set_listening(False)
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self._reconnect_seconds)
+
+
+class CachedKnowledgeRepository(KnowledgeRepository):
+    """
+    Decorador do repositório de conhecimento: leituras do grafo vêm do snapshot
+    compartilhado; escritas vão ao repositório real e invalidam o snapshot.
+
+    Com `session`, a invalidação espera o commit da sessão (`after_commit`):
+    invalidar antes deixaria outra requisição recarregar as linhas ainda não
+    confirmadas e guardar o snapshot velho como atual.
+
+    Os nós do snapshot são compartilhados entre requisições e não devem ser
+    alterados; `get_node_by_name` devolve uma cópia, pois quem busca um nó
+    por nome costuma atualizá-lo em seguida.
+    """
+
+    def __init__(self, inner, cache: GraphSnapshotCache, session=None) -> None:
+        self._inner = inner
+        self._cache = cache
+        self._session = session
+        self._invalidation_pending = False
+
+    def _invalidate_after_commit(self) -> None:
+        if self._session is None:
+            self._cache.invalidate()
+            return
+        if self._invalidation_pending:
+            return
+        self._invalidation_pending = True
+
+        def on_commit(_session) -> None:
+            self._invalidation_pending = False
+            self._cache.invalidate()
+
+        # Num rollback o listener fica registrado e dispara no próximo commit da
+        # sessão, o que só custa uma recarga a mais
+        event.listen(self._session.sync_session, "after_commit", on_commit, once=True)
+
+    async def get_full_graph(self) -> Sequence[KnowledgeNode]:
+        return (await self._cache.get(self._inner)).nodes
+
+    async def get_dependency_graph(self) -> DependencyGraph:
+        return (await self._cache.get(self._inner)).dependencies
+
+    # Fechos via BFS na adjacência do snapshot, sem ida ao banco
+    async def get_prerequisite_closure(self, node_ids: Iterable[UUID]) -> Set[UUID]:
+        return (await self.get_dependency_graph()).prerequisite_closure(node_ids)
+
+    async def get_dependent_closure(self, node_ids: Iterable[UUID]) -> Set[UUID]:
+        return (await self.get_dependency_graph()).dependent_closure(node_ids)
+
+    async def get_overdue_nodes(self, current_time: datetime) -> List[KnowledgeNode]:
+        return await self._inner.get_overdue_nodes(current_time)
+
+    async def get_node_by_name(self, name: str) -> Optional[KnowledgeNode]:
+        node = (await self._cache.get(self._inner)).by_name.get(name)
+        return replace(node) if node is not None else None
+
+    async def get_by_id(self, node_id: UUID) -> Optional[KnowledgeNode]:
+        return await self._inner.get_by_id(node_id)
+
+    async def get_graph_version(self) -> int:
+        return await self._inner.get_graph_version()
+
+    async def save(self, node: KnowledgeNode) -> None:
+        await self._inner.save(node)
+        self._invalidate_after_commit()
+
+    async def update(self, node: KnowledgeNode) -> None:
+        await self._inner.update(node)
+        self._invalidate_after_commit()
+
+    async def save_many(self, nodes: Iterable[KnowledgeNode]) -> None:
+        await self._inner.save_many(nodes)
+        self._invalidate_after_commit()
+
+    async def update_many(self, nodes: Iterable[KnowledgeNode]) -> None:
+        await self._inner.update_many(nodes)
+        self._invalidate_after_commit()
@@ -1,14 +1,17 @@
 from uuid import UUID
-from typing import List, Optional, Dict
+from typing import AsyncIterator, Iterable, List, Mapping, Optional, Dict, Sequence, Set, Tuple
 from datetime import datetime
+from dataclasses import replace
 
 # Importações de Entidades
 from brain.domain.entities.student import Student
 from brain.domain.entities.performance_event import PerformanceEvent
+from brain.domain.entities.student_topic_stats import StudentTopicStats
 from brain.domain.entities.knowledge_node import KnowledgeNode
 from brain.domain.entities.study_plan import StudyPlan
 from brain.domain.entities.error_event import ErrorEvent
 from brain.domain.entities.cognitive_profile import CognitiveProfile
+from brain.domain.value_objects.dependency_graph import DependencyGraph
 
 # Importações de Portas
 from brain.application.ports.repositories import (
@@ -17,7 +20,10 @@ from brain.application.ports.repositories import (
     KnowledgeRepository,
     StudyPlanRepository,
     CognitiveProfileRepository,
-    ErrorEventRepository
+    ErrorEventRepository,
+    SemanticNeighborRepository,
+    NodeContext,
+    NodeContextRepository,
 )
 
 class InMemoryStudentRepository(StudentRepository):
@@ -33,6 +39,7 @@ class InMemoryStudentRepository(StudentRepository):
 class InMemoryPerformanceRepository(PerformanceRepository):
     def __init__(self):
         self.events: List[PerformanceEvent] = []
+        self.topic_stats: Dict[tuple, StudentTopicStats] = {}
     
     async def get_recent_events(self, student_id: UUID, limit: int = 50) -> List[PerformanceEvent]:
         student_events = [e for e in self.events if e.student_id == student_id]
@@ -41,29 +48,88 @@ class InMemoryPerformanceRepository(PerformanceRepository):
         return student_events[-limit:]
 
     # Método genérico exigido pelo contrato
-    async def get_history_for_student(self, student_id: UUID) -> List[PerformanceEvent]:
-        return [e for e in self.events if e.student_id == student_id]
+    async def get_history_for_student(self, student_id: UUID, since: Optional[datetime] = None) -> List[PerformanceEvent]:
+        return [
+            e for e in self.events
+            if e.student_id == student_id and (since is None or e.occurred_at >= since)
+        ]
+
+    def _chronological(self, student_id: UUID, since: Optional[datetime] = None) -> List[PerformanceEvent]:
+        events = [
+            e for e in self.events
+            if e.student_id == student_id and (since is None or e.occurred_at >= since)
+        ]
+        return sorted(events, key=lambda e: (e.occurred_at, str(e.id)))
+
+    async def stream_history_for_student(
+        self, student_id: UUID, since: Optional[datetime] = None, batch_size: int = 1000
+    ) -> AsyncIterator[PerformanceEvent]:
+        for event in self._chronological(student_id, since):
+            yield event
+
+    async def get_history_page(
+        self, student_id: UUID, after: Optional[Tuple[datetime, UUID]] = None, limit: int = 500
+    ) -> List[PerformanceEvent]:
+        events = self._chronological(student_id)
+        if after is not None:
+            cursor = (after[0], str(after[1]))
+            events = [e for e in events if (e.occurred_at, str(e.id)) > cursor]
+        return events[:limit]
 
     # Método específico chamado pelo RecordReviewUseCase (Atenção aqui!)
-    async def get_history(self, student_id: UUID, node_id: UUID) -> List[PerformanceEvent]:
+    async def get_history(self, student_id: UUID, node_id: UUID, limit: int = 50) -> List[PerformanceEvent]:
         """Recupera histórico específico de um nó para cálculo de tendência."""
-        return [
+        events = [
             e for e in self.events 
             if e.student_id == student_id and getattr(e, 'knowledge_node_id', None) == node_id
         ]
+        events.sort(key=lambda e: e.occurred_at)
+        return events[-limit:]
     
+    async def get_topic_stats(self, student_id: UUID) -> List[StudentTopicStats]:
+        return [s for s in self.topic_stats.values() if s.student_id == student_id]
+
     async def save(self, event: PerformanceEvent) -> None:
         self.events.append(event)
+        key = (event.student_id, event.topic or "", event.metric)
+        if key not in self.topic_stats:
+            self.topic_stats[key] = StudentTopicStats(event.student_id, event.topic or "", event.metric)
+        self.topic_stats[key].add(event)
+
+    async def save_many(self, events: Iterable[PerformanceEvent]) -> None:
+        for event in events:
+            await self.save(event)
 
 class InMemoryKnowledgeRepository(KnowledgeRepository):
     def __init__(self):
         self.nodes: List[KnowledgeNode] = []
         self._nodes_by_id: Dict[UUID, KnowledgeNode] = {}
         self._nodes_by_subject: Dict[str, List[KnowledgeNode]] = {}
+        self._graph_snapshot: Optional[Tuple[KnowledgeNode, ...]] = None
+        self._dependency_graph: Optional[DependencyGraph] = None
     
-    async def get_full_graph(self) -> List[KnowledgeNode]:
-        return self.nodes.copy()
+    async def get_full_graph(self) -> Sequence[KnowledgeNode]:
+        # Snapshot imutável reaproveitado entre chamadas; invalidado a cada escrita
+        if self._graph_snapshot is None or len(self._graph_snapshot) != len(self.nodes):
+            self._graph_snapshot = tuple(self.nodes)
+        return self._graph_snapshot
     
+    async def get_dependency_graph(self) -> DependencyGraph:
+        # Adjacência em cache, reconstruída só depois de uma escrita
+        if self._dependency_graph is None:
+            self._dependency_graph = DependencyGraph.from_edges(
+                (getattr(dep, "id", dep), node.id)
+                for node in self.nodes
+                for dep in node.dependencies
+            )
+        return self._dependency_graph
+
+    async def get_prerequisite_closure(self, node_ids: Iterable[UUID]) -> Set[UUID]:
+        return (await self.get_dependency_graph()).prerequisite_closure(node_ids)
+
+    async def get_dependent_closure(self, node_ids: Iterable[UUID]) -> Set[UUID]:
+        return (await self.get_dependency_graph()).dependent_closure(node_ids)
+
     async def get_overdue_nodes(self, current_time: datetime) -> List[KnowledgeNode]:
         return [
             node for node in self.nodes 
@@ -87,6 +153,8 @@ class InMemoryKnowledgeRepository(KnowledgeRepository):
         
     async def save(self, node: KnowledgeNode) -> None:
         """Upsert assíncrono."""
+        self._graph_snapshot = None
+        self._dependency_graph = None
         # Atualiza dicionário principal
         self._nodes_by_id[node.id] = node
         
@@ -117,6 +185,13 @@ class InMemoryKnowledgeRepository(KnowledgeRepository):
     async def update(self, node: KnowledgeNode) -> None:
         await self.save(node)
 
+    async def save_many(self, nodes: Iterable[KnowledgeNode]) -> None:
+        for node in nodes:
+            await self.save(node)
+
+    async def update_many(self, nodes: Iterable[KnowledgeNode]) -> None:
+        await self.save_many(nodes)
+
 class InMemoryCognitiveProfileRepository(CognitiveProfileRepository):
     def __init__(self):
         self._profiles: Dict[UUID, CognitiveProfile] = {}
@@ -146,4 +221,42 @@ class InMemoryErrorEventRepository(ErrorEventRepository):
     
     async def get_by_student_and_subject(self, student_id: UUID, subject: str) -> List[ErrorEvent]:
         # Implementação simplificada para mock
-        return [e for e in self.errors if e.student_id == student_id]
\ No newline at end of file
+        return [e for e in self.errors if e.student_id == student_id]
+
+    async def save(self, error: ErrorEvent) -> None:
+        self.errors.append(error)
+
+    async def save_many(self, errors: Iterable[ErrorEvent]) -> None:
+        self.errors.extend(errors)
+
+
+class InMemorySemanticNeighborRepository(SemanticNeighborRepository):
+    def __init__(self):
+        self.version: Optional[str] = None
+        self.neighbors: Dict[UUID, List[Tuple[UUID, float]]] = {}
+
+    async def get_version(self) -> Optional[str]:
+        return self.version
+
+    async def get_neighbor_ids(self, node_id: UUID, limit: int = 5) -> List[UUID]:
+        return [neighbor_id for neighbor_id, _ in self.neighbors.get(node_id, [])[:limit]]
+
+    async def replace_all(self, version: str, neighbors: Mapping[UUID, Sequence[Tuple[UUID, float]]]) -> None:
+        self.version = version
+        self.neighbors = {node_id: list(scored) for node_id, scored in neighbors.items()}
+
+
+class InMemoryNodeContextRepository(NodeContextRepository):
+    def __init__(self):
+        self.version: Optional[str] = None
+        self.contexts: Dict[UUID, NodeContext] = {}
+
+    async def get_version(self) -> Optional[str]:
+        return self.version
+
+    async def get_contexts(self, node_ids: Iterable[UUID]) -> Dict[UUID, NodeContext]:
+        return {node_id: self.contexts[node_id] for node_id in node_ids if node_id in self.contexts}
+
+    async def replace_all(self, version: str, contexts: Iterable[NodeContext]) -> None:
+        self.version = version
+        self.contexts = {entry.node_id: replace(entry, corpus_version=version) for entry in contexts}
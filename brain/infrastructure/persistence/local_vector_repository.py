@@ -0,0 +1,524 @@
+"""
+Índice vetorial em processo (NumPy), alternativa ao Qdrant para testes, CI e
+implantações pequenas de um nó só.
+
+Layout em disco (`path/`):
+- `vectors.f32`: matriz float32 (capacidade x dim) mapeada em memória
+  (np.memmap), com os vetores já normalizados (produto interno = cosseno);
+- `meta.json`: dimensão, quantidade de linhas, ids e payloads, na ordem das
+  linhas.
+
+A busca é exata: produto matriz-vetor em blocos de `block_size` linhas, com
+top-k parcial por bloco via `argpartition` e um merge final. A CPU gasta é
+proporcional ao corpus; para milhões de vetores use o Qdrant.
+
+Quantização (`quantization`), para o corpus caber em RAM:
+- "int8": cada linha vira int8 com uma escala por linha (4x menor);
+- "binary": só o sinal de cada dimensão, 1 bit (32x menor), comparado por
+  distância de Hamming.
+Nesses modos a primeira passada roda sobre os códigos em memória e devolve
+`limit * oversampling` candidatos, que são reordenados com os vetores float32
+originais. A matriz float32 continua no memmap e só as linhas candidatas são
+lidas do disco.
+
+Com `projection` (ver embedding_projection.py), o índice guarda vetores já
+projetados pela ingestão e projeta os embeddings das consultas; a versão da
+projeção vai para o meta.json e reabrir com outra projeção é erro.
+
+Um escritor por vez: `read_only=True` (a API) mapeia os arquivos só para
+leitura e recarrega quando o meta.json muda em disco (ex.: `seed_rag
+--local-index` rodando ao lado); um escritor só grava se escreveu algo e
+recusa sobrescrever um meta.json alterado por outro processo desde a abertura.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from brain.application.ports.ai_service import AIService
+from brain.application.ports.repositories import KnowledgeVectorRepository
+from brain.infrastructure.persistence.embedding_projection import EmbeddingProjection
+from brain.infrastructure.persistence.rag_ingestion import PAYLOAD_INDEX_FIELDS, new_corpus_revision
+
+logger = logging.getLogger(__name__)
+
+_VECTORS_FILE = "vectors.f32"
+_META_FILE = "meta.json"
+
+QUANTIZATION_MODES = ("none", "int8", "binary")
+
+# Bits ligados de cada byte (popcount via tabela; independe da versão do NumPy)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Índices dos k maiores scores, em ordem decrescente (argpartition + sort só do top)."""
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.size:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.size)
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def quantize_int8(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Quantização escalar simétrica por linha: (códigos int8, escala float32)."""
+    max_abs = np.abs(matrix).max(axis=-1)
+    scales = np.where(max_abs == 0, 1.0, max_abs / 127.0).astype(np.float32)
+    codes = np.rint(matrix / scales[..., None]).astype(np.int8)
+    return codes, scales
+
+
+def quantize_binary(matrix: np.ndarray) -> np.ndarray:
+    """Um bit por dimensão (sinal), empacotado em bytes."""
+    return np.packbits(matrix > 0, axis=-1)
+
+
+class LocalKnowledgeVectorRepository(KnowledgeVectorRepository):
+    def __init__(
+        self,
+        path: str,
+        *,
+        dim: int = 768,
+        ai_service: Optional[AIService] = None,
+        block_size: int = 65536,
+        initial_capacity: int = 1024,
+        quantization: str = "none",
+        oversampling: float = 4.0,
+        projection: Optional[EmbeddingProjection] = None,
+        read_only: bool = False,
+    ) -> None:
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Quantização desconhecida: {quantization!r} (use {', '.join(QUANTIZATION_MODES)})")
+        self._path = path
+        self._ai = ai_service
+        self._block_size = block_size
+        self._quantization = quantization
+        self._oversampling = max(1.0, oversampling)
+        self._projection = projection
+        self._read_only = read_only
+        self._default_dim = projection.dim if projection is not None else dim
+        self._initial_capacity = initial_capacity
+        if not read_only:
+            os.makedirs(path, exist_ok=True)
+        self._load()
+
+    def _meta_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(os.path.join(self._path, _META_FILE))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> None:
+        self._stamp = self._meta_stamp()
+        self._dirty = False
+        # Índices legados, sem revisão: (linhas, versão) do hash dos ids
+        self._corpus_cache: Optional[Tuple[int, str]] = None
+        meta_path = os.path.join(self._path, _META_FILE)
+        if self._stamp is not None:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            self._dim = meta["dim"]
+            self._ids: List[str] = meta["ids"]
+            self._payloads: List[Dict[str, Any]] = meta["payloads"]
+            self._revision: Optional[str] = meta.get("revision")
+            stored = meta.get("projection")
+            projection = self._projection
+            if stored != (projection.version if projection is not None else None):
+                raise ValueError(
+                    f"Índice em {self._path} usa a projeção {stored or 'nenhuma'}; "
+                    f"recebida {projection.version if projection is not None else 'nenhuma'}"
+                )
+        else:
+            self._dim = self._default_dim
+            self._ids, self._payloads = [], []
+            self._revision = None
+        self._rows: Dict[str, int] = {point_id: row for row, point_id in enumerate(self._ids)}
+        # {campo: {valor: linhas}} dos campos de partição; refeito na 1ª busca após um upsert
+        self._payload_index: Optional[Dict[str, Dict[Any, List[int]]]] = None
+
+        vectors_path = os.path.join(self._path, _VECTORS_FILE)
+        existing_rows = os.path.getsize(vectors_path) // (4 * self._dim) if os.path.exists(vectors_path) else 0
+        self._capacity = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        if self._read_only:
+            self._open_read_only(min(existing_rows, len(self._ids)))
+        else:
+            self._ensure_capacity(max(existing_rows, len(self._ids), self._initial_capacity))
+        # Códigos quantizados não vão para disco: são refeitos a partir do memmap
+        for start in range(0, len(self._ids), self._block_size):
+            stop = min(start + self._block_size, len(self._ids))
+            self._encode(slice(start, stop), self._matrix[start:stop])
+
+    def _open_read_only(self, rows: int) -> None:
+        if rows < len(self._ids):
+            raise RuntimeError(f"Índice em {self._path} com meta.json à frente de {_VECTORS_FILE}")
+        vectors_path = os.path.join(self._path, _VECTORS_FILE)
+        if rows:
+            self._matrix = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(rows, self._dim))
+        else:
+            self._matrix = np.zeros((0, self._dim), dtype=np.float32)
+        self._allocate_codes(rows)
+        self._capacity = rows
+
+    def reload_if_changed(self) -> bool:
+        """Índice só de leitura: recarrega se outro processo gravou o meta.json. True se recarregou."""
+        if not self._read_only or self._meta_stamp() == self._stamp:
+            return False
+        try:
+            self._load()
+        except Exception as exc:
+            # Escrita em andamento (meta.json novo, vetores ainda não): tenta na próxima consulta
+            logger.warning(f"Índice local em {self._path} não recarregado: {exc}")
+            return False
+        logger.info(f"Índice local em {self._path} recarregado: {len(self._ids)} pontos.")
+        return True
+
+    def _check_not_modified(self) -> None:
+        if self._meta_stamp() != self._stamp:
+            raise RuntimeError(
+                f"{_META_FILE} em {self._path} foi alterado por outro processo desde a abertura; "
+                "reabra o índice antes de gravar."
+            )
+
+    # ==============================
+    # Armazenamento
+    # ==============================
+
+    @property
+    def dim(self) -> int:
+        return self._dim
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def quantization(self) -> str:
+        return self._quantization
+
+    @property
+    def projection(self) -> Optional[EmbeddingProjection]:
+        return self._projection
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Visão (sem cópia) das linhas ocupadas."""
+        return self._matrix[: len(self._ids)]
+
+    @property
+    def search_memory_bytes(self) -> int:
+        """Bytes que a primeira passada precisa manter em RAM para as linhas ocupadas."""
+        count = len(self._ids)
+        if self._quantization == "int8":
+            return count * (self._dim + 4)
+        if self._quantization == "binary":
+            return count * math.ceil(self._dim / 8)
+        return count * self._dim * 4
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self._capacity:
+            return
+        capacity = max(rows, self._capacity * 2)
+        vectors_path = os.path.join(self._path, _VECTORS_FILE)
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        # Crescer o arquivo e remapear: as linhas existentes ficam onde estão
+        with open(vectors_path, "ab") as f:
+            f.truncate(capacity * self._dim * 4)
+        self._matrix = np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self._dim))
+        self._allocate_codes(capacity)
+        self._capacity = capacity
+
+    def _allocate_codes(self, capacity: int) -> None:
+        if self._quantization == "int8":
+            self._codes = self._grow(self._codes, (capacity, self._dim), np.int8)
+            self._scales = self._grow(self._scales, (capacity,), np.float32)
+        elif self._quantization == "binary":
+            self._codes = self._grow(self._codes, (capacity, math.ceil(self._dim / 8)), np.uint8)
+
+    @staticmethod
+    def _grow(array: Optional[np.ndarray], shape: Tuple[int, ...], dtype) -> np.ndarray:
+        grown = np.zeros(shape, dtype=dtype)
+        if array is not None:
+            grown[: len(array)] = array
+        return grown
+
+    def _encode(self, rows, matrix: np.ndarray) -> None:
+        if self._quantization == "int8":
+            self._codes[rows], self._scales[rows] = quantize_int8(matrix)
+        elif self._quantization == "binary":
+            self._codes[rows] = quantize_binary(matrix)
+
+    def upsert(
+        self,
+        ids: Sequence[Any],
+        vectors: Sequence[Sequence[float]],
+        payloads: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+    ) -> None:
+        """Insere ou sobrescreve pontos; ids existentes mantêm a linha."""
+        if self._read_only:
+            raise RuntimeError(f"Índice local em {self._path} aberto só para leitura.")
+        self._check_not_modified()
+        self._dirty = True
+        # Sobrescrever um ponto também muda o corpus, mesmo sem mudar a contagem
+        self._revision = new_corpus_revision()
+        matrix = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), self._dim))
+        payloads = payloads or [None] * len(ids)
+        new_ids = [str(i) for i in ids if str(i) not in self._rows]
+        self._ensure_capacity(len(self._ids) + len(new_ids))
+
+        target_rows = []
+        for point_id, payload in zip((str(i) for i in ids), payloads):
+            row = self._rows.get(point_id)
+            if row is None:
+                row = len(self._ids)
+                self._rows[point_id] = row
+                self._ids.append(point_id)
+                self._payloads.append(payload or {})
+            elif payload is not None:
+                self._payloads[row] = payload
+            target_rows.append(row)
+        target_rows = np.asarray(target_rows, dtype=np.int64)
+        self._payload_index = None
+        self._matrix[target_rows] = matrix
+        self._encode(target_rows, matrix)
+
+    def flush(self) -> None:
+        """Persiste vetores e metadados (só se houve escrita); o meta.json é trocado atomicamente."""
+        if not self._dirty:
+            return
+        self._check_not_modified()
+        self._matrix.flush()
+        meta_path = os.path.join(self._path, _META_FILE)
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            meta = {"dim": self._dim, "ids": self._ids, "payloads": self._payloads, "revision": self._revision}
+            if self._projection is not None:
+                meta["projection"] = self._projection.version
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+        self._stamp = self._meta_stamp()
+        self._dirty = False
+
+    async def close(self) -> None:
+        self.flush()
+
+    # ==============================
+    # Busca
+    # ==============================
+
+    def _block_scores(self, rows, q: np.ndarray, q_code: Optional[np.ndarray]) -> np.ndarray:
+        """Scores da primeira passada para `rows` (slice ou array de linhas)."""
+        if self._quantization == "int8":
+            return (self._codes[rows].astype(np.float32) @ q) * self._scales[rows]
+        if self._quantization == "binary":
+            # Similaridade pela concordância de sinais: dim - 2 * Hamming
+            hamming = _POPCOUNT[np.bitwise_xor(self._codes[rows], q_code)].sum(axis=1, dtype=np.int32)
+            return (self._dim - 2 * hamming).astype(np.float32)
+        return self._matrix[rows] @ q
+
+    def search_vector(
+        self,
+        query: Sequence[float],
+        limit: int,
+        *,
+        exclude_row: Optional[int] = None,
+        rows: Optional[np.ndarray] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Top-k por cosseno: (linha, score) em ordem decrescente.
+        `rows` restringe a busca a um subconjunto de linhas. Com quantização, o
+        score devolvido é o da reordenação em float32.
+        """
+        count = len(self._ids)
+        if count == 0 or limit <= 0:
+            return []
+        q = _normalize(np.asarray(query, dtype=np.float32).reshape(self._dim))
+        q_code = quantize_binary(q) if self._quantization == "binary" else None
+        # Pede um a mais para poder descartar a própria linha
+        k = limit + (1 if exclude_row is not None else 0)
+        quantized = self._quantization != "none"
+        first_k = math.ceil(k * self._oversampling) if quantized else k
+
+        best_rows: List[np.ndarray] = []
+        best_scores: List[np.ndarray] = []
+        total = rows.size if rows is not None else count
+        for start in range(0, total, self._block_size):
+            if rows is None:
+                stop = min(start + self._block_size, count)
+                block_rows = np.arange(start, stop)
+                scores = self._block_scores(slice(start, stop), q, q_code)
+            else:
+                block_rows = rows[start:start + self._block_size]
+                scores = self._block_scores(block_rows, q, q_code)
+            picked = top_k(scores, first_k)
+            best_rows.append(block_rows[picked])
+            best_scores.append(scores[picked])
+
+        all_rows = np.concatenate(best_rows)
+        all_scores = np.concatenate(best_scores)
+        if quantized:
+            # Segunda passada: reordena os candidatos com os vetores originais
+            all_rows = np.sort(all_rows[top_k(all_scores, first_k)])
+            all_scores = self._matrix[all_rows] @ q
+        order = top_k(all_scores, k)
+        hits = [(int(all_rows[i]), float(all_scores[i])) for i in order if all_rows[i] != exclude_row]
+        return hits[:limit]
+
+    def _rows_matching(self, filters: Mapping[str, Any]) -> np.ndarray:
+        """Linhas cujo payload tem exatamente os valores de `filters`."""
+        if self._payload_index is None:
+            self._payload_index = {field: {} for field in PAYLOAD_INDEX_FIELDS}
+            for row, payload in enumerate(self._payloads):
+                for field, by_value in self._payload_index.items():
+                    if field in payload:
+                        by_value.setdefault(payload[field], []).append(row)
+
+        rows: Optional[set] = None
+        for field, value in filters.items():
+            if field in self._payload_index:
+                matched = set(self._payload_index[field].get(value, ()))
+            else:
+                matched = {row for row, payload in enumerate(self._payloads) if payload.get(field) == value}
+            rows = matched if rows is None else rows & matched
+        return np.array(sorted(rows or ()), dtype=np.int64)
+
+    def _search_filtered(self, query: Sequence[float], limit: int, filters: Optional[Mapping[str, Any]]):
+        if not filters:
+            return self.search_vector(query, limit)
+        rows = self._rows_matching(filters)
+        return self.search_vector(query, limit, rows=rows) if rows.size else []
+
+    async def _embed_query(self, text: str) -> List[float]:
+        if self._ai is None:
+            raise RuntimeError("LocalKnowledgeVectorRepository sem AIService para embutir consultas.")
+        vector = (await self._ai.generate_embeddings([text], task_type="retrieval_query"))[0]
+        if vector and self._projection is not None:
+            return self._projection.apply_one(vector)
+        return vector
+
+    async def search_context(
+        self,
+        query: str,
+        limit: int = 3,
+        *,
+        filters: Optional[Mapping[str, Any]] = None,
+    ) -> str:
+        if not query:
+            return ""
+        self.reload_if_changed()
+        try:
+            query_vector = await self._embed_query(query)
+            if not query_vector:
+                return ""
+            hits = self._search_filtered(query_vector, limit, filters)
+        except Exception as exc:
+            logger.error(f"Erro na busca local (Ignorado): {exc}")
+            return ""
+        chunks = [self._payloads[row].get("text", "") for row, _ in hits if "text" in self._payloads[row]]
+        return "\n\n".join(chunks)
+
+    async def search_context_many(
+        self,
+        queries: Sequence[str],
+        limit: int = 3,
+        *,
+        filters: Optional[Mapping[str, Mapping[str, Any]]] = None,
+    ) -> Dict[str, str]:
+        contexts = {query: "" for query in queries}
+        texts = [query for query in contexts if query]
+        if not texts:
+            return contexts
+        self.reload_if_changed()
+        if self._ai is None:
+            logger.error("Erro na busca local em lote (Ignorado): sem AIService para embutir consultas.")
+            return contexts
+        try:
+            vectors = await self._ai.generate_embeddings(texts, task_type="retrieval_query")
+            if self._projection is not None:
+                vectors = [self._projection.apply_one(vector) if vector else vector for vector in vectors]
+        except Exception as exc:
+            logger.error(f"Erro na busca local em lote (Ignorado): {exc}")
+            return contexts
+        for text, vector in zip(texts, vectors):
+            if not vector:
+                continue
+            hits = self._search_filtered(vector, limit, (filters or {}).get(text))
+            contexts[text] = "\n\n".join(
+                self._payloads[row]["text"] for row, _ in hits if "text" in self._payloads[row]
+            )
+        return contexts
+
+    async def find_semantically_related(self, reference_node_id: UUID, *, limit: int = 5) -> List[UUID]:
+        self.reload_if_changed()
+        row = self._rows.get(str(reference_node_id))
+        if row is None:
+            return []
+        hits = self.search_vector(self._matrix[row], limit, exclude_row=row)
+        related = []
+        for hit_row, _ in hits:
+            try:
+                related.append(UUID(self._ids[hit_row]))
+            except ValueError:
+                continue
+        return related
+
+    # ==============================
+    # Vizinhança pré-calculada
+    # ==============================
+
+    def _node_rows(self, node_ids: Iterable[UUID]) -> Dict[str, int]:
+        rows = (str(node_id) for node_id in node_ids)
+        return {point_id: self._rows[point_id] for point_id in sorted(rows) if point_id in self._rows}
+
+    async def get_node_vectors_version(self, node_ids: Iterable[UUID]) -> str:
+        self.reload_if_changed()
+        digest = hashlib.sha256()
+        for point_id, row in self._node_rows(node_ids).items():
+            digest.update(point_id.encode("ascii"))
+            digest.update(np.asarray(self._matrix[row], dtype=np.float32).tobytes())
+        return digest.hexdigest()
+
+    async def get_corpus_version(self) -> str:
+        self.reload_if_changed()
+        projection = self._projection.version if self._projection is not None else ""
+        if self._revision is not None:
+            return hashlib.sha256(f"{projection}\n{self._revision}".encode("utf-8")).hexdigest()
+        if self._corpus_cache is not None and self._corpus_cache[0] == len(self._ids):
+            return self._corpus_cache[1]
+        digest = hashlib.sha256(projection.encode("utf-8"))
+        for point_id in sorted(self._ids):
+            digest.update(point_id.encode("utf-8"))
+        self._corpus_cache = (len(self._ids), digest.hexdigest())
+        return self._corpus_cache[1]
+
+    async def compute_node_neighbors(
+        self,
+        node_ids: Iterable[UUID],
+        *,
+        limit: int = 5,
+    ) -> Dict[UUID, List[Tuple[UUID, float]]]:
+        self.reload_if_changed()
+        node_rows = self._node_rows(node_ids)
+        rows = np.fromiter(node_rows.values(), dtype=np.int64, count=len(node_rows))
+        neighbors: Dict[UUID, List[Tuple[UUID, float]]] = {}
+        for point_id, row in node_rows.items():
+            hits = self.search_vector(self._matrix[row], limit, exclude_row=row, rows=rows)
+            neighbors[UUID(point_id)] = [(UUID(self._ids[r]), score) for r, score in hits]
+        return neighbors
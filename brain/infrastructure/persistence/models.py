@@ -1,9 +1,12 @@
-from sqlalchemy import Column, String, Float, ForeignKey, Table, JSON
+from sqlalchemy import Column, String, Float, ForeignKey, Table, JSON, Index, Sequence, DDL, event
 from sqlalchemy.orm import relationship
 from brain.infrastructure.persistence.database import Base
 import uuid
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Integer, DateTime
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import Integer, DateTime, Text
+
+# JSON nativo: JSONB no Postgres, JSON genérico nos demais (ex: sqlite nos testes)
+JSONType = JSON().with_variant(JSONB(), "postgresql")
 
 # Tabela de associação para dependências (Muitos-para-Muitos)
 node_dependencies = Table(
@@ -11,6 +14,9 @@ node_dependencies = Table(
     Base.metadata,
     Column("parent_id", UUID(as_uuid=True), ForeignKey("knowledge_nodes.id"), primary_key=True),
     Column("child_id", UUID(as_uuid=True), ForeignKey("knowledge_nodes.id"), primary_key=True),
+    # A PK (parent_id, child_id) atende a busca de dependentes; este índice,
+    # a de pré-requisitos (passo recursivo de get_prerequisite_closure)
+    Index("ix_node_dependencies_child_id", "child_id"),
 )
 
 class KnowledgeNodeModel(Base):
@@ -47,6 +53,53 @@ class KnowledgeNodeModel(Base):
     )
 
 
+# -------------------------------
+# Versão do grafo (invalidação do snapshot em cache)
+# -------------------------------
+# Qualquer escrita em knowledge_nodes/node_dependencies (inclusive do worker Go)
+# avança a sequência e publica a nova versão via NOTIFY no commit. Uma sequência,
+# e não uma linha-contador, para que revisões concorrentes não serializem num
+# único lock de linha.
+GRAPH_VERSION_CHANNEL = "graph_version"
+graph_version_seq = Sequence("graph_version_seq", metadata=Base.metadata)
+
+GRAPH_VERSION_FUNCTION_DDL = f"""
+CREATE OR REPLACE FUNCTION bump_graph_version() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{GRAPH_VERSION_CHANNEL}', CAST(nextval('graph_version_seq') AS text));
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+
+def graph_version_trigger_ddl(table: str) -> str:
+    return f"""
+DROP TRIGGER IF EXISTS {table}_graph_version ON {table};
+CREATE TRIGGER {table}_graph_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+FOR EACH STATEMENT EXECUTE FUNCTION bump_graph_version();
+"""
+
+
+GRAPH_VERSION_DDL = [
+    GRAPH_VERSION_FUNCTION_DDL,
+    graph_version_trigger_ddl("knowledge_nodes"),
+    graph_version_trigger_ddl("node_dependencies"),
+]
+
+event.listen(
+    KnowledgeNodeModel.__table__,
+    "after_create",
+    DDL(GRAPH_VERSION_FUNCTION_DDL + graph_version_trigger_ddl("knowledge_nodes")).execute_if(dialect="postgresql"),
+)
+event.listen(
+    node_dependencies,
+    "after_create",
+    DDL(graph_version_trigger_ddl("node_dependencies")).execute_if(dialect="postgresql"),
+)
+
+
 # -------------------------------
 # Modelos mínimos para testes
 # -------------------------------
@@ -80,12 +133,80 @@ class PerformanceEventModel(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     student_id = Column(UUID(as_uuid=True), nullable=False)
     event_type = Column(String, nullable=False)
-    occurred_at = Column(String, nullable=False)
+    # Chave de partição (RANGE mensal) — precisa fazer parte da PK
+    occurred_at = Column(DateTime(timezone=True), primary_key=True, nullable=False)
     topic = Column(String, nullable=True)
     metric = Column(String, nullable=False)
     value = Column(Float, default=0.0)
     baseline = Column(Float, default=0.0)
-    event_metadata = Column(String, nullable=True)
+    event_metadata = Column(JSONType, nullable=True)
+    knowledge_node_id = Column(UUID(as_uuid=True), nullable=True)
+
+    # Índice da consulta quente `get_recent_events`: filtra por aluno e lê
+    # os eventos mais recentes primeiro, sem ordenar o histórico inteiro.
+    # O segundo atende `get_history` (histórico de um nó) da mesma forma.
+    __table_args__ = (
+        Index(
+            "ix_performance_events_student_occurred_at",
+            "student_id",
+            occurred_at.desc(),
+        ),
+        Index(
+            "ix_performance_events_student_node_occurred_at",
+            "student_id",
+            "knowledge_node_id",
+            occurred_at.desc(),
+        ),
+        {"postgresql_partition_by": "RANGE (occurred_at)"},
+    )
+
+
+class StudentTopicStatsModel(Base):
+    """
+    Agregado de performance_events por (aluno, tópico, métrica), mantido na
+    mesma transação que grava os eventos.
+    """
+    __tablename__ = "student_topic_stats"
+
+    student_id = Column(UUID(as_uuid=True), primary_key=True)
+    topic = Column(String, primary_key=True)
+    metric = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    value_sum = Column(Float, nullable=False, default=0.0)
+    value_sum_sq = Column(Float, nullable=False, default=0.0)
+    last_value = Column(Float, nullable=True)
+    last_occurred_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class NodeSemanticNeighborModel(Base):
+    """
+    k vizinhos semânticos de cada nó, pré-calculados a partir do Qdrant.
+    A PK (node_id, rank) atende a leitura do propagador numa busca de índice.
+    """
+    __tablename__ = "node_semantic_neighbors"
+
+    node_id = Column(UUID(as_uuid=True), primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    neighbor_id = Column(UUID(as_uuid=True), nullable=False)
+    score = Column(Float, nullable=False)
+    # Impressão digital dos vetores usados no cálculo
+    vectors_version = Column(String, nullable=False)
+
+
+class NodeContextModel(Base):
+    """
+    Contexto RAG pré-calculado por nó (top-k chunks do corpus), lido na geração
+    de planos sem embedding nem busca vetorial.
+    """
+    __tablename__ = "node_contexts"
+
+    node_id = Column(UUID(as_uuid=True), primary_key=True)
+    # Consulta e assunto usados no cálculo: se o nó mudou, a entrada está velha
+    query = Column(Text, nullable=False)
+    subject = Column(String, nullable=True)
+    context = Column(Text, nullable=False)
+    corpus_version = Column(String, nullable=False)
+    computed_at = Column(DateTime(timezone=True), nullable=False)
 
 
 class StudyPlanModel(Base):
@@ -106,5 +227,23 @@ class ErrorEventModel(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     student_id = Column(UUID(as_uuid=True), nullable=False)
+    knowledge_node_id = Column(UUID(as_uuid=True), ForeignKey("knowledge_nodes.id"), nullable=True)
+    error_type = Column(String, nullable=False)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    severity = Column(Float, nullable=False, default=0.0)
+    # Colunas legadas (texto livre), mantidas para compatibilidade
     subject = Column(String, nullable=True)
     details = Column(String, nullable=True)
+
+    # (aluno, nó) atende o join por matéria de `get_by_student_and_subject`;
+    # o INCLUDE cobre as colunas lidas, permitindo index-only scan no Postgres.
+    # (aluno, occurred_at) atende leituras cronológicas do aluno.
+    __table_args__ = (
+        Index(
+            "ix_error_events_student_node",
+            "student_id",
+            "knowledge_node_id",
+            postgresql_include=["id", "error_type", "occurred_at", "severity"],
+        ),
+        Index("ix_error_events_student_occurred_at", "student_id", occurred_at.desc()),
+    )
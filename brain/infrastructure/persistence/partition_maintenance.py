@@ -0,0 +1,247 @@
+"""
+Particionamento mensal (RANGE em occurred_at) de `performance_events`.
+
+- `convert_to_partitioned`: migra a tabela comum para a versão particionada.
+- `maintain_partitions`: cria as partições dos próximos meses e desanexa
+  (arquivando no schema `archive` ou removendo) as que passaram da retenção.
+
+Todas as funções recebem uma `Connection` síncrona, então servem tanto para
+scripts (`engine.begin()`) quanto para a API (`async_conn.run_sync(...)`).
+"""
+
+import sys
+import os
+import re
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+# Ajusta PYTHONPATH para importar o pacote `brain` quando executado como script
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from brain.config.settings import settings
+from brain.infrastructure.persistence.database import advisory_lock_key
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "performance_events"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+MAINTENANCE_LOCK = f"{PARENT_TABLE}_partition_maintenance"
+ARCHIVE_SCHEMA = "archive"
+_PARTITION_RE = re.compile(rf"^{PARENT_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+# ----------------------
+# Calendário
+# ----------------------
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + (value.month - 1) + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(start: datetime) -> str:
+    return f"{PARENT_TABLE}_y{start.year:04d}m{start.month:02d}"
+
+
+def partition_start(name: str) -> Optional[datetime]:
+    """Inverso de `partition_name`; None para partições fora do padrão (ex: default)."""
+    match = _PARTITION_RE.match(name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+def partitions_to_create(now: datetime, months_ahead: int, oldest: Optional[datetime] = None) -> List[Tuple[str, datetime, datetime]]:
+    """Lista (nome, início, fim) de `oldest` (ou do mês atual) até `months_ahead` meses à frente."""
+    first = month_start(oldest or now)
+    last = add_months(month_start(now), months_ahead)
+    result = []
+    current = first
+    while current <= last:
+        upper = add_months(current, 1)
+        result.append((partition_name(current), current, upper))
+        current = upper
+    return result
+
+
+# ----------------------
+# Catálogo
+# ----------------------
+def is_partitioned(conn: Connection) -> bool:
+    relkind = conn.execute(text(
+        "SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"
+    ), {"table": PARENT_TABLE}).scalar()
+    return relkind == "p"
+
+
+def list_partitions(conn: Connection) -> List[str]:
+    rows = conn.execute(text(
+        """
+        SELECT child.relname FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.oid = to_regclass(:table)
+        """
+    ), {"table": PARENT_TABLE}).scalars().all()
+    return list(rows)
+
+
+# ----------------------
+# DDL
+# ----------------------
+def create_partition(conn: Connection, name: str, lower: datetime, upper: datetime) -> None:
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}');"
+    ))
+
+
+def _range_literal(lower: datetime, upper: datetime) -> str:
+    return f"occurred_at >= '{lower.isoformat()}' AND occurred_at < '{upper.isoformat()}'"
+
+
+def create_partition_moving_default_rows(conn: Connection, name: str, lower: datetime, upper: datetime) -> int:
+    """
+    Cria a partição do mês mesmo que a DEFAULT já tenha linhas na faixa
+    (o CREATE ... PARTITION OF falharia): desanexa a DEFAULT, cria a partição,
+    move as linhas e reanexa. Retorna quantas linhas foram movidas.
+    """
+    in_range = _range_literal(lower, upper)
+    moving = conn.execute(text(f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE {in_range}")).scalar() or 0
+    if not moving:
+        create_partition(conn, name, lower, upper)
+        return 0
+
+    logger.warning(f"{moving} eventos da faixa de {name} estão na partição default; movendo.")
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION};"))
+    create_partition(conn, name, lower, upper)
+    conn.execute(text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {in_range};"))
+    conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range};"))
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT;"))
+    return moving
+
+
+def ensure_partitions(conn: Connection, now: datetime, months_ahead: int) -> List[str]:
+    existing = set(list_partitions(conn))
+    created = []
+    for name, lower, upper in partitions_to_create(now, months_ahead):
+        if name in existing:
+            continue
+        if DEFAULT_PARTITION in existing:
+            create_partition_moving_default_rows(conn, name, lower, upper)
+        else:
+            create_partition(conn, name, lower, upper)
+        created.append(name)
+    # Rede de segurança para timestamps fora de qualquer faixa (ex: relógio errado)
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT;"))
+    return created
+
+
+def retire_old_partitions(conn: Connection, now: datetime, retention_months: int, archive: bool = True) -> List[str]:
+    """
+    Desanexa partições cujo mês inteiro é anterior à janela de retenção.
+    Com `archive=True` a tabela vai para o schema `archive` (consultável à parte);
+    caso contrário é removida.
+    """
+    cutoff = add_months(month_start(now), -retention_months)
+    retired = []
+    for name in list_partitions(conn):
+        start = partition_start(name)
+        if start is None or add_months(start, 1) > cutoff:
+            continue
+        conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name};"))
+        if archive:
+            conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA};"))
+            conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA};"))
+        else:
+            conn.execute(text(f"DROP TABLE {name};"))
+        retired.append(name)
+    return retired
+
+
+def convert_to_partitioned(conn: Connection, now: Optional[datetime] = None) -> bool:
+    """
+    Recria `performance_events` como tabela particionada e copia os dados.
+    Pressupõe occurred_at já em timestamptz (ver backfill_performance_events).
+    Retorna False se a tabela já era particionada.
+    """
+    if is_partitioned(conn):
+        return False
+
+    now = now or datetime.now(timezone.utc)
+    legacy = f"{PARENT_TABLE}_unpartitioned"
+    conn.execute(text(f"LOCK TABLE {PARENT_TABLE} IN ACCESS EXCLUSIVE MODE;"))
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} RENAME TO {legacy};"))
+    conn.execute(text(f"ALTER TABLE {legacy} RENAME CONSTRAINT {PARENT_TABLE}_pkey TO {legacy}_pkey;"))
+    conn.execute(text(f"ALTER INDEX IF EXISTS ix_{PARENT_TABLE}_student_occurred_at RENAME TO ix_{legacy}_student_occurred_at;"))
+
+    # A chave de partição precisa fazer parte da PK
+    conn.execute(text(
+        f"CREATE TABLE {PARENT_TABLE} (LIKE {legacy} INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (occurred_at);"
+    ))
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ADD PRIMARY KEY (id, occurred_at);"))
+    conn.execute(text(
+        f"CREATE INDEX ix_{PARENT_TABLE}_student_occurred_at "
+        f"ON {PARENT_TABLE} (student_id, occurred_at DESC);"
+    ))
+
+    oldest = conn.execute(text(f"SELECT min(occurred_at) FROM {legacy}")).scalar()
+    for name, lower, upper in partitions_to_create(now, settings.PERFORMANCE_PARTITION_MONTHS_AHEAD, oldest):
+        create_partition(conn, name, lower, upper)
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT;"))
+
+    conn.execute(text(f"INSERT INTO {PARENT_TABLE} SELECT * FROM {legacy};"))
+    conn.execute(text(f"DROP TABLE {legacy};"))
+    return True
+
+
+def try_maintenance_lock(conn: Connection) -> bool:
+    """Advisory lock da transação: cada worker da API roda o loop, só um mexe nas partições."""
+    result = conn.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": advisory_lock_key(MAINTENANCE_LOCK)})
+    return bool(result.scalar())
+
+
+def maintain_partitions(conn: Connection, now: Optional[datetime] = None) -> None:
+    """Rotina periódica: garante partições futuras e aposenta as antigas."""
+    if not is_partitioned(conn):
+        logger.warning("performance_events não é particionada; manutenção ignorada.")
+        return
+    if not try_maintenance_lock(conn):
+        logger.info("Manutenção de partições já em andamento em outro processo.")
+        return
+
+    now = now or datetime.now(timezone.utc)
+    created = ensure_partitions(conn, now, settings.PERFORMANCE_PARTITION_MONTHS_AHEAD)
+    retired = retire_old_partitions(
+        conn,
+        now,
+        settings.PERFORMANCE_PARTITION_RETENTION_MONTHS,
+        archive=settings.PERFORMANCE_PARTITION_ARCHIVE,
+    )
+    logger.info(f"Partições criadas: {created or '-'} | aposentadas: {retired or '-'}")
+
+
+async def maintain_partitions_async(async_engine: AsyncEngine) -> None:
+    async with async_engine.begin() as conn:
+        await conn.run_sync(maintain_partitions)
+
+
+if __name__ == '__main__':
+    from brain.infrastructure.persistence.database import engine
+
+    logging.basicConfig(level=logging.INFO)
+    with engine.begin() as conn:
+        if convert_to_partitioned(conn):
+            print("performance_events convertida para tabela particionada.")
+        maintain_partitions(conn)
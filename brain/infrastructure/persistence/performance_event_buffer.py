@@ -0,0 +1,229 @@
+import asyncio
+import json
+import logging
+import os
+from dataclasses import asdict
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from brain.application.ports.repositories import PerformanceRepository
+from brain.domain.entities.performance_event import PerformanceEvent
+from brain.domain.entities.student_topic_stats import StudentTopicStats
+
+logger = logging.getLogger(__name__)
+
+EventSink = Callable[[List[PerformanceEvent]], Awaitable[None]]
+
+_STOP = object()
+
+
+def _json_default(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (UUID, datetime)):
+        return str(value) if isinstance(value, UUID) else value.isoformat()
+    raise TypeError(f"{type(value).__name__} não serializável")
+
+
+def event_to_json(event: PerformanceEvent) -> str:
+    return json.dumps(asdict(event), default=_json_default, ensure_ascii=False)
+
+
+class PerformanceEventBuffer:
+    """
+    Buffer write-behind para PerformanceEvent.
+
+    Os eventos entram numa fila limitada e uma task de fundo os grava em lote
+    (multi-row insert via `sink`) quando o lote enche ou quando o evento mais
+    antigo atinge `max_age_seconds`. Com a fila cheia, `put` bloqueia quem
+    está produzindo (backpressure) em vez de crescer sem limite.
+
+    Eventos ainda não gravados ficam visíveis em `pending_events` (para as
+    leituras do próprio processo); um lote que esgota as tentativas vai para o
+    arquivo JSONL `dead_letter_path`, de onde pode ser reprocessado.
+    """
+
+    def __init__(
+        self,
+        sink: EventSink,
+        *,
+        max_size: int = 10000,
+        batch_size: int = 500,
+        max_age_seconds: float = 1.0,
+        max_retries: int = 3,
+        dead_letter_path: Optional[str] = None,
+    ) -> None:
+        self._sink = sink
+        self._max_size = max_size
+        self._batch_size = batch_size
+        self._max_age_seconds = max_age_seconds
+        self._max_retries = max_retries
+        self._dead_letter_path = dead_letter_path
+        # Enfileirados e ainda não gravados (nem mandados ao dead-letter), por id
+        self._unflushed: Dict[UUID, PerformanceEvent] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        # Métricas simples para observabilidade
+        self.flushed = 0
+        self.dropped = 0
+        self.dead_lettered = 0
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def pending_events(self, student_id: UUID) -> List[PerformanceEvent]:
+        """Eventos do aluno aceitos pelo buffer e ainda não gravados."""
+        return [event for event in self._unflushed.values() if event.student_id == student_id]
+
+    def _ensure_started(self) -> None:
+        # A fila e a task são criadas no loop em execução (primeiro uso)
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self._max_size)
+            self._task = asyncio.create_task(self._run())
+
+    async def put(self, event: PerformanceEvent) -> None:
+        if self._closed:
+            raise RuntimeError("PerformanceEventBuffer já foi encerrado.")
+        self._ensure_started()
+        self._unflushed[event.id] = event
+        await self._queue.put(event)
+
+    async def stop(self) -> None:
+        """Encerramento gracioso: grava tudo o que está na fila e para a task."""
+        self._closed = True
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            if first is _STOP:
+                return
+
+            batch = [first]
+            deadline = loop.time() + self._max_age_seconds
+            stop_requested = False
+            while len(batch) < self._batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stop_requested = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+            if stop_requested:
+                return
+
+    async def _flush(self, batch: List[PerformanceEvent]) -> None:
+        for attempt in range(self._max_retries + 1):
+            try:
+                await self._sink(batch)
+                self.flushed += len(batch)
+                self._forget(batch)
+                return
+            except Exception as e:
+                logger.warning(f"Falha ao gravar lote de {len(batch)} eventos (tentativa {attempt + 1}): {e}")
+                await asyncio.sleep(0.1 * (2 ** attempt))
+
+        self._dead_letter(batch)
+        self._forget(batch)
+
+    def _forget(self, batch: List[PerformanceEvent]) -> None:
+        for event in batch:
+            self._unflushed.pop(event.id, None)
+
+    def _dead_letter(self, batch: List[PerformanceEvent]) -> None:
+        attempts = self._max_retries + 1
+        if self._dead_letter_path:
+            try:
+                directory = os.path.dirname(self._dead_letter_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self._dead_letter_path, "a", encoding="utf-8") as f:
+                    f.writelines(event_to_json(event) + "\n" for event in batch)
+                self.dead_lettered += len(batch)
+                logger.error(
+                    f"Lote de {len(batch)} PerformanceEvent não gravado após {attempts} tentativas; "
+                    f"salvo em {self._dead_letter_path}."
+                )
+                return
+            except OSError as e:
+                logger.error(f"Falha ao salvar o lote no dead-letter {self._dead_letter_path}: {e}")
+
+        self.dropped += len(batch)
+        ids = ", ".join(str(event.id) for event in batch)
+        logger.error(f"Lote de {len(batch)} PerformanceEvent descartado após {attempts} tentativas: {ids}")
+
+
+class BufferedPerformanceRepository(PerformanceRepository):
+    """
+    Decorador do repositório de performance: leituras vão direto ao repositório
+    real; `save` apenas enfileira no buffer write-behind.
+
+    `get_recent_events` e `get_history` completam o resultado com os eventos
+    ainda no buffer, para que quem acabou de gravar leia a própria escrita.
+    """
+
+    def __init__(self, inner: PerformanceRepository, buffer: PerformanceEventBuffer) -> None:
+        self._inner = inner
+        self._buffer = buffer
+
+    def _with_pending(self, stored: List[PerformanceEvent], pending: List[PerformanceEvent]) -> List[PerformanceEvent]:
+        known = {event.id for event in stored}
+        return stored + [event for event in pending if event.id not in known]
+
+    async def get_recent_events(self, student_id: UUID, limit: int = 50) -> List[PerformanceEvent]:
+        events = await self._inner.get_recent_events(student_id, limit=limit)
+        pending = self._buffer.pending_events(student_id)
+        if not pending:
+            return events
+        # Mais recentes primeiro, como no repositório
+        merged = sorted(self._with_pending(events, pending), key=lambda e: e.occurred_at, reverse=True)
+        return merged[:limit]
+
+    async def get_history_for_student(self, student_id: UUID, since: Optional[datetime] = None) -> List[PerformanceEvent]:
+        return await self._inner.get_history_for_student(student_id, since=since)
+
+    def stream_history_for_student(
+        self, student_id: UUID, since: Optional[datetime] = None, batch_size: int = 1000
+    ) -> AsyncIterator[PerformanceEvent]:
+        return self._inner.stream_history_for_student(student_id, since=since, batch_size=batch_size)
+
+    async def get_history_page(
+        self, student_id: UUID, after: Optional[Tuple[datetime, UUID]] = None, limit: int = 500
+    ) -> List[PerformanceEvent]:
+        return await self._inner.get_history_page(student_id, after=after, limit=limit)
+
+    async def get_history(self, student_id: UUID, node_id: UUID, limit: int = 50) -> List[PerformanceEvent]:
+        events = await self._inner.get_history(student_id, node_id, limit=limit)
+        pending = [e for e in self._buffer.pending_events(student_id) if e.knowledge_node_id == node_id]
+        if not pending:
+            return events
+        # Ordem cronológica, com os `limit` mais recentes
+        merged = sorted(self._with_pending(events, pending), key=lambda e: e.occurred_at)
+        return merged[-limit:]
+
+    async def get_topic_stats(self, student_id: UUID) -> List[StudentTopicStats]:
+        return await self._inner.get_topic_stats(student_id)
+
+    async def save(self, event: PerformanceEvent) -> None:
+        await self._buffer.put(event)
+
+    async def save_many(self, events: Iterable[PerformanceEvent]) -> None:
+        for event in events:
+            await self._buffer.put(event)
@@ -1,33 +1,51 @@
 # brain/infrastructure/persistence/postgres_repositories.py
 
-from typing import List, Optional
+from typing import AsyncIterator, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 from sqlalchemy.orm import selectinload
-from sqlalchemy import select
+from sqlalchemy import select, insert, update, delete, bindparam, text, case, or_, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from brain.application.ports import repositories as ports
+from brain.config.settings import settings
 from brain.infrastructure.persistence.models import (
     StudentModel,
     CognitiveProfileModel,
     KnowledgeNodeModel,
     PerformanceEventModel,
+    StudentTopicStatsModel,
+    NodeSemanticNeighborModel,
+    NodeContextModel,
     StudyPlanModel,
-    ErrorEventModel
+    ErrorEventModel,
+    node_dependencies,
 )
 from brain.domain.entities.student import Student, StudentGoal
 from brain.domain.entities.cognitive_profile import CognitiveProfile
 from brain.domain.entities.performance_event import PerformanceEvent, PerformanceEventType, PerformanceMetric
-from brain.domain.entities.error_event import ErrorEvent
+from brain.domain.entities.error_event import ErrorEvent, ErrorType
 from brain.domain.entities.study_plan import StudyPlan
 from brain.domain.entities.knowledge_node import KnowledgeNode
+from brain.domain.entities.student_topic_stats import StudentTopicStats
+from brain.domain.value_objects.dependency_graph import DependencyGraph
+
+
+def _dialect_insert(db: AsyncSession, table):
+    """INSERT com suporte a ON CONFLICT no dialeto da sessão (Postgres ou sqlite)."""
+    dialect = getattr(getattr(db, "bind", None), "dialect", None)
+    if getattr(dialect, "name", None) == "sqlite":
+        return sqlite_insert(table)
+    return pg_insert(table)
 
 
 class PostgresStudentRepository(ports.StudentRepository):
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, read_db: Optional[AsyncSession] = None):
         self.db = db
+        self.read_db = read_db or db
 
     async def get_by_id(self, student_id: UUID) -> Optional[Student]:
         query = (
@@ -35,7 +53,7 @@ class PostgresStudentRepository(ports.StudentRepository):
             .options(selectinload(StudentModel.cognitive_profile))
             .filter(StudentModel.id == student_id)
         )
-        result = await self.db.execute(query)
+        result = await self.read_db.execute(query)
         student_model = result.scalars().first()
         if student_model:
             return Student(
@@ -47,196 +65,373 @@ class PostgresStudentRepository(ports.StudentRepository):
         return None
 
 class PostgresPerformanceRepository(ports.PerformanceRepository):
-    def __init__(self, db: AsyncSession):
+    """
+    Leituras analíticas (eventos recentes, histórico, agregados) usam
+    `read_db` (réplica, quando configurada). `get_history` fica no primário:
+    ele precede a gravação da revisão e precisa ler o que acabou de ser escrito.
+    """
+
+    def __init__(self, db: AsyncSession, read_db: Optional[AsyncSession] = None):
         self.db = db
+        self.read_db = read_db or db
 
-    async def get_recent_events(self, student_id: UUID, limit: int = 50) -> List[PerformanceEvent]:
-        result = await self.db.execute(
+    @staticmethod
+    def _to_entity(model) -> PerformanceEvent:
+        # Aceita tanto instâncias ORM quanto linhas Core (mesmos nomes de atributo)
+        return PerformanceEvent(
+            id=model.id,
+            student_id=model.student_id,
+            event_type=PerformanceEventType(model.event_type),
+            occurred_at=model.occurred_at,
+            topic=model.topic,
+            metric=PerformanceMetric(model.metric),
+            value=model.value,
+            baseline=model.baseline,
+            event_metadata=model.event_metadata or {},
+            knowledge_node_id=model.knowledge_node_id,
+        )
+
+    async def _fetch_events(
+        self, db: AsyncSession, student_id: UUID, *conditions, limit: Optional[int] = None
+    ) -> List[PerformanceEvent]:
+        query = (
             select(PerformanceEventModel)
-            .filter(PerformanceEventModel.student_id == student_id)
+            .filter(PerformanceEventModel.student_id == student_id, *conditions)
             .order_by(PerformanceEventModel.occurred_at.desc())
-            .limit(limit)
         )
-        event_models = result.scalars().all()
-        return [
-            PerformanceEvent(
-                id=model.id,
-                student_id=model.student_id,
-                event_type=PerformanceEventType(model.event_type),
-                occurred_at=model.occurred_at,
-                topic=model.topic,
-                metric=PerformanceMetric(model.metric),
-                value=model.value,
-                baseline=model.baseline,
-                event_metadata=model.event_metadata or {},
+        if limit is not None:
+            query = query.limit(limit)
+        result = await db.execute(query)
+        return [self._to_entity(model) for model in result.scalars().all()]
+
+    async def get_recent_events(self, student_id: UUID, limit: int = 50) -> List[PerformanceEvent]:
+        # Lê primeiro a janela recente: o filtro em occurred_at deixa o planner
+        # podar as partições antigas. Se a janela não completa `limit`, o resto
+        # vem de antes dela (mesmo contrato de "últimos N eventos").
+        window_start = datetime.now(timezone.utc) - timedelta(days=settings.PERFORMANCE_RECENT_WINDOW_DAYS)
+        events = await self._fetch_events(
+            self.read_db,
+            student_id,
+            PerformanceEventModel.occurred_at >= window_start,
+            limit=limit,
+        )
+        if len(events) < limit:
+            events += await self._fetch_events(
+                self.read_db,
+                student_id,
+                PerformanceEventModel.occurred_at < window_start,
+                limit=limit - len(events),
             )
-            for model in event_models
+        return events
+
+    async def get_history_for_student(self, student_id: UUID, since: Optional[datetime] = None) -> List[PerformanceEvent]:
+        conditions = [PerformanceEventModel.occurred_at >= since] if since is not None else []
+        return await self._fetch_events(self.read_db, student_id, *conditions)
+
+    def _chronological_query(self, student_id: UUID, *conditions):
+        # Linhas Core: sem identity map, nada se acumula na sessão durante o stream
+        table = PerformanceEventModel.__table__
+        return (
+            select(table)
+            .where(table.c.student_id == student_id, *conditions)
+            .order_by(table.c.occurred_at, table.c.id)
+        )
+
+    async def stream_history_for_student(
+        self, student_id: UUID, since: Optional[datetime] = None, batch_size: int = 1000
+    ) -> AsyncIterator[PerformanceEvent]:
+        """
+        Cursor do lado do servidor (yield_per): o driver busca `batch_size`
+        linhas por vez e nunca materializa o histórico inteiro.
+        """
+        conditions = [PerformanceEventModel.__table__.c.occurred_at >= since] if since is not None else []
+        query = self._chronological_query(student_id, *conditions).execution_options(yield_per=batch_size)
+        result = await self.read_db.stream(query)
+        try:
+            async for row in result:
+                yield self._to_entity(row)
+        finally:
+            await result.close()
+
+    async def get_history_page(
+        self, student_id: UUID, after: Optional[Tuple[datetime, UUID]] = None, limit: int = 500
+    ) -> List[PerformanceEvent]:
+        table = PerformanceEventModel.__table__
+        # Keyset: (occurred_at, id) > cursor; custo constante em qualquer página
+        conditions = [tuple_(table.c.occurred_at, table.c.id) > tuple_(*after)] if after is not None else []
+        result = await self.read_db.execute(self._chronological_query(student_id, *conditions).limit(limit))
+        return [self._to_entity(row) for row in result.all()]
+
+    async def get_history(self, student_id: UUID, node_id: UUID, limit: int = 50) -> List[PerformanceEvent]:
+        # Varredura direta de ix_performance_events_student_node_occurred_at
+        events = await self._fetch_events(
+            self.db,
+            student_id,
+            PerformanceEventModel.knowledge_node_id == node_id,
+            limit=limit,
+        )
+        events.reverse()
+        return events
+        
+    async def save(self, event: PerformanceEvent) -> None:
+        await self.save_many([event])
+
+    async def save_many(self, events: Iterable[PerformanceEvent]) -> None:
+        """
+        Grava vários eventos num único INSERT multi-row e atualiza o agregado
+        student_topic_stats na mesma transação.
+        """
+        events = list(events)
+        rows = [
+            {
+                "id": event.id,
+                "student_id": event.student_id,
+                "event_type": event.event_type.value,
+                "occurred_at": event.occurred_at,
+                "topic": event.topic,
+                "metric": event.metric.value,
+                "value": event.value,
+                "baseline": event.baseline,
+                "event_metadata": event.event_metadata,
+                "knowledge_node_id": event.knowledge_node_id,
+            }
+            for event in events
         ]
+        if not rows:
+            return
+        await self.db.execute(insert(PerformanceEventModel.__table__).values(rows))
+        await self._apply_topic_stats(events)
 
-    async def get_history_for_student(self, student_id: UUID) -> List[PerformanceEvent]:
-        result = await self.db.execute(
-            select(PerformanceEventModel)
-            .filter(PerformanceEventModel.student_id == student_id)
-            .order_by(PerformanceEventModel.occurred_at.desc())
+    async def _apply_topic_stats(self, events: List[PerformanceEvent]) -> None:
+        """
+        Soma o lote ao agregado student_topic_stats (upsert multi-row), na mesma
+        transação do INSERT dos eventos.
+        """
+        batch = {}
+        for event in events:
+            key = (event.student_id, event.topic or "", event.metric.value)
+            if key not in batch:
+                batch[key] = StudentTopicStats(event.student_id, event.topic or "", event.metric)
+            batch[key].add(event)
+
+        table = StudentTopicStatsModel.__table__
+        # Ordem fixa das chaves: lotes concorrentes travam as linhas na mesma ordem
+        rows = [
+            {
+                "student_id": stats.student_id,
+                "topic": stats.topic,
+                "metric": stats.metric.value,
+                "count": stats.count,
+                "value_sum": stats.value_sum,
+                "value_sum_sq": stats.value_sum_sq,
+                "last_value": stats.last_value,
+                "last_occurred_at": stats.last_occurred_at,
+            }
+            for _, stats in sorted(batch.items(), key=lambda item: (str(item[0][0]), item[0][1], item[0][2]))
+        ]
+        stmt = _dialect_insert(self.db, table).values(rows)
+        excluded = stmt.excluded
+        is_newer = or_(table.c.last_occurred_at.is_(None), excluded.last_occurred_at >= table.c.last_occurred_at)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.student_id, table.c.topic, table.c.metric],
+            set_={
+                "count": table.c.count + excluded.count,
+                "value_sum": table.c.value_sum + excluded.value_sum,
+                "value_sum_sq": table.c.value_sum_sq + excluded.value_sum_sq,
+                "last_value": case((is_newer, excluded.last_value), else_=table.c.last_value),
+                "last_occurred_at": case((is_newer, excluded.last_occurred_at), else_=table.c.last_occurred_at),
+            },
+        )
+        await self.db.execute(stmt)
+
+    async def get_topic_stats(self, student_id: UUID) -> List[StudentTopicStats]:
+        table = StudentTopicStatsModel.__table__
+        result = await self.read_db.execute(
+            select(
+                table.c.student_id,
+                table.c.topic,
+                table.c.metric,
+                table.c.count,
+                table.c.value_sum,
+                table.c.value_sum_sq,
+                table.c.last_value,
+                table.c.last_occurred_at,
+            ).where(table.c.student_id == student_id)
         )
-        event_models = result.scalars().all()
         return [
-            PerformanceEvent(
-                id=model.id,
-                student_id=model.student_id,
-                event_type=PerformanceEventType(model.event_type),
-                occurred_at=model.occurred_at,
-                topic=model.topic,
-                metric=PerformanceMetric(model.metric),
-                value=model.value,
-                baseline=model.baseline,
-                event_metadata=model.event_metadata or {},
+            StudentTopicStats(
+                student_id=row.student_id,
+                topic=row.topic,
+                metric=PerformanceMetric(row.metric),
+                count=row.count,
+                value_sum=row.value_sum,
+                value_sum_sq=row.value_sum_sq,
+                last_value=row.last_value,
+                last_occurred_at=row.last_occurred_at,
             )
-            for model in event_models
+            for row in result.all()
         ]
 
-    async def get_history(self, student_id: UUID, node_id: UUID) -> List[PerformanceEvent]:
-        # Placeholder implementation
-        return []
-        
-    async def save(self, event: PerformanceEvent) -> None:
-        model = PerformanceEventModel(
-            id=event.id,
-            student_id=event.student_id,
-            event_type=event.event_type.value,
-            occurred_at=event.occurred_at,
-            topic=event.topic,
-            metric=event.metric.value,
-            value=event.value,
-            baseline=event.baseline,
-            event_metadata=event.event_metadata,
-        )
-        self.db.add(model)
-        await self.db.flush()
+
+# Colunas projetadas nas leituras de nós, na MESMA ordem dos campos
+# posicionais de KnowledgeNode: cada linha vira `KnowledgeNode(*row)`.
+_NODE_FIELDS = (
+    "id",
+    "name",
+    "subject",
+    "weight_in_exam",
+    "stability",
+    "difficulty",
+    "reps",
+    "lapses",
+    "weight",
+    "last_reviewed_at",
+    "next_review_at",
+)
+_NODE_COLUMNS = tuple(KnowledgeNodeModel.__table__.c[name] for name in _NODE_FIELDS)
 
 
 class PostgresKnowledgeRepository(ports.KnowledgeRepository):
-    def __init__(self, db: AsyncSession):
+    """
+    Leituras usam selects Core com colunas projetadas: as linhas (tuplas)
+    viram KnowledgeNode direto, sem instâncias ORM nem identity map.
+
+    Leituras do grafo inteiro vão para `read_db` (réplica, quando configurada);
+    buscas de um nó (por nome/id) ficam no primário, pois precedem um update.
+    """
+
+    def __init__(self, db: AsyncSession, read_db: Optional[AsyncSession] = None):
         self.db = db
+        self.read_db = read_db or db
+
+    async def _fetch_nodes(self, *conditions) -> List[KnowledgeNode]:
+        result = await self.read_db.execute(select(*_NODE_COLUMNS).where(*conditions))
+        return [KnowledgeNode(*row) for row in result.all()]
+
+    async def _fetch_node(self, *conditions) -> Optional[KnowledgeNode]:
+        result = await self.db.execute(select(*_NODE_COLUMNS).where(*conditions).limit(1))
+        row = result.first()
+        return KnowledgeNode(*row) if row else None
 
     async def get_full_graph(self) -> List[KnowledgeNode]:
-        result = await self.db.execute(select(KnowledgeNodeModel))
-        node_models = result.scalars().all()
-        return [
-            KnowledgeNode(
-                id=model.id,
-                name=model.name,
-                subject=model.subject,
-                weight_in_exam=model.weight_in_exam,
-                weight=model.weight,
-                stability=model.stability,
-                difficulty=model.difficulty,
-                reps=model.reps,
-                lapses=model.lapses,
-                last_reviewed_at=model.last_reviewed_at,
-                next_review_at=model.next_review_at,
-            )
-            for model in node_models
-        ]
+        return await self._fetch_nodes()
+
+    async def get_dependency_graph(self) -> DependencyGraph:
+        # Só os pares de UUID: sem relationship lazy (N+1) nem entidades ORM
+        result = await self.read_db.execute(select(node_dependencies.c.parent_id, node_dependencies.c.child_id))
+        return DependencyGraph.from_edges(result.all())
+
+    async def _closure(self, node_ids: Iterable[UUID], towards: str) -> Set[UUID]:
+        """
+        Fecho transitivo numa única consulta WITH RECURSIVE. `towards` é a coluna
+        alcançada a cada passo ("parent_id": pré-requisitos, "child_id": dependentes).
+        UNION (sem ALL) descarta repetidos, o que também encerra ciclos.
+        """
+        seeds = list(node_ids)
+        if not seeds:
+            return set()
+        edges = node_dependencies
+        source = edges.c.child_id if towards == "parent_id" else edges.c.parent_id
+        target = edges.c[towards]
+
+        closure = select(target.label("node_id")).where(source.in_(seeds)).cte("closure", recursive=True)
+        step = edges.alias("step")
+        step_source = step.c.child_id if towards == "parent_id" else step.c.parent_id
+        closure = closure.union(
+            select(step.c[towards]).join(closure, step_source == closure.c.node_id)
+        )
+        result = await self.read_db.execute(select(closure.c.node_id))
+        return set(result.scalars().all())
+
+    async def get_prerequisite_closure(self, node_ids: Iterable[UUID]) -> Set[UUID]:
+        return await self._closure(node_ids, "parent_id")
+
+    async def get_dependent_closure(self, node_ids: Iterable[UUID]) -> Set[UUID]:
+        return await self._closure(node_ids, "child_id")
 
     async def get_overdue_nodes(self, current_time: datetime) -> List[KnowledgeNode]:
-        result = await self.db.execute(select(KnowledgeNodeModel).filter(KnowledgeNodeModel.next_review_at <= current_time))
-        node_models = result.scalars().all()
-        return [
-            KnowledgeNode(
-                id=model.id,
-                name=model.name,
-                subject=model.subject,
-                weight_in_exam=model.weight_in_exam,
-                weight=model.weight,
-                stability=model.stability,
-                difficulty=model.difficulty,
-                reps=model.reps,
-                lapses=model.lapses,
-                last_reviewed_at=model.last_reviewed_at,
-                next_review_at=model.next_review_at,
-            )
-            for model in node_models
-        ]
+        return await self._fetch_nodes(KnowledgeNodeModel.next_review_at <= current_time)
 
     async def get_node_by_name(self, name: str) -> Optional[KnowledgeNode]:
-        result = await self.db.execute(select(KnowledgeNodeModel).filter(KnowledgeNodeModel.name == name))
-        model = result.scalars().first()
-        if model:
-            return KnowledgeNode(
-                id=model.id,
-                name=model.name,
-                subject=model.subject,
-                weight_in_exam=model.weight_in_exam,
-                weight=model.weight,
-                stability=model.stability,
-                difficulty=model.difficulty,
-                reps=model.reps,
-                lapses=model.lapses,
-                last_reviewed_at=model.last_reviewed_at,
-                next_review_at=model.next_review_at,
-            )
-        return None
+        return await self._fetch_node(KnowledgeNodeModel.name == name)
 
     async def get_by_id(self, node_id: UUID) -> Optional[KnowledgeNode]:
-        result = await self.db.execute(select(KnowledgeNodeModel).filter(KnowledgeNodeModel.id == node_id))
-        model = result.scalars().first()
-        if model:
-            return KnowledgeNode(
-                id=model.id,
-                name=model.name,
-                subject=model.subject,
-                weight_in_exam=model.weight_in_exam,
-                weight=model.weight,
-                stability=model.stability,
-                difficulty=model.difficulty,
-                reps=model.reps,
-                lapses=model.lapses,
-                last_reviewed_at=model.last_reviewed_at,
-                next_review_at=model.next_review_at,
-            )
-        return None
-    
+        return await self._fetch_node(KnowledgeNodeModel.id == node_id)
+
+    async def get_graph_version(self) -> int:
+        """
+        Versão atual do grafo (avançada por trigger a cada escrita em
+        knowledge_nodes/node_dependencies). 0 em bancos sem a sequência.
+        """
+        if getattr(getattr(getattr(self.db, "bind", None), "dialect", None), "name", None) != "postgresql":
+            return 0
+        result = await self.db.execute(text(
+            "SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM graph_version_seq"
+        ))
+        return int(result.scalar() or 0)
+
+    # Campos de estado do nó que revisões/propagação alteram
+    _STATE_COLUMNS = (
+        "stability",
+        "difficulty",
+        "reps",
+        "lapses",
+        "last_reviewed_at",
+        "next_review_at",
+        "weight",
+    )
+
+    def _insert(self):
+        return _dialect_insert(self.db, KnowledgeNodeModel.__table__)
+
+    async def update_many(self, nodes: Iterable[KnowledgeNode]) -> None:
+        """
+        Atualiza o estado de nós existentes num único UPDATE (executemany),
+        sem SELECT prévio nem passagem pelo identity map.
+        """
+        params = [
+            {"node_id": node.id, **{col: getattr(node, col) for col in self._STATE_COLUMNS}}
+            for node in nodes
+        ]
+        if not params:
+            return
+        table = KnowledgeNodeModel.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("node_id"))
+            .values({col: bindparam(col) for col in self._STATE_COLUMNS})
+        )
+        await self.db.execute(stmt, params)
+
+    async def save_many(self, nodes: Iterable[KnowledgeNode]) -> None:
+        """
+        Upsert em lote: um INSERT multi-row com ON CONFLICT (id) DO UPDATE
+        que só sobrescreve os campos de estado.
+        """
+        rows = [
+            {
+                "id": node.id,
+                "name": node.name,
+                "subject": node.subject,
+                "weight_in_exam": node.weight_in_exam,
+                **{col: getattr(node, col) for col in self._STATE_COLUMNS},
+            }
+            for node in nodes
+        ]
+        if not rows:
+            return
+        stmt = self._insert().values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[KnowledgeNodeModel.__table__.c.id],
+            set_={col: stmt.excluded[col] for col in self._STATE_COLUMNS},
+        )
+        await self.db.execute(stmt)
+
     async def update(self, node: KnowledgeNode) -> None:
-        result = await self.db.execute(select(KnowledgeNodeModel).filter(KnowledgeNodeModel.id == node.id))
-        model = result.scalars().first()
-        if model:
-            model.stability = node.stability
-            model.difficulty = node.difficulty
-            model.reps = node.reps
-            model.lapses = node.lapses
-            model.last_reviewed_at = node.last_reviewed_at
-            model.next_review_at = node.next_review_at
-            model.weight = node.weight
-            await self.db.flush()
+        await self.update_many([node])
 
     async def save(self, node: KnowledgeNode) -> None:
-        # This is an upsert
-        result = await self.db.execute(select(KnowledgeNodeModel).filter(KnowledgeNodeModel.id == node.id))
-        model = result.scalars().first()
-        if model:
-            model.stability = node.stability
-            model.difficulty = node.difficulty
-            model.reps = node.reps
-            model.lapses = node.lapses
-            model.last_reviewed_at = node.last_reviewed_at
-            model.next_review_at = node.next_review_at
-            model.weight = node.weight
-        else:
-            model = KnowledgeNodeModel(
-                id=node.id,
-                name=node.name,
-                subject=node.subject,
-                weight_in_exam=node.weight_in_exam,
-                stability=node.stability,
-                difficulty=node.difficulty,
-                reps=node.reps,
-                lapses=node.lapses,
-                last_reviewed_at=node.last_reviewed_at,
-                next_review_at=node.next_review_at,
-            )
-            self.db.add(model)
-        await self.db.flush()
+        await self.save_many([node])
 
 
 class PostgresStudyPlanRepository(ports.StudyPlanRepository):
@@ -259,11 +454,12 @@ class PostgresStudyPlanRepository(ports.StudyPlanRepository):
         await self.db.flush()
 
 class PostgresCognitiveProfileRepository(ports.CognitiveProfileRepository):
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, read_db: Optional[AsyncSession] = None):
         self.db = db
+        self.read_db = read_db or db
 
     async def get_by_student_id(self, student_id: UUID) -> Optional[CognitiveProfile]:
-        result = await self.db.execute(select(CognitiveProfileModel).filter(CognitiveProfileModel.student_id == student_id))
+        result = await self.read_db.execute(select(CognitiveProfileModel).filter(CognitiveProfileModel.student_id == student_id))
         model = result.scalars().first()
         if model:
             return CognitiveProfile(
@@ -296,43 +492,142 @@ class PostgresCognitiveProfileRepository(ports.CognitiveProfileRepository):
             model.error_patterns = profile.error_patterns
         await self.db.flush()
 
+
+_ERROR_TABLE = ErrorEventModel.__table__
+_ERROR_COLUMNS = tuple(
+    _ERROR_TABLE.c[name]
+    for name in ("id", "student_id", "knowledge_node_id", "error_type", "occurred_at", "severity")
+)
+
+
 class PostgresErrorEventRepository(ports.ErrorEventRepository):
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    @staticmethod
+    def _to_entity(row) -> ErrorEvent:
+        return ErrorEvent(
+            id=row.id,
+            student_id=row.student_id,
+            knowledge_node_id=row.knowledge_node_id,
+            error_type=ErrorType(row.error_type),
+            occurred_at=row.occurred_at,
+            severity=row.severity,
+        )
+
+    async def _fetch_errors(self, query) -> List[ErrorEvent]:
+        result = await self.db.execute(query.order_by(_ERROR_TABLE.c.occurred_at))
+        return [self._to_entity(row) for row in result.all()]
+
     async def get_by_student_id(self, student_id: UUID) -> List[ErrorEvent]:
-        result = await self.db.execute(select(ErrorEventModel).filter(ErrorEventModel.student_id == student_id))
-        error_models = result.scalars().all()
-        return [
-            ErrorEvent(
-                id=model.id,
-                student_id=model.student_id,
-                knowledge_node_id=model.knowledge_node_id,
-                error_type=model.error_type,
-                occurred_at=model.occurred_at,
-                severity=model.severity,
-            )
-            for model in error_models
-        ]
+        return await self._fetch_errors(
+            select(*_ERROR_COLUMNS).where(_ERROR_TABLE.c.student_id == student_id)
+        )
 
     async def get_by_student_and_subject(self, student_id: UUID, subject: str) -> List[ErrorEvent]:
-        result = await self.db.execute(
-            select(ErrorEventModel)
-            .join(KnowledgeNodeModel, ErrorEventModel.knowledge_node_id == KnowledgeNodeModel.id)
-            .filter(
-                ErrorEventModel.student_id == student_id,
-                KnowledgeNodeModel.subject == subject,
-            )
+        # Um join indexado: ix_error_events_student_node (coberto) x PK de knowledge_nodes
+        nodes = KnowledgeNodeModel.__table__
+        return await self._fetch_errors(
+            select(*_ERROR_COLUMNS)
+            .join(nodes, _ERROR_TABLE.c.knowledge_node_id == nodes.c.id)
+            .where(_ERROR_TABLE.c.student_id == student_id, nodes.c.subject == subject)
         )
-        error_models = result.scalars().all()
-        return [
-            ErrorEvent(
-                id=model.id,
-                student_id=model.student_id,
-                knowledge_node_id=model.knowledge_node_id,
-                error_type=model.error_type,
-                occurred_at=model.occurred_at,
-                severity=model.severity,
+
+    async def save(self, error: ErrorEvent) -> None:
+        await self.save_many([error])
+
+    async def save_many(self, errors: Iterable[ErrorEvent]) -> None:
+        rows = [
+            {
+                "id": error.id,
+                "student_id": error.student_id,
+                "knowledge_node_id": error.knowledge_node_id,
+                "error_type": ErrorType(error.error_type).value,
+                "occurred_at": error.occurred_at,
+                "severity": error.severity,
+            }
+            for error in errors
+        ]
+        if not rows:
+            return
+        await self.db.execute(insert(_ERROR_TABLE).values(rows))
+
+
+class PostgresSemanticNeighborRepository(ports.SemanticNeighborRepository):
+    _TABLE = NodeSemanticNeighborModel.__table__
+
+    def __init__(self, db: AsyncSession, read_db: Optional[AsyncSession] = None):
+        self.db = db
+        self.read_db = read_db or db
+
+    async def get_version(self) -> Optional[str]:
+        result = await self.read_db.execute(select(self._TABLE.c.vectors_version).limit(1))
+        return result.scalar_one_or_none()
+
+    async def get_neighbor_ids(self, node_id: UUID, limit: int = 5) -> List[UUID]:
+        # Varredura da PK (node_id, rank): já sai em ordem de score
+        table = self._TABLE
+        result = await self.read_db.execute(
+            select(table.c.neighbor_id).where(table.c.node_id == node_id).order_by(table.c.rank).limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def replace_all(self, version: str, neighbors: Mapping[UUID, Sequence[Tuple[UUID, float]]]) -> None:
+        rows = [
+            {"node_id": node_id, "rank": rank, "neighbor_id": neighbor_id, "score": score, "vectors_version": version}
+            for node_id, scored in neighbors.items()
+            for rank, (neighbor_id, score) in enumerate(scored)
+        ]
+        await self.db.execute(delete(self._TABLE))
+        if rows:
+            # executemany: o driver agrupa em INSERTs multi-row sem estourar o limite de parâmetros
+            await self.db.execute(insert(self._TABLE), rows)
+
+
+class PostgresNodeContextRepository(ports.NodeContextRepository):
+    _TABLE = NodeContextModel.__table__
+
+    def __init__(self, db: AsyncSession, read_db: Optional[AsyncSession] = None):
+        self.db = db
+        self.read_db = read_db or db
+
+    async def get_version(self) -> Optional[str]:
+        result = await self.read_db.execute(select(self._TABLE.c.corpus_version).limit(1))
+        return result.scalar_one_or_none()
+
+    async def get_contexts(self, node_ids: Iterable[UUID]) -> Dict[UUID, ports.NodeContext]:
+        ids = list(node_ids)
+        if not ids:
+            return {}
+        table = self._TABLE
+        result = await self.read_db.execute(
+            select(table.c.node_id, table.c.query, table.c.subject, table.c.context, table.c.corpus_version)
+            .where(table.c.node_id.in_(ids))
+        )
+        return {
+            row.node_id: ports.NodeContext(
+                node_id=row.node_id,
+                query=row.query,
+                subject=row.subject,
+                context=row.context,
+                corpus_version=row.corpus_version,
             )
-            for model in error_models
+            for row in result
+        }
+
+    async def replace_all(self, version: str, contexts: Iterable[ports.NodeContext]) -> None:
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "node_id": entry.node_id,
+                "query": entry.query,
+                "subject": entry.subject,
+                "context": entry.context,
+                "corpus_version": version,
+                "computed_at": now,
+            }
+            for entry in contexts
         ]
+        await self.db.execute(delete(self._TABLE))
+        if rows:
+            await self.db.execute(insert(self._TABLE), rows)
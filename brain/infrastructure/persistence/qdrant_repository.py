@@ -1,23 +1,112 @@
-import os
-import logging
 import asyncio
-from typing import List, Optional, Any
+import hashlib
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
 from uuid import UUID
 
 import google.generativeai as genai
-# MUDANÇA: Usamos o cliente síncrono que é mais compatível e estável
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance
+import httpx
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    FieldCondition,
+    Filter,
+    HasIdCondition,
+    MatchValue,
+    PayloadSchemaType,
+    QuantizationSearchParams,
+    QueryRequest,
+    RecommendInput,
+    RecommendQuery,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+)
 
 from brain.application.ports.repositories import KnowledgeVectorRepository
 from brain.config.settings import settings
+from brain.infrastructure.llm.gemini_embeddings import embed_texts
+from brain.infrastructure.persistence.embedding_cache import EmbeddingCache, pack_vector
+from brain.infrastructure.persistence.embedding_projection import EmbeddingProjection, load_projection
+from brain.infrastructure.persistence.rag_ingestion import CORPUS_REVISION_METADATA_KEY, PAYLOAD_INDEX_FIELDS
 
 logger = logging.getLogger(__name__)
 
+QUERY_EMBEDDING_MODEL = settings.EMBEDDING_MODEL
+QUERY_EMBEDDING_TASK = "retrieval_query"
+# Chave dos metadados da coleção com o modelo que gerou os vetores
+EMBEDDING_MODEL_METADATA_KEY = "embedding_model"
+# ... e com a versão da projeção aplicada a eles (ausente: dimensão original)
+PROJECTION_METADATA_KEY = "embedding_projection"
+
+
+def quantization_config(mode: str) -> Optional[Union[ScalarQuantization, BinaryQuantization]]:
+    """
+    `quantization_config` da coleção para o modo ("none", "int8", "binary").
+    Os códigos ficam sempre em RAM; os vetores originais podem ir para disco
+    (`VectorParams(on_disk=True)`), pois só são lidos na reordenação.
+    """
+    if mode == "int8":
+        return ScalarQuantization(scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True))
+    if mode == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    if mode != "none":
+        raise ValueError(f"Quantização desconhecida: {mode!r}")
+    return None
+
+
+def quantized_search_params(mode: str, oversampling: float) -> Optional[SearchParams]:
+    """Primeira passada nos códigos e reordenação dos candidatos com os vetores originais."""
+    if mode == "none":
+        return None
+    return SearchParams(quantization=QuantizationSearchParams(rescore=True, oversampling=oversampling))
+
+
+def payload_filter(filters: Optional[Mapping[str, Any]]) -> Optional[Filter]:
+    """{campo: valor} -> Filter com igualdade exata em cada campo (AND)."""
+    if not filters:
+        return None
+    return Filter(must=[FieldCondition(key=key, match=MatchValue(value=value)) for key, value in filters.items()])
+
+
+async def ensure_payload_indexes(client: AsyncQdrantClient, collection_name: str) -> None:
+    """
+    Índices keyword nos campos de partição do payload: com eles a busca
+    filtrada percorre só os pontos do assunto em vez da coleção inteira.
+    Criar um índice que já existe não tem efeito.
+    """
+    for field_name in PAYLOAD_INDEX_FIELDS:
+        await client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=PayloadSchemaType.KEYWORD,
+            wait=True,
+        )
+
+
+async def resolve_alias(client: AsyncQdrantClient, alias: str) -> Optional[str]:
+    """Coleção por trás do alias; o próprio nome se for uma coleção legada; None se não existir."""
+    for description in (await client.get_aliases()).aliases:
+        if description.alias_name == alias:
+            return description.collection_name
+    return alias if await client.collection_exists(alias) else None
+
+
 class QdrantKnowledgeVectorRepository(KnowledgeVectorRepository):
     """
-    Adaptador de infraestrutura para Qdrant usando cliente Síncrono (Thread-Safe).
-    Isso resolve erros de compatibilidade de versão do AsyncClient.
+    Adaptador de infraestrutura para Qdrant sobre `AsyncQdrantClient`.
+
+    Feito para viver o processo inteiro (ver `get_knowledge_vector_repository`):
+    o cliente mantém um pool de conexões keep-alive (HTTP ou gRPC) reaproveitado
+    por todas as requisições, e `close()` o encerra no shutdown.
+
+    `collection_name` normalmente é um alias. O modelo das consultas e a
+    projeção de dimensionalidade são lidos dos metadados da coleção por trás
+    dele (a cada `model_refresh_seconds`; artefatos em `projection_dir`), então
+    a troca do alias por uma re-embedding também troca os dois nas consultas.
     """
 
     def __init__(
@@ -25,72 +114,189 @@ class QdrantKnowledgeVectorRepository(KnowledgeVectorRepository):
         *,
         url: str,
         api_key: Optional[str] = None,
-        collection_name: str = "athena_knowledge",
-        timeout: float = 10.0,
+        collection_name: str = settings.QDRANT_COLLECTION,
+        timeout: int = 10,
+        prefer_grpc: bool = False,
+        grpc_port: int = 6334,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry_seconds: float = 30.0,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        quantization: str = "none",
+        oversampling: float = 4.0,
+        embedding_model: Optional[str] = None,
+        model_refresh_seconds: float = 60.0,
+        projection_dir: str = settings.EMBEDDING_PROJECTION_DIR,
+        corpus_version_refresh_seconds: float = 60.0,
     ) -> None:
         self._collection = collection_name
-        # MUDANÇA: Instanciando cliente síncrono
-        self._client = QdrantClient(
+        self._embedding_cache = embedding_cache
+        self._default_model = embedding_model or QUERY_EMBEDDING_MODEL
+        self._query_model_name = self._default_model
+        self._model_refresh_seconds = model_refresh_seconds
+        self._model_checked_at: Optional[float] = None
+        self._projection_dir = projection_dir
+        self._projection: Optional[EmbeddingProjection] = None
+        # Coleções legadas, sem revisão: (coleção, modelo, projeção, pontos) -> versão do scroll de ids
+        self._corpus_stamp: Optional[Tuple[Any, ...]] = None
+        self._corpus_version: Optional[str] = None
+        # Cópia da versão para as requisições, atualizada fora delas
+        self._corpus_refresh_seconds = corpus_version_refresh_seconds
+        self._corpus_checked_at: Optional[float] = None
+        self._corpus_refresh_task: Optional[asyncio.Task] = None
+        # Extras das consultas: vazio quando a coleção não é quantizada
+        params = quantized_search_params(quantization, oversampling)
+        self._query_options: Dict[str, Any] = {"search_params": params} if params is not None else {}
+        client_options: Dict[str, Any] = {
+            # Pool HTTP (REST): conexões abertas ficam vivas entre as buscas
+            "limits": httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry_seconds,
+            ),
+        }
+        if prefer_grpc:
+            # Canal gRPC único e multiplexado; keepalive evita reconexões ociosas
+            client_options["grpc_options"] = {
+                "grpc.keepalive_time_ms": int(keepalive_expiry_seconds * 1000),
+                "grpc.keepalive_permit_without_calls": 1,
+            }
+        self._client = AsyncQdrantClient(
             url=url,
             api_key=api_key,
             timeout=timeout,
+            prefer_grpc=prefer_grpc,
+            grpc_port=grpc_port,
+            **client_options,
         )
 
         if settings.GEMINI_API_KEY:
             genai.configure(api_key=settings.GEMINI_API_KEY)
-        
-        logger.info(f"QdrantRepo (Sync) initialized at {url}")
 
-    async def _generate_query_embedding(self, text: str) -> List[float]:
+        logger.info(f"QdrantRepo (Async) initialized at {url}")
+
+    async def close(self) -> None:
+        """Fecha o pool de conexões (chamado no shutdown da aplicação)."""
+        if self._corpus_refresh_task is not None and not self._corpus_refresh_task.done():
+            self._corpus_refresh_task.cancel()
+        await self._client.close()
+
+    async def _query_settings(self) -> Tuple[str, Optional[EmbeddingProjection]]:
+        """Modelo e projeção da coleção atrás do alias (metadados), com cache por TTL."""
+        now = time.monotonic()
+        if self._model_checked_at is not None and now - self._model_checked_at < self._model_refresh_seconds:
+            return self._query_model_name, self._projection
+        self._model_checked_at = now
+        try:
+            info = await self._client.get_collection(self._collection)
+            metadata = info.config.metadata or {}
+        except Exception as e:
+            logger.warning(f"Não foi possível ler o modelo da coleção '{self._collection}': {e}")
+            return self._query_model_name, self._projection
+        model = metadata.get(EMBEDDING_MODEL_METADATA_KEY) or self._default_model
+        if model != self._query_model_name:
+            logger.info(f"Coleção '{self._collection}' agora usa o modelo de embedding {model}.")
+            self._query_model_name = model
+        version = metadata.get(PROJECTION_METADATA_KEY)
+        current = self._projection.version if self._projection is not None else None
+        if version != current:
+            try:
+                self._projection = load_projection(self._projection_dir, version) if version else None
+                logger.info(f"Coleção '{self._collection}' agora usa a projeção {version or 'nenhuma'}.")
+            except Exception as e:
+                logger.error(f"Projeção {version} da coleção '{self._collection}' indisponível: {e}")
+        return model, self._projection
+
+    async def _generate_query_embedding(self, text: str, model: Optional[str] = None) -> List[float]:
+        model = model or self._default_model
+        cache = self._embedding_cache
+        if cache is not None:
+            cached = cache.get(model, QUERY_EMBEDDING_TASK, text)
+            if cached is not None:
+                return cached
         try:
-            # Usa thread para não bloquear o loop principal
-            result = await asyncio.to_thread(
-                genai.embed_content,
-                model="models/text-embedding-004",
+            result = await genai.embed_content_async(
+                model=model,
                 content=text,
-                task_type="retrieval_query"
+                task_type=QUERY_EMBEDDING_TASK
             )
-            return result['embedding']
         except Exception as e:
             logger.error(f"Erro ao gerar embedding: {e}")
             return []
+        embedding = result['embedding']
+        if cache is not None and embedding:
+            embedding = cache.put(model, QUERY_EMBEDDING_TASK, text, embedding)
+        return embedding
+
+    async def _generate_query_embeddings(self, texts: Sequence[str], model: Optional[str] = None) -> Dict[str, List[float]]:
+        """Embeddings de várias consultas: o que não está no cache vai num único lote."""
+        model = model or self._default_model
+        cache = self._embedding_cache
+        embeddings: Dict[str, List[float]] = {}
+        missing = []
+        for text in texts:
+            cached = cache.get(model, QUERY_EMBEDDING_TASK, text) if cache is not None else None
+            if cached is not None:
+                embeddings[text] = cached
+            else:
+                missing.append(text)
+        if not missing:
+            return embeddings
+        try:
+            vectors = await embed_texts(missing, model=model, task_type=QUERY_EMBEDDING_TASK)
+        except Exception as e:
+            logger.error(f"Erro ao gerar embeddings em lote: {e}")
+            return embeddings
+        for text, vector in zip(missing, vectors):
+            if not vector:
+                continue
+            if cache is not None:
+                vector = cache.put(model, QUERY_EMBEDDING_TASK, text, vector)
+            embeddings[text] = vector
+        return embeddings
 
-    async def search_context(self, query: str, limit: int = 3) -> str:
+    async def search_context(
+        self,
+        query: str,
+        limit: int = 3,
+        *,
+        filters: Optional[Mapping[str, Any]] = None,
+    ) -> str:
         """
-        Busca contexto semântico usando execução síncrona em thread.
+        Busca contexto semântico para o texto de consulta, opcionalmente só
+        entre os pontos cujo payload casa com `filters`.
         """
         if not query:
             return ""
 
         try:
             # 1. Gera embedding
-            query_vector = await self._generate_query_embedding(query)
+            model, projection = await self._query_settings()
+            query_vector = await self._generate_query_embedding(query, model)
             if not query_vector:
                 return ""
+            if projection is not None:
+                query_vector = projection.apply_one(query_vector)
 
-            # 2. Define função de busca síncrona
-            # ATUALIZADO: Uso de query_points para compatibilidade com qdrant-client >= 1.10
-            def _do_search():
-                response = self._client.query_points(
-                    collection_name=self._collection,
-                    query=query_vector,
-                    limit=limit,
-                )
-                return response.points  # Retorna a lista de hits dentro do objeto de resposta
-
-            # 3. Executa em thread separada (Isola o erro de AsyncClient)
-            results = await asyncio.to_thread(_do_search)
+            # 2. Busca no pool compartilhado (query_points: qdrant-client >= 1.10)
+            response = await self._client.query_points(
+                collection_name=self._collection,
+                query=query_vector,
+                query_filter=payload_filter(filters),
+                limit=limit,
+                **self._query_options,
+            )
 
             context_chunks = [
                 hit.payload.get("text", "")
-                for hit in results
+                for hit in response.points
                 if hit.payload and "text" in hit.payload
             ]
-            
+
             found_text = "\n\n".join(context_chunks)
             if found_text:
                 logger.info(f"RAG: Encontrado contexto para '{query}' ({len(found_text)} chars)")
-            
+
             return found_text
 
         except Exception as exc:
@@ -98,27 +304,71 @@ class QdrantKnowledgeVectorRepository(KnowledgeVectorRepository):
             logger.error(f"Erro Qdrant search (Ignorado): {exc}")
             return ""
 
+    async def search_context_many(
+        self,
+        queries: Sequence[str],
+        limit: int = 3,
+        *,
+        filters: Optional[Mapping[str, Mapping[str, Any]]] = None,
+    ) -> Dict[str, str]:
+        """
+        Contexto de várias consultas (ex.: todos os nós de um plano) com um lote
+        de embeddings e um único `query_batch_points`.
+        """
+        contexts = {query: "" for query in queries}
+        texts = [query for query in contexts if query]
+        if not texts:
+            return contexts
+
+        try:
+            model, projection = await self._query_settings()
+            vectors = await self._generate_query_embeddings(texts, model)
+            texts = [text for text in texts if text in vectors]
+            if not texts:
+                return contexts
+            if projection is not None:
+                projected = projection.apply([vectors[text] for text in texts])
+                vectors = {text: vector.tolist() for text, vector in zip(texts, projected)}
+            responses = await self._client.query_batch_points(
+                collection_name=self._collection,
+                requests=[
+                    QueryRequest(
+                        query=vectors[text],
+                        filter=payload_filter((filters or {}).get(text)),
+                        limit=limit,
+                        with_payload=True,
+                        params=self._query_options.get("search_params"),
+                    )
+                    for text in texts
+                ],
+            )
+        except Exception as exc:
+            # Mesmo contrato do search_context: sem contexto em vez de erro
+            logger.error(f"Erro Qdrant search em lote (Ignorado): {exc}")
+            return contexts
+
+        for text, response in zip(texts, responses):
+            contexts[text] = "\n\n".join(
+                hit.payload.get("text", "")
+                for hit in response.points
+                if hit.payload and "text" in hit.payload
+            )
+        logger.info(f"RAG: contexto em lote para {len(texts)} consultas ({sum(map(bool, contexts.values()))} com resultado)")
+        return contexts
+
     async def find_semantically_related(self, reference_node_id: UUID, *, limit: int = 5) -> List[UUID]:
         try:
-            # Alguns ambientes de teste injetam um cliente async (AsyncMock).
-            # Chamamos await para compatibilidade com ambos os casos.
-            recommend_coro = self._client.recommend(
+            response = await self._client.query_points(
                 collection_name=self._collection,
-                positive=[str(reference_node_id)],
+                query=RecommendQuery(recommend=RecommendInput(positive=[str(reference_node_id)])),
                 limit=limit,
                 with_payload=False,
                 with_vectors=False,
+                **self._query_options,
             )
 
-            if asyncio.iscoroutine(recommend_coro):
-                response = await recommend_coro
-            else:
-                # Cliente síncrono retornou diretamente
-                response = recommend_coro
-
-            # response é uma lista de ScoredPoint-like
             ids = []
-            for p in response:
+            for p in response.points:
                 try:
                     ids.append(UUID(str(p.id)))
                 except Exception:
@@ -133,4 +383,135 @@ class QdrantKnowledgeVectorRepository(KnowledgeVectorRepository):
                 logger.warning("Qdrant respondeu de forma inesperada ao recomendar similaridade.")
             except Exception:
                 pass
-            return []
\ No newline at end of file
+            return []
+
+    # ==============================
+    # Vizinhança pré-calculada (job em lote)
+    # ==============================
+
+    async def _node_vectors(self, node_ids: Iterable[UUID], batch_size: int = 256) -> Dict[str, List[float]]:
+        """Vetores dos pontos cujo id é um nó; nós sem ponto no Qdrant ficam de fora."""
+        ids = sorted(str(node_id) for node_id in node_ids)
+        vectors: Dict[str, List[float]] = {}
+        for start in range(0, len(ids), batch_size):
+            records = await self._client.retrieve(
+                collection_name=self._collection,
+                ids=ids[start:start + batch_size],
+                with_payload=False,
+                with_vectors=True,
+            )
+            for record in records:
+                if isinstance(record.vector, list):
+                    vectors[str(record.id)] = record.vector
+        return vectors
+
+    @staticmethod
+    def _fingerprint(vectors: Dict[str, List[float]]) -> str:
+        digest = hashlib.sha256()
+        for point_id in sorted(vectors):
+            digest.update(point_id.encode("ascii"))
+            digest.update(pack_vector(vectors[point_id]))
+        return digest.hexdigest()
+
+    async def get_node_vectors_version(self, node_ids: Iterable[UUID]) -> str:
+        return self._fingerprint(await self._node_vectors(node_ids))
+
+    async def get_corpus_version(self, batch_size: int = 1000) -> str:
+        """
+        Hash da coleção física atrás do alias, do modelo, da projeção e da
+        revisão do corpus gravada nos metadados por quem escreve
+        (`stamp_corpus_revision`): duas chamadas leves, sem contagem nem scroll.
+        Coleções legadas, sem revisão, caem no hash dos ids (só refeito quando
+        a contagem muda).
+        """
+        collection = await resolve_alias(self._client, self._collection) or self._collection
+        metadata = (await self._client.get_collection(collection)).config.metadata or {}
+        projection = metadata.get(PROJECTION_METADATA_KEY)
+        stamp = (collection, metadata.get(EMBEDDING_MODEL_METADATA_KEY) or self._default_model, projection)
+        revision = metadata.get(CORPUS_REVISION_METADATA_KEY)
+        if revision is not None:
+            version = hashlib.sha256("\n".join(str(part or "") for part in (*stamp, revision)).encode("utf-8"))
+            self._corpus_version = version.hexdigest()
+        else:
+            self._corpus_version = await self._legacy_corpus_version(stamp, batch_size)
+        self._corpus_checked_at = time.monotonic()
+        return self._corpus_version
+
+    async def _legacy_corpus_version(self, stamp: Tuple[Any, ...], batch_size: int) -> str:
+        collection = stamp[0]
+        count = (await self._client.count(collection, exact=True)).count
+        if (*stamp, count) == self._corpus_stamp and self._corpus_version is not None:
+            return self._corpus_version
+
+        # Só ids (sem payload/vetores): os ids dos chunks já são o hash do conteúdo
+        point_ids: List[str] = []
+        offset = None
+        while True:
+            records, offset = await self._client.scroll(
+                collection_name=collection,
+                limit=batch_size,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False,
+            )
+            point_ids.extend(str(record.id) for record in records)
+            if offset is None:
+                break
+        digest = hashlib.sha256("\n".join(str(part or "") for part in stamp).encode("utf-8"))
+        for point_id in sorted(point_ids):
+            digest.update(point_id.encode("ascii"))
+        self._corpus_stamp = (*stamp, count)
+        return digest.hexdigest()
+
+    async def _refresh_corpus_version(self) -> None:
+        try:
+            await self.get_corpus_version()
+        except Exception as e:
+            logger.warning(f"Versão do corpus de '{self._collection}' não atualizada: {e}")
+            self._corpus_checked_at = time.monotonic()
+
+    async def get_cached_corpus_version(self) -> Optional[str]:
+        """
+        Última versão conhecida, sem chamada ao Qdrant: vencido o intervalo,
+        dispara a atualização em segundo plano e devolve a cópia atual (None
+        até a primeira atualização terminar).
+        """
+        checked_at = self._corpus_checked_at
+        stale = checked_at is None or time.monotonic() - checked_at >= self._corpus_refresh_seconds
+        if stale and (self._corpus_refresh_task is None or self._corpus_refresh_task.done()):
+            self._corpus_refresh_task = asyncio.create_task(self._refresh_corpus_version())
+        return self._corpus_version
+
+    async def compute_node_neighbors(
+        self,
+        node_ids: Iterable[UUID],
+        *,
+        limit: int = 5,
+        batch_size: int = 64,
+    ) -> Dict[UUID, List[Tuple[UUID, float]]]:
+        vectors = await self._node_vectors(node_ids)
+        if not vectors:
+            return {}
+        # Vizinhos restritos a pontos que são nós (a coleção também guarda chunks de RAG)
+        only_nodes = Filter(must=[HasIdCondition(has_id=list(vectors))])
+        point_ids = list(vectors)
+        neighbors: Dict[UUID, List[Tuple[UUID, float]]] = {}
+        for start in range(0, len(point_ids), batch_size):
+            batch = point_ids[start:start + batch_size]
+            responses = await self._client.query_batch_points(
+                collection_name=self._collection,
+                requests=[
+                    QueryRequest(
+                        query=vectors[point_id],
+                        filter=only_nodes,
+                        limit=limit + 1,
+                        with_payload=False,
+                        params=self._query_options.get("search_params"),
+                    )
+                    for point_id in batch
+                ],
+            )
+            for point_id, response in zip(batch, responses):
+                scored = [(UUID(str(p.id)), p.score) for p in response.points if str(p.id) != point_id]
+                neighbors[UUID(point_id)] = scored[:limit]
+        return neighbors
@@ -0,0 +1,379 @@
+"""
+Pipeline de ingestão do RAG em streaming e retomável.
+
+Estágios:
+1. leitura + chunking: os documentos chegam por um iterável (assíncrono ou
+   não) e são fatiados em chunks com sobreposição;
+2. hash + dedupe: cada chunk é identificado pelo sha256 do texto com o seu
+   subject/goal; chunks já gravados (checkpoint) ou ainda em voo neste run são
+   pulados. A memória do dedupe é limitada aos lotes em voo: o resto é
+   consultado no checkpoint;
+3. embedding em lote: `AIService.generate_embeddings` por lote, com no máximo
+   `concurrency` lotes em voo e limite de requisições por minuto (com
+   `projection`, os vetores são reduzidos antes de gravar);
+4. upsert em lote no Qdrant (ou no índice local); só depois disso o lote entra no checkpoint.
+
+O id do ponto é derivado do hash (uuid5), então reprocessar um chunk apenas
+sobrescreve o mesmo ponto. Uma falha perde no máximo os lotes em voo.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterable, Dict, Iterable, List, Optional, Protocol, Sequence, Set, Union
+from uuid import NAMESPACE_URL, uuid4, uuid5
+
+from brain.application.ports.ai_service import AIService
+from brain.infrastructure.persistence.embedding_projection import EmbeddingProjection
+
+logger = logging.getLogger(__name__)
+
+# Campos do payload usados em filtros de busca (índices keyword no Qdrant)
+PAYLOAD_INDEX_FIELDS = ("topic", "subject", "goal")
+# Chave dos metadados da coleção com a revisão do conteúdo, trocada a cada escrita
+CORPUS_REVISION_METADATA_KEY = "corpus_revision"
+
+
+def new_corpus_revision() -> str:
+    return uuid4().hex
+
+
+async def stamp_corpus_revision(client, collection_name: str) -> str:
+    """
+    Grava uma revisão nova nos metadados da coleção. Quem escreve carimba;
+    quem lê compara só a revisão (uma leitura de metadados) para saber se o
+    corpus mudou, inclusive quando a contagem de pontos continua a mesma.
+    """
+    revision = new_corpus_revision()
+    metadata = dict((await client.get_collection(collection_name)).config.metadata or {})
+    metadata[CORPUS_REVISION_METADATA_KEY] = revision
+    await client.update_collection(collection_name=collection_name, metadata=metadata)
+    return revision
+
+
+@dataclass(frozen=True)
+class RagDocument:
+    topic: str
+    text: str
+    source: str = "seed_script"
+    subject: Optional[str] = None
+    goal: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class RagChunk:
+    topic: str
+    text: str
+    source: str
+    chunk_index: int
+    content_hash: str
+    subject: Optional[str] = None
+    goal: Optional[str] = None
+
+    @property
+    def point_id(self) -> str:
+        return str(uuid5(NAMESPACE_URL, f"athena-chunk:{self.content_hash}"))
+
+    def payload(self) -> Dict[str, object]:
+        payload = {
+            "topic": self.topic,
+            "text": self.text,
+            "source": self.source,
+            "chunk_index": self.chunk_index,
+            "content_hash": self.content_hash,
+        }
+        # Só grava os campos de partição conhecidos (payload sem chave não casa com o filtro)
+        if self.subject:
+            payload["subject"] = self.subject
+        if self.goal:
+            payload["goal"] = self.goal
+        return payload
+
+
+def content_hash(text: str, subject: Optional[str] = None, goal: Optional[str] = None) -> str:
+    # Espaços normalizados: a mesma passagem com quebras diferentes é o mesmo chunk.
+    # subject/goal entram no hash (são filtros de busca): o mesmo texto em outra
+    # partição é outro ponto. Sem eles, o hash é o do texto puro, como antes.
+    key = " ".join(text.split())
+    if subject:
+        key += f"\x00subject={subject}"
+    if goal:
+        key += f"\x00goal={goal}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def chunk_text(text: str, max_chars: int = 1500, overlap_chars: int = 200) -> List[str]:
+    """Janelas de até `max_chars` cortadas em fronteira de palavra, com sobreposição."""
+    words = text.split()
+    chunks: List[str] = []
+    start = 0
+    while start < len(words):
+        size, end = 0, start
+        while end < len(words) and (end == start or size + 1 + len(words[end]) <= max_chars):
+            size += len(words[end]) + (1 if end > start else 0)
+            end += 1
+        chunks.append(" ".join(words[start:end]))
+        if end >= len(words):
+            break
+        # Volta algumas palavras para manter contexto entre chunks vizinhos
+        back, kept = end, 0
+        while back > start + 1 and kept + len(words[back - 1]) + 1 <= overlap_chars:
+            back -= 1
+            kept += len(words[back]) + 1
+        start = back
+    return chunks
+
+
+def chunk_document(document: RagDocument, max_chars: int = 1500, overlap_chars: int = 200) -> List[RagChunk]:
+    return [
+        RagChunk(
+            topic=document.topic,
+            text=text,
+            source=document.source,
+            chunk_index=i,
+            content_hash=content_hash(text, document.subject, document.goal),
+            subject=document.subject,
+            goal=document.goal,
+        )
+        for i, text in enumerate(chunk_text(document.text, max_chars, overlap_chars))
+    ]
+
+
+class ChunkSink(Protocol):
+    async def upsert(self, chunks: Sequence[RagChunk], vectors: Sequence[Sequence[float]]) -> None:
+        ...
+
+
+class QdrantChunkSink:
+    """Grava cada lote num único upsert do `AsyncQdrantClient`."""
+
+    def __init__(self, client, collection_name: str) -> None:
+        self._client = client
+        self._collection = collection_name
+
+    async def upsert(self, chunks: Sequence[RagChunk], vectors: Sequence[Sequence[float]]) -> None:
+        from qdrant_client.models import PointStruct
+
+        await self._client.upsert(
+            collection_name=self._collection,
+            points=[
+                PointStruct(id=chunk.point_id, vector=list(vector), payload=chunk.payload())
+                for chunk, vector in zip(chunks, vectors)
+            ],
+            wait=True,
+        )
+        await stamp_corpus_revision(self._client, self._collection)
+
+
+class LocalIndexChunkSink:
+    """Grava no índice NumPy local; os vetores vão para disco antes do checkpoint."""
+
+    def __init__(self, index) -> None:
+        self._index = index
+
+    async def upsert(self, chunks: Sequence[RagChunk], vectors: Sequence[Sequence[float]]) -> None:
+        self._index.upsert([chunk.point_id for chunk in chunks], vectors, [chunk.payload() for chunk in chunks])
+        self._index.flush()
+
+
+class IngestionCheckpoint:
+    """Hashes já gravados por coleção, num SQLite local (sobrevive a falhas e reinícios)."""
+
+    def __init__(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ingested_chunks ("
+            "collection TEXT NOT NULL, content_hash TEXT NOT NULL, ingested_at REAL NOT NULL, "
+            "PRIMARY KEY (collection, content_hash))"
+        )
+
+    def is_done(self, collection: str, digest: str) -> bool:
+        return self._conn.execute(
+            "SELECT 1 FROM ingested_chunks WHERE collection = ? AND content_hash = ?", (collection, digest)
+        ).fetchone() is not None
+
+    def mark_done(self, collection: str, digests: Iterable[str]) -> None:
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO ingested_chunks (collection, content_hash, ingested_at) VALUES (?, ?, ?)",
+            [(collection, digest, now) for digest in digests],
+        )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class RateLimiter:
+    """Espaça o início das requisições em 60/requests_per_minute segundos."""
+
+    def __init__(self, requests_per_minute: Optional[float]) -> None:
+        self._interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self._interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_at - now
+            self._next_at = max(now, self._next_at) + self._interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+@dataclass
+class IngestionStats:
+    documents: int = 0
+    chunks: int = 0
+    duplicates: int = 0
+    already_ingested: int = 0
+    embedded: int = 0
+    failed: int = 0
+    batches: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def docs_per_second(self) -> float:
+        elapsed = self.elapsed_seconds
+        return self.documents / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        elapsed = self.elapsed_seconds
+        return self.embedded / elapsed if elapsed > 0 else 0.0
+
+
+class RagIngestionPipeline:
+    def __init__(
+        self,
+        ai_service: AIService,
+        sink: ChunkSink,
+        checkpoint: IngestionCheckpoint,
+        *,
+        collection_name: str,
+        batch_size: int = 100,
+        concurrency: int = 4,
+        requests_per_minute: Optional[float] = None,
+        max_chars: int = 1500,
+        overlap_chars: int = 200,
+        log_every_batches: int = 10,
+        projection: Optional[EmbeddingProjection] = None,
+    ) -> None:
+        self._ai = ai_service
+        self._sink = sink
+        self._checkpoint = checkpoint
+        self._collection = collection_name
+        self._batch_size = batch_size
+        self._concurrency = concurrency
+        self._rate_limiter = RateLimiter(requests_per_minute)
+        self._max_chars = max_chars
+        self._overlap_chars = overlap_chars
+        self._log_every_batches = log_every_batches
+        self._projection = projection
+
+    async def _documents(self, documents: Union[Iterable[RagDocument], AsyncIterable[RagDocument]]):
+        if hasattr(documents, "__aiter__"):
+            async for document in documents:
+                yield document
+        else:
+            for document in documents:
+                yield document
+
+    async def _process_batch(self, batch: List[RagChunk], stats: IngestionStats) -> None:
+        await self._rate_limiter.wait()
+        vectors = await self._ai.generate_embeddings([chunk.text for chunk in batch])
+
+        ready = [(chunk, vector) for chunk, vector in zip(batch, vectors) if vector]
+        stats.failed += len(batch) - len(ready)
+        if ready:
+            chunks, good_vectors = zip(*ready)
+            if self._projection is not None:
+                good_vectors = self._projection.apply(good_vectors).tolist()
+            await self._sink.upsert(chunks, good_vectors)
+            # Checkpoint só depois do upsert confirmado
+            self._checkpoint.mark_done(self._collection, (chunk.content_hash for chunk in chunks))
+            stats.embedded += len(chunks)
+
+        stats.batches += 1
+        if stats.batches % self._log_every_batches == 0:
+            logger.info(
+                f"RAG ingest: {stats.documents} docs, {stats.embedded} chunks "
+                f"({stats.docs_per_second:.1f} docs/s, {stats.chunks_per_second:.1f} chunks/s)"
+            )
+
+    async def run(self, documents: Union[Iterable[RagDocument], AsyncIterable[RagDocument]]) -> IngestionStats:
+        stats = IngestionStats()
+        # Hashes enfileirados/em voo, ainda fora do checkpoint: no máximo
+        # `batch_size * (concurrency + 1)` entradas, não o corpus inteiro
+        pending: Set[str] = set()
+        in_flight: Set[asyncio.Task] = set()
+        slots = asyncio.Semaphore(self._concurrency)
+        batch: List[RagChunk] = []
+
+        async def launch(chunks: List[RagChunk]) -> None:
+            # Backpressure: a leitura para enquanto `concurrency` lotes estão em voo
+            await slots.acquire()
+            task = asyncio.create_task(self._process_batch(chunks, stats))
+
+            def done(_t: asyncio.Task) -> None:
+                slots.release()
+                # Gravados já estão no checkpoint; os que falharam podem voltar
+                pending.difference_update(chunk.content_hash for chunk in chunks)
+
+            task.add_done_callback(done)
+            in_flight.add(task)
+
+        def reap() -> None:
+            # Propaga a falha de um lote concluído e interrompe a leitura
+            for task in [t for t in in_flight if t.done()]:
+                in_flight.discard(task)
+                task.result()
+
+        try:
+            async for document in self._documents(documents):
+                stats.documents += 1
+                for chunk in chunk_document(document, self._max_chars, self._overlap_chars):
+                    stats.chunks += 1
+                    if chunk.content_hash in pending:
+                        stats.duplicates += 1
+                        continue
+                    if self._checkpoint.is_done(self._collection, chunk.content_hash):
+                        stats.already_ingested += 1
+                        continue
+                    pending.add(chunk.content_hash)
+                    batch.append(chunk)
+                    if len(batch) >= self._batch_size:
+                        await launch(batch)
+                        batch = []
+                reap()
+            if batch:
+                await launch(batch)
+            await asyncio.gather(*in_flight)
+        except BaseException:
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            raise
+        finally:
+            stats.finished_at = time.monotonic()
+
+        logger.info(
+            f"RAG ingest concluído: {stats.documents} docs, {stats.embedded} chunks gravados, "
+            f"{stats.already_ingested} já existentes, {stats.duplicates} duplicados, {stats.failed} falhas "
+            f"em {stats.elapsed_seconds:.1f}s ({stats.docs_per_second:.1f} docs/s)"
+        )
+        return stats
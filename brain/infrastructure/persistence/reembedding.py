@@ -0,0 +1,353 @@
+"""
+Re-embedding do corpus sem downtime, com coleções versionadas atrás de um alias.
+
+As buscas usam sempre o alias (`QDRANT_COLLECTION`). Para trocar o modelo de
+embedding:
+
+1. cria a coleção `<alias>_<timestamp>` com o modelo nos metadados e os
+   mesmos índices de payload;
+2. percorre a coleção atual por `scroll` (só payload), re-embute o texto de
+   cada ponto em lote e faz upsert com o mesmo id e payload, com lotes
+   espaçados para não competir com o tráfego ao vivo (rodar de novo com o
+   mesmo `target` retoma, pulando ids já copiados);
+3. se a coleção atual cresceu durante a cópia, faz passadas de recuperação
+   (a mesma cópia, pulando os ids já gravados) até a contagem estabilizar;
+4. verifica a contagem de pontos e o recall de uma amostra (cada texto
+   amostrado, embutido como consulta, precisa achar o próprio ponto no top-k);
+5. troca o alias numa única operação atômica, copia o que entrou na coleção
+   antiga entre a última passada e a troca, e marca a coleção antiga como
+   aposentada; `drop_retired_collections` a remove depois do período de graça.
+
+Se o alias ainda for o nome de uma coleção legada (anterior aos aliases), a
+primeira troca precisa apagá-la antes de criar o alias: há uma janela curta
+sem coleção e nenhuma versão antiga para rollback, por isso exige
+`replace_legacy_collection=True`.
+
+Com `projection`, a coleção nova guarda os vetores reduzidos e a versão da
+projeção nos metadados; o repositório passa a projetar as consultas na troca.
+
+Enquanto a migração roda, as ingestões escrevem pelo alias na coleção
+antiga, com o modelo antigo: as passadas de recuperação as re-embutem na nova
+a partir do payload. Pontos atualizados (mesmo id) ou apagados na antiga
+durante a cópia não são propagados; a verificação de contagem pega remoções,
+mas para uma troca exata pause a ingestão até o fim.
+"""
+
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Distance,
+    PointStruct,
+    VectorParams,
+)
+
+from brain.infrastructure.persistence.embedding_projection import EmbeddingProjection
+from brain.infrastructure.persistence.qdrant_repository import (
+    EMBEDDING_MODEL_METADATA_KEY,
+    PROJECTION_METADATA_KEY,
+    ensure_payload_indexes,
+    quantization_config,
+    resolve_alias,
+)
+from brain.infrastructure.persistence.rag_ingestion import (
+    CORPUS_REVISION_METADATA_KEY,
+    RateLimiter,
+    new_corpus_revision,
+    stamp_corpus_revision,
+)
+
+logger = logging.getLogger(__name__)
+
+RETIRED_AT_METADATA_KEY = "retired_at"
+
+# (textos, task_type) -> vetores, na mesma ordem
+EmbedFn = Callable[[Sequence[str], str], Awaitable[List[List[float]]]]
+
+
+def versioned_collection_name(alias: str, now: Optional[datetime] = None) -> str:
+    return f"{alias}_{(now or datetime.now(timezone.utc)):%Y%m%d%H%M%S}"
+
+
+def point_text(payload: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Texto que gerou o vetor: chunks têm `text`; pontos de nó, `name`."""
+    if not payload:
+        return None
+    text = payload.get("text") or payload.get("name")
+    return text if isinstance(text, str) and text.strip() else None
+
+
+async def create_model_collection(
+    client: AsyncQdrantClient,
+    name: str,
+    *,
+    model: str,
+    dim: int,
+    quantization: str = "none",
+    projection: Optional[EmbeddingProjection] = None,
+) -> None:
+    metadata = {EMBEDDING_MODEL_METADATA_KEY: model, CORPUS_REVISION_METADATA_KEY: new_corpus_revision()}
+    if projection is not None:
+        metadata[PROJECTION_METADATA_KEY] = projection.version
+    await client.create_collection(
+        collection_name=name,
+        vectors_config=VectorParams(size=dim, distance=Distance.COSINE, on_disk=quantization != "none"),
+        quantization_config=quantization_config(quantization),
+        metadata=metadata,
+    )
+    await ensure_payload_indexes(client, name)
+
+
+async def flip_alias(
+    client: AsyncQdrantClient,
+    alias: str,
+    target: str,
+    *,
+    replace_legacy_collection: bool = False,
+) -> Optional[str]:
+    """Aponta o alias para `target` numa única operação; retorna a coleção anterior."""
+    previous = await resolve_alias(client, alias)
+    if previous == target:
+        return None
+    operations: List[Any] = []
+    if previous == alias:
+        if not replace_legacy_collection:
+            raise RuntimeError(
+                f"'{alias}' é uma coleção, não um alias: a troca exige replace_legacy_collection=True."
+            )
+        logger.warning(f"Apagando a coleção legada '{alias}' para criar o alias.")
+        await client.delete_collection(alias)
+        previous = None
+    elif previous is not None:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+    operations.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=target, alias_name=alias)))
+    await client.update_collection_aliases(change_aliases_operations=operations)
+
+    if previous is not None:
+        metadata = dict((await client.get_collection(previous)).config.metadata or {})
+        metadata[RETIRED_AT_METADATA_KEY] = time.time()
+        await client.update_collection(collection_name=previous, metadata=metadata)
+    logger.info(f"Alias '{alias}' -> '{target}' (antes: {previous}).")
+    return previous
+
+
+async def drop_retired_collections(client: AsyncQdrantClient, alias: str, grace_seconds: float) -> List[str]:
+    """Remove coleções `<alias>_*` aposentadas há mais de `grace_seconds` (nunca a atual)."""
+    current = await resolve_alias(client, alias)
+    dropped = []
+    for collection in (await client.get_collections()).collections:
+        name = collection.name
+        if not name.startswith(f"{alias}_") or name == current:
+            continue
+        retired_at = ((await client.get_collection(name)).config.metadata or {}).get(RETIRED_AT_METADATA_KEY)
+        if retired_at is not None and time.time() - float(retired_at) >= grace_seconds:
+            await client.delete_collection(name)
+            dropped.append(name)
+            logger.info(f"Coleção aposentada '{name}' removida.")
+    return dropped
+
+
+@dataclass
+class ReembeddingReport:
+    source: Optional[str]
+    target: str
+    model: str
+    source_points: int = 0
+    copied: int = 0
+    already_copied: int = 0
+    caught_up: int = 0
+    skipped: int = 0
+    target_points: int = 0
+    sample_recall: Optional[float] = None
+    flipped: bool = False
+    retired: Optional[str] = None
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def verified(self) -> bool:
+        return not self.errors
+
+
+class ReembeddingPipeline:
+    def __init__(
+        self,
+        client: AsyncQdrantClient,
+        embed: EmbedFn,
+        *,
+        alias: str,
+        model: str,
+        batch_size: int = 100,
+        batches_per_minute: Optional[float] = None,
+        quantization: str = "none",
+        sample_size: int = 50,
+        recall_k: int = 5,
+        min_recall: float = 0.9,
+        default_dim: int = 768,
+        projection: Optional[EmbeddingProjection] = None,
+        catch_up_passes: int = 3,
+    ) -> None:
+        self._client = client
+        self._embed = embed
+        self._alias = alias
+        self._model = model
+        self._batch_size = batch_size
+        self._throttle = RateLimiter(batches_per_minute)
+        self._quantization = quantization
+        self._sample_size = sample_size
+        self._recall_k = recall_k
+        self._min_recall = min_recall
+        self._default_dim = projection.dim if projection is not None else default_dim
+        self._projection = projection
+        self._catch_up_passes = catch_up_passes
+
+    async def _ensure_target(self, target: str, dim: int) -> None:
+        if not await self._client.collection_exists(target):
+            await create_model_collection(
+                self._client,
+                target,
+                model=self._model,
+                dim=dim,
+                quantization=self._quantization,
+                projection=self._projection,
+            )
+            logger.info(f"Coleção '{target}' criada ({self._model}, dim {dim}).")
+
+    async def _embed_projected(self, texts: Sequence[str], task_type: str) -> List[List[float]]:
+        vectors = await self._embed(texts, task_type)
+        if self._projection is None:
+            return vectors
+        return [self._projection.apply_one(vector) if vector else vector for vector in vectors]
+
+    async def _copy(self, source: str, target: str, report: ReembeddingReport) -> None:
+        offset = None
+        while True:
+            records, offset = await self._client.scroll(
+                collection_name=source,
+                limit=self._batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False,
+            )
+            report.source_points += len(records)
+            pending = [record for record in records if point_text(record.payload)]
+            report.skipped += len(records) - len(pending)
+
+            if pending and await self._client.collection_exists(target):
+                # Retomada: ids já gravados num run anterior não são re-embutidos
+                done = {
+                    str(r.id)
+                    for r in await self._client.retrieve(
+                        target, ids=[r.id for r in pending], with_payload=False, with_vectors=False
+                    )
+                }
+                report.already_copied += len(done)
+                pending = [r for r in pending if str(r.id) not in done]
+
+            if pending:
+                await self._throttle.wait()
+                vectors = await self._embed_projected([point_text(r.payload) for r in pending], "retrieval_document")
+                ready = [(r, v) for r, v in zip(pending, vectors) if v]
+                report.skipped += len(pending) - len(ready)
+                if ready:
+                    await self._ensure_target(target, len(ready[0][1]))
+                    await self._client.upsert(
+                        target,
+                        points=[PointStruct(id=r.id, vector=list(v), payload=r.payload) for r, v in ready],
+                        wait=True,
+                    )
+                    report.copied += len(ready)
+            if offset is None:
+                break
+
+    async def _catch_up(self, source: str, target: str, report: ReembeddingReport) -> bool:
+        """Copia o que entrou em `source` depois da última passada; True se copiou algo."""
+        current = (await self._client.count(source, exact=True)).count
+        if current == report.source_points:
+            return False
+        logger.info(f"'{source}' mudou durante a cópia ({report.source_points} -> {current} pontos); recuperando.")
+        # Nova passada completa: a contagem e os pulados passam a refletir a fonte atual
+        catch_up = ReembeddingReport(source=source, target=target, model=self._model)
+        await self._copy(source, target, catch_up)
+        report.source_points = catch_up.source_points
+        report.skipped = catch_up.skipped
+        report.copied += catch_up.copied
+        report.caught_up += catch_up.copied
+        return catch_up.copied > 0
+
+    async def _sample_recall(self, target: str) -> Optional[float]:
+        records, _ = await self._client.scroll(
+            collection_name=target, limit=max(self._sample_size * 4, 100), with_payload=True, with_vectors=False
+        )
+        sample = [r for r in records if point_text(r.payload)]
+        sample = random.sample(sample, min(self._sample_size, len(sample)))
+        if not sample:
+            return None
+        vectors = await self._embed_projected([point_text(r.payload) for r in sample], "retrieval_query")
+        found = 0
+        for record, vector in zip(sample, vectors):
+            if not vector:
+                continue
+            response = await self._client.query_points(target, query=vector, limit=self._recall_k, with_payload=False)
+            found += any(str(p.id) == str(record.id) for p in response.points)
+        return found / len(sample)
+
+    async def verify(self, target: str, report: ReembeddingReport) -> None:
+        report.target_points = (await self._client.count(target, exact=True)).count
+        expected = report.source_points - report.skipped
+        if report.target_points != expected:
+            report.errors.append(f"contagem: {report.target_points} pontos no destino, esperado {expected}")
+        report.sample_recall = await self._sample_recall(target)
+        if report.sample_recall is not None and report.sample_recall < self._min_recall:
+            report.errors.append(f"recall da amostra {report.sample_recall:.2f} < {self._min_recall:.2f}")
+
+    async def run(
+        self,
+        *,
+        target: Optional[str] = None,
+        flip: bool = True,
+        replace_legacy_collection: bool = False,
+    ) -> ReembeddingReport:
+        source = await resolve_alias(self._client, self._alias)
+        target = target or versioned_collection_name(self._alias)
+        if target == source:
+            raise ValueError(f"'{target}' já é a coleção servida pelo alias.")
+        report = ReembeddingReport(source=source, target=target, model=self._model)
+
+        started = time.monotonic()
+        if source is not None:
+            await self._copy(source, target, report)
+            for _ in range(self._catch_up_passes):
+                if not await self._catch_up(source, target, report):
+                    break
+        await self._ensure_target(target, self._default_dim)
+        logger.info(
+            f"Re-embedding '{source}' -> '{target}': {report.copied} copiados, {report.already_copied} já existentes, "
+            f"{report.caught_up} recuperados, {report.skipped} sem texto em {time.monotonic() - started:.1f}s."
+        )
+
+        await self.verify(target, report)
+        if not report.verified:
+            logger.error(f"Verificação falhou; alias mantido em '{source}': {report.errors}")
+            return report
+        if report.skipped:
+            logger.warning(f"{report.skipped} pontos sem texto não foram copiados para '{target}'.")
+
+        if flip:
+            report.retired = await flip_alias(
+                self._client, self._alias, target, replace_legacy_collection=replace_legacy_collection
+            )
+            report.flipped = True
+            if source is not None and source != self._alias:
+                # Escritas que chegaram à coleção antiga entre a última passada e a troca
+                if await self._catch_up(source, target, report):
+                    await stamp_corpus_revision(self._client, target)
+        return report
@@ -0,0 +1,114 @@
+"""
+Re-embedding do corpus do RAG sem downtime (ver
+brain/infrastructure/persistence/reembedding.py).
+
+Uso:
+    python brain/reembed_collection.py --model models/gemini-embedding-001 [--batch-size 100] [--rpm 60]
+        [--target athena_knowledge_20260101000000] [--no-flip] [--replace-legacy-collection]
+        [--projection pca256-0123456789ab]
+    python brain/reembed_collection.py cleanup [--grace-seconds 604800]
+
+Depois da troca, ajuste EMBEDDING_MODEL (e EMBEDDING_PROJECTION) para que as
+próximas ingestões usem o mesmo modelo e a mesma projeção da coleção. A
+projeção é ajustada com brain/scripts/benchmark_embedding_dims.py --save.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from typing import List, Sequence
+
+# Adiciona a raiz do projeto ao PYTHONPATH
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import google.generativeai as genai
+from qdrant_client import AsyncQdrantClient
+
+from brain.config.settings import settings
+from brain.infrastructure.llm.gemini_embeddings import embed_texts
+from brain.infrastructure.persistence.embedding_projection import load_projection
+from brain.infrastructure.persistence.reembedding import ReembeddingPipeline, drop_retired_collections
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", nargs="?", choices=["run", "cleanup"], default="run")
+    parser.add_argument("--alias", default=settings.QDRANT_COLLECTION, help="Alias servido às buscas.")
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL, help="Modelo de embedding da nova coleção.")
+    parser.add_argument("--batch-size", type=int, default=100, help="Pontos por lote de embedding/upsert.")
+    parser.add_argument("--rpm", type=float, default=None, help="Limite de lotes por minuto (poupa o tráfego ao vivo).")
+    parser.add_argument("--target", default=None, help="Coleção de destino; repita para retomar uma execução.")
+    parser.add_argument("--quantization", default=settings.VECTOR_QUANTIZATION)
+    parser.add_argument(
+        "--projection",
+        default=settings.EMBEDDING_PROJECTION,
+        help="Versão do artefato de projeção (em EMBEDDING_PROJECTION_DIR); vazio mantém a dimensão original.",
+    )
+    parser.add_argument("--sample-size", type=int, default=50, help="Pontos amostrados na verificação de recall.")
+    parser.add_argument("--min-recall", type=float, default=0.9)
+    parser.add_argument("--no-flip", action="store_true", help="Só copia e verifica; não troca o alias.")
+    parser.add_argument(
+        "--replace-legacy-collection",
+        action="store_true",
+        help="Permite apagar a coleção legada com o nome do alias na primeira troca.",
+    )
+    parser.add_argument("--grace-seconds", type=float, default=settings.QDRANT_RETIRED_COLLECTION_GRACE_SECONDS)
+    return parser.parse_args()
+
+
+async def main(args: argparse.Namespace) -> int:
+    client = AsyncQdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY)
+    try:
+        if args.command == "cleanup":
+            dropped = await drop_retired_collections(client, args.alias, args.grace_seconds)
+            logger.info(f"Coleções removidas: {dropped or 'nenhuma'}")
+            return 0
+
+        async def embed(texts: Sequence[str], task_type: str) -> List[List[float]]:
+            return await embed_texts(texts, model=args.model, task_type=task_type, batch_size=args.batch_size)
+
+        pipeline = ReembeddingPipeline(
+            client,
+            embed,
+            alias=args.alias,
+            model=args.model,
+            batch_size=args.batch_size,
+            batches_per_minute=args.rpm,
+            quantization=args.quantization,
+            sample_size=args.sample_size,
+            min_recall=args.min_recall,
+            projection=load_projection(settings.EMBEDDING_PROJECTION_DIR, args.projection) if args.projection else None,
+        )
+        report = await pipeline.run(
+            target=args.target,
+            flip=not args.no_flip,
+            replace_legacy_collection=args.replace_legacy_collection,
+        )
+        logger.info(f"Resultado: {report}")
+        if not report.verified:
+            logger.error(f"Verificação falhou; rode de novo com --target {report.target} para retomar.")
+            return 1
+        if report.flipped and args.model != settings.EMBEDDING_MODEL:
+            logger.warning(f"Atualize EMBEDDING_MODEL={args.model} para as próximas ingestões.")
+        if report.flipped and (args.projection or None) != settings.EMBEDDING_PROJECTION:
+            logger.warning(f"Atualize EMBEDDING_PROJECTION={args.projection or ''} para as próximas ingestões.")
+        return 0
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    if args.command == "run":
+        if not settings.GEMINI_API_KEY:
+            logger.error("ERRO: GEMINI_API_KEY não definida no ambiente.")
+            sys.exit(1)
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+    sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,124 @@
+"""
+Recalcula as tabelas derivadas do índice vetorial, fora dos processos da API:
+- node_semantic_neighbors (vizinhos semânticos de cada nó);
+- node_contexts (contexto RAG pré-calculado de cada nó).
+
+Cada job só recalcula quando a versão dos vetores/corpus muda e roda sob um
+advisory lock de sessão do Postgres: execuções concorrentes (cron sobreposto,
+várias réplicas com --loop) pulam em vez de disputar o DELETE + INSERT.
+Nenhuma transação fica aberta durante as buscas no índice vetorial: as
+leituras são em autocommit e a troca da tabela é uma transação curta no fim.
+
+Uso:
+    python brain/refresh_semantic_tables.py [all|neighbors|contexts] [--force] [--loop]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+# Adiciona a raiz do projeto ao PYTHONPATH
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from brain.api.fastapi.dependencies import get_knowledge_vector_repository
+from brain.application.ports.repositories import KnowledgeVectorRepository
+from brain.application.services.node_context_service import NodeContextRefresher
+from brain.application.services.semantic_neighbor_service import SemanticNeighborRefresher
+from brain.config.settings import settings
+from brain.infrastructure.persistence.database import AsyncSessionLocal, AutocommitSessionLocal, advisory_lock
+from brain.infrastructure.persistence.postgres_repositories import (
+    PostgresKnowledgeRepository,
+    PostgresNodeContextRepository,
+    PostgresSemanticNeighborRepository,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def refresh_semantic_neighbors(vector_repo: KnowledgeVectorRepository, *, force: bool = False) -> bool:
+    async with advisory_lock("node_semantic_neighbors") as acquired:
+        if not acquired:
+            logger.info("Vizinhança semântica já sendo recalculada por outro processo.")
+            return False
+        # `db` só abre transação no replace_all, depois de todas as buscas
+        async with AsyncSessionLocal() as db, AutocommitSessionLocal() as reads:
+            refresher = SemanticNeighborRefresher(
+                PostgresKnowledgeRepository(db, reads),
+                vector_repo,
+                PostgresSemanticNeighborRepository(db, reads),
+                neighborhood_size=settings.SEMANTIC_NEIGHBORS_K,
+            )
+            refreshed = await refresher.refresh(force=force)
+            await db.commit()
+            return refreshed
+
+
+async def refresh_node_contexts(vector_repo: KnowledgeVectorRepository, *, force: bool = False) -> bool:
+    async with advisory_lock("node_contexts") as acquired:
+        if not acquired:
+            logger.info("Contexto RAG dos nós já sendo recalculado por outro processo.")
+            return False
+        async with AsyncSessionLocal() as db, AutocommitSessionLocal() as reads:
+            refresher = NodeContextRefresher(
+                PostgresKnowledgeRepository(db, reads),
+                vector_repo,
+                PostgresNodeContextRepository(db, reads),
+                limit=settings.NODE_CONTEXTS_LIMIT,
+            )
+            refreshed = await refresher.refresh(force=force)
+            await db.commit()
+            return refreshed
+
+
+async def _run(job, vector_repo: KnowledgeVectorRepository, force: bool, loop: bool, interval: float) -> None:
+    while True:
+        try:
+            await job(vector_repo, force=force)
+        except Exception as e:
+            if not loop:
+                raise
+            logger.error(f"Falha em {job.__name__}: {e}", exc_info=True)
+        if not loop:
+            return
+        force = False
+        await asyncio.sleep(interval)
+
+
+async def main(args: argparse.Namespace) -> None:
+    vector_repo = get_knowledge_vector_repository()
+    jobs = []
+    if args.job in ("all", "neighbors"):
+        jobs.append(_run(
+            refresh_semantic_neighbors, vector_repo, args.force, args.loop,
+            settings.SEMANTIC_NEIGHBORS_REFRESH_INTERVAL_SECONDS,
+        ))
+    if args.job in ("all", "contexts"):
+        jobs.append(_run(
+            refresh_node_contexts, vector_repo, args.force, args.loop,
+            settings.NODE_CONTEXTS_REFRESH_INTERVAL_SECONDS,
+        ))
+    try:
+        await asyncio.gather(*jobs)
+    finally:
+        await vector_repo.close()
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("job", nargs="?", choices=["all", "neighbors", "contexts"], default="all")
+    parser.add_argument("--force", action="store_true", help="Recalcula mesmo sem mudança de versão.")
+    parser.add_argument(
+        "--loop",
+        action="store_true",
+        help="Fica rodando, com os intervalos de SEMANTIC_NEIGHBORS_/NODE_CONTEXTS_REFRESH_INTERVAL_SECONDS.",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(_parse_args()))
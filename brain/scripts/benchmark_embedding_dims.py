@@ -0,0 +1,192 @@
+"""
+Benchmark de redução de dimensionalidade: recall@k e latência por dimensão.
+
+Para cada método ("pca", "truncate") e dimensão (768, 384, 256, 128), projeta
+o corpus, monta o índice local exato e mede p50/p95 da busca top-k e o
+recall@k contra a resposta exata na dimensão original. No fim indica a menor
+dimensão de cada método que atinge --target-recall.
+
+O corpus vem do índice local (--local-index), de uma coleção do Qdrant
+(--qdrant-url/--collection, com os vetores) ou, sem nenhum dos dois, de dados
+sintéticos com espectro decrescente e base rotacionada (onde o truncamento
+perde para o PCA, como num modelo não treinado no estilo Matryoshka).
+
+Consultas: --queries vetores do corpus separados antes de montar o índice e,
+com --curriculum-queries, os nomes dos nós do currículo embutidos como
+consulta (precisa de GEMINI_API_KEY), que é como o app consulta o RAG.
+
+--save pca:256 ajusta a projeção no corpus inteiro e grava o artefato em
+EMBEDDING_PROJECTION_DIR; a versão impressa vai em EMBEDDING_PROJECTION
+(ingestão) ou em reembed_collection.py --projection (coleção nova no Qdrant).
+
+Uso:
+    python brain/scripts/benchmark_embedding_dims.py [--local-index DIR | --qdrant-url URL --collection NOME]
+        [--n 20000] [--dims 768,384,256,128] [--methods pca,truncate] [--queries 200] [--k 10]
+        [--fit-sample 50000] [--target-recall 0.95] [--curriculum-queries brain/data/initial_curriculum.json]
+        [--save pca:256]
+"""
+
+import sys
+import os
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from brain.config.settings import settings
+from brain.infrastructure.persistence.embedding_projection import EmbeddingProjection
+from brain.infrastructure.persistence.local_vector_repository import LocalKnowledgeVectorRepository
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def _exact_top_k(data: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    return np.argsort(-(_normalize(queries) @ _normalize(data).T), axis=1)[:, :k]
+
+
+def _recall(found, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t.tolist())) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def synthetic_corpus(n: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    """Variância concentrada em poucas direções (como embeddings reais), em base aleatória."""
+    spectrum = (np.arange(dim) + 1.0) ** -0.75
+    rotation, _ = np.linalg.qr(rng.normal(size=(dim, dim)))
+    return ((rng.normal(size=(n, dim)) * spectrum) @ rotation).astype(np.float32)
+
+
+def load_local_corpus(path: str) -> np.ndarray:
+    return np.array(LocalKnowledgeVectorRepository(path).vectors)
+
+
+async def load_qdrant_corpus(url: str, collection: str, limit: Optional[int]) -> np.ndarray:
+    from qdrant_client import AsyncQdrantClient
+
+    client = AsyncQdrantClient(url=url, api_key=settings.QDRANT_API_KEY)
+    vectors, offset = [], None
+    try:
+        while limit is None or len(vectors) < limit:
+            records, offset = await client.scroll(
+                collection, limit=1000, offset=offset, with_payload=False, with_vectors=True
+            )
+            vectors.extend(record.vector for record in records)
+            if offset is None:
+                break
+    finally:
+        await client.close()
+    return np.asarray(vectors[:limit] if limit else vectors, dtype=np.float32)
+
+
+async def embed_curriculum_queries(path: str) -> np.ndarray:
+    import google.generativeai as genai
+    from brain.infrastructure.llm.gemini_embeddings import embed_texts
+
+    genai.configure(api_key=settings.GEMINI_API_KEY)
+    with open(path, encoding="utf-8") as f:
+        names = [node["name"] for node in json.load(f)["nodes"]]
+    vectors = await embed_texts(names, model=settings.EMBEDDING_MODEL, task_type="retrieval_query")
+    return np.asarray([v for v in vectors if v], dtype=np.float32)
+
+
+def fit(method: str, corpus: np.ndarray, dim: int, fit_sample: int, rng: np.random.Generator) -> EmbeddingProjection:
+    if method == "truncate":
+        return EmbeddingProjection.truncate(corpus.shape[1], dim)
+    sample = corpus if len(corpus) <= fit_sample else corpus[rng.choice(len(corpus), fit_sample, replace=False)]
+    return EmbeddingProjection.fit_pca(sample, dim)
+
+
+def bench(
+    name: str,
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    k: int,
+    projection: Optional[EmbeddingProjection],
+) -> Tuple[float, float]:
+    data = projection.apply(corpus) if projection is not None else corpus
+    projected_queries = projection.apply(queries) if projection is not None else queries
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = LocalKnowledgeVectorRepository(tmp, dim=data.shape[1])
+        repo.upsert(list(range(len(data))), data)
+        latencies, found = [], []
+        for query in projected_queries:
+            started = time.perf_counter()
+            hits = repo.search_vector(query, k)
+            latencies.append(time.perf_counter() - started)
+            found.append([row for row, _ in hits])
+        memory = repo.search_memory_bytes
+    ms = np.asarray(latencies) * 1000
+    recall = _recall(found, truth)
+    print(
+        f"{name:<14} mem={memory / 2**20:9.1f} MiB  p50={np.percentile(ms, 50):8.2f} ms  "
+        f"p95={np.percentile(ms, 95):8.2f} ms  recall@k={recall:.3f}"
+    )
+    return recall, float(np.percentile(ms, 50))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--local-index", default=None)
+    parser.add_argument("--qdrant-url", default=None)
+    parser.add_argument("--collection", default=settings.QDRANT_COLLECTION)
+    parser.add_argument("--n", type=int, default=20000, help="Vetores sintéticos, ou limite lido do Qdrant.")
+    parser.add_argument("--dim", type=int, default=768, help="Dimensão dos dados sintéticos.")
+    parser.add_argument("--dims", default="768,384,256,128")
+    parser.add_argument("--methods", default="pca,truncate")
+    parser.add_argument("--queries", type=int, default=200, help="Vetores do corpus separados como consultas.")
+    parser.add_argument("--curriculum-queries", default=None, help="JSON do currículo: nomes dos nós como consultas.")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--fit-sample", type=int, default=50000, help="Vetores usados no ajuste do PCA.")
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--save", default=None, help="método:dimensão da projeção a gravar (ex.: pca:256).")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    if args.local_index:
+        corpus = load_local_corpus(args.local_index)
+    elif args.qdrant_url:
+        corpus = asyncio.run(load_qdrant_corpus(args.qdrant_url, args.collection, args.n))
+    else:
+        corpus = synthetic_corpus(args.n, args.dim, rng)
+
+    held_out = rng.choice(len(corpus), min(args.queries, len(corpus) // 10), replace=False)
+    mask = np.ones(len(corpus), dtype=bool)
+    mask[held_out] = False
+    queries, indexed = corpus[held_out], corpus[mask]
+    if args.curriculum_queries:
+        queries = np.vstack([queries, asyncio.run(embed_curriculum_queries(args.curriculum_queries))])
+    truth = _exact_top_k(indexed, queries, args.k)
+    print(f"N={len(indexed)} dim={corpus.shape[1]} consultas={len(queries)} k={args.k}")
+
+    dims = [d for d in (int(d) for d in args.dims.split(",")) if d <= corpus.shape[1]]
+    smallest: List[str] = []
+    for method in (m.strip() for m in args.methods.split(",")):
+        passing = None
+        for dim in dims:
+            projection = None if dim == corpus.shape[1] else fit(method, indexed, dim, args.fit_sample, rng)
+            recall, _ = bench(f"{method}/{dim}", indexed, queries, truth, args.k, projection)
+            if recall >= args.target_recall:
+                passing = dim if passing is None else min(passing, dim)
+        smallest.append(f"{method}: {passing if passing is not None else 'nenhuma'}")
+    print(f"Menor dimensão com recall@{args.k} >= {args.target_recall}: " + "; ".join(smallest))
+
+    if args.save:
+        method, dim = args.save.split(":")
+        projection = fit(method, corpus, int(dim), args.fit_sample, rng)
+        path = projection.save(settings.EMBEDDING_PROJECTION_DIR)
+        print(f"Projeção gravada em {path}: EMBEDDING_PROJECTION={projection.version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark da carga do grafo completo (get_full_graph).
+
+Compara o caminho antigo (instâncias ORM de KnowledgeNodeModel + cópia campo
+a campo) com o atual (select Core projetado -> KnowledgeNode com __slots__).
+Mede tempo de CPU e pico de memória (tracemalloc) por caminho.
+
+Uso:
+    python brain/scripts/benchmark_graph_load.py [N_NOS] [DATABASE_URL_ASYNC]
+
+Sem URL, usa um SQLite temporário (aiosqlite).
+"""
+
+import sys
+import os
+import gc
+import time
+import uuid
+import asyncio
+import tempfile
+import tracemalloc
+from datetime import datetime, timezone, timedelta
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+from brain.infrastructure.persistence.database import Base
+from brain.infrastructure.persistence.models import KnowledgeNodeModel
+from brain.infrastructure.persistence.postgres_repositories import PostgresKnowledgeRepository
+from brain.domain.entities.knowledge_node import KnowledgeNode
+
+
+async def _seed(engine, n_nodes: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "name": f"Node {i}",
+                "subject": f"Subject {i % 50}",
+                "difficulty": 5.0,
+                "weight_in_exam": 0.1,
+                "weight": 1.0,
+                "stability": 1.0 + i % 7,
+                "reps": i % 5,
+                "lapses": 0,
+                "last_reviewed_at": now - timedelta(days=i % 30),
+                "next_review_at": now + timedelta(days=i % 30),
+            }
+            for i in range(n_nodes)
+        ]
+        for start in range(0, n_nodes, 5000):
+            await conn.execute(insert(KnowledgeNodeModel.__table__), rows[start:start + 5000])
+
+
+async def _orm_path(session: AsyncSession):
+    """Caminho anterior: entidades ORM no identity map + cópia manual."""
+    result = await session.execute(select(KnowledgeNodeModel))
+    return [
+        KnowledgeNode(
+            id=model.id,
+            name=model.name,
+            subject=model.subject,
+            weight_in_exam=model.weight_in_exam,
+            weight=model.weight,
+            stability=model.stability,
+            difficulty=model.difficulty,
+            reps=model.reps,
+            lapses=model.lapses,
+            last_reviewed_at=model.last_reviewed_at,
+            next_review_at=model.next_review_at,
+        )
+        for model in result.scalars().all()
+    ]
+
+
+async def _core_path(session: AsyncSession):
+    return await PostgresKnowledgeRepository(session).get_full_graph()
+
+
+async def _measure(engine, label: str, loader, rounds: int = 3) -> None:
+    timings, peaks = [], []
+    for _ in range(rounds):
+        gc.collect()
+        async with AsyncSession(engine) as session:
+            tracemalloc.start()
+            started = time.process_time()
+            nodes = await loader(session)
+            elapsed = time.process_time() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        timings.append(elapsed)
+        peaks.append(peak)
+        del nodes
+    print(
+        f"{label:<22} cpu={min(timings) * 1000:8.1f} ms   "
+        f"pico_mem={min(peaks) / 1024 / 1024:8.1f} MiB"
+    )
+
+
+async def main(n_nodes: int, url: str) -> None:
+    engine = create_async_engine(url)
+    try:
+        print(f"Populando {n_nodes} nós em {url} ...")
+        await _seed(engine, n_nodes)
+        await _measure(engine, "ORM (anterior)", _orm_path)
+        await _measure(engine, "Core projetado (atual)", _core_path)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    if len(sys.argv) > 2:
+        database_url = sys.argv[2]
+    else:
+        database_url = f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'graph_bench.db')}"
+    asyncio.run(main(n, database_url))
@@ -0,0 +1,167 @@
+"""
+Benchmark de busca vetorial: índice NumPy local x Qdrant.
+
+Gera N vetores sintéticos, mede a latência (p50/p95) de top-k por consulta e o
+recall@k de cada backend contra a resposta exata (força bruta em NumPy).
+O índice local sem quantização é exato (recall 1.0) e serve de referência; o
+Qdrant com servidor usa HNSW e troca recall por latência sublinear.
+
+Cada modo de quantização do índice local ("none", "int8", "binary") é medido
+em separado, com a memória que a primeira passada mantém em RAM. O Qdrant usa
+o modo de --qdrant-quantization (config da coleção + reordenação).
+
+Uso:
+    python brain/scripts/benchmark_vector_search.py [N] [--dim 768] [--queries 200] [--k 10]
+        [--block-size 65536] [--modes none,int8,binary] [--oversampling 4]
+        [--qdrant-url http://localhost:6333] [--qdrant-quantization int8]
+
+Sem --qdrant-url, usa o modo em memória do qdrant-client (força bruta em
+Python: útil só como checagem de contrato, não de desempenho).
+"""
+
+import sys
+import os
+import time
+import uuid
+import asyncio
+import argparse
+import tempfile
+
+import numpy as np
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from brain.infrastructure.persistence.local_vector_repository import LocalKnowledgeVectorRepository
+from brain.infrastructure.persistence.qdrant_repository import quantization_config, quantized_search_params
+
+COLLECTION = "benchmark_vectors"
+
+
+def _exact_top_k(data: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    normed = data / np.linalg.norm(data, axis=1, keepdims=True)
+    scores = (queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ normed.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def _recall(found, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t.tolist())) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def _report(name: str, latencies, recall: float, memory_bytes=None) -> None:
+    ms = np.asarray(latencies) * 1000
+    memory = f"{memory_bytes / 2**20:9.1f} MiB" if memory_bytes is not None else "      n/a    "
+    print(
+        f"{name:<14} mem={memory}  p50={np.percentile(ms, 50):8.2f} ms  p95={np.percentile(ms, 95):8.2f} ms  "
+        f"qps={len(ms) / (ms.sum() / 1000):8.1f}  recall@k={recall:.3f}"
+    )
+
+
+def bench_local(
+    data: np.ndarray,
+    queries: np.ndarray,
+    k: int,
+    block_size: int,
+    truth: np.ndarray,
+    mode: str = "none",
+    oversampling: float = 4.0,
+) -> None:
+    name = f"local/{mode}"
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = LocalKnowledgeVectorRepository(
+            tmp, dim=data.shape[1], block_size=block_size, quantization=mode, oversampling=oversampling
+        )
+        started = time.perf_counter()
+        repo.upsert(list(range(len(data))), data)
+        repo.flush()
+        print(f"{name:<14} carga: {time.perf_counter() - started:.2f}s")
+
+        latencies, found = [], []
+        for query in queries:
+            started = time.perf_counter()
+            hits = repo.search_vector(query, k)
+            latencies.append(time.perf_counter() - started)
+            found.append([row for row, _ in hits])
+        _report(name, latencies, _recall(found, truth), repo.search_memory_bytes)
+
+
+async def bench_qdrant(
+    data: np.ndarray,
+    queries: np.ndarray,
+    k: int,
+    url,
+    truth: np.ndarray,
+    mode: str = "none",
+    oversampling: float = 4.0,
+) -> None:
+    name = f"qdrant/{mode}"
+    client = AsyncQdrantClient(url=url) if url else AsyncQdrantClient(location=":memory:")
+    ids = [str(uuid.UUID(int=i + 1)) for i in range(len(data))]
+    search_params = quantized_search_params(mode, oversampling)
+    try:
+        if await client.collection_exists(COLLECTION):
+            await client.delete_collection(COLLECTION)
+        await client.create_collection(
+            COLLECTION,
+            vectors_config=VectorParams(size=data.shape[1], distance=Distance.COSINE, on_disk=mode != "none"),
+            quantization_config=quantization_config(mode),
+        )
+        started = time.perf_counter()
+        for start in range(0, len(data), 1000):
+            await client.upsert(
+                COLLECTION,
+                points=[PointStruct(id=ids[i], vector=data[i].tolist()) for i in range(start, min(start + 1000, len(data)))],
+                wait=True,
+            )
+        print(f"{name:<14} carga: {time.perf_counter() - started:.2f}s")
+
+        latencies, found = [], []
+        for query in queries:
+            started = time.perf_counter()
+            response = await client.query_points(
+                COLLECTION, query=query.tolist(), limit=k, search_params=search_params
+            )
+            latencies.append(time.perf_counter() - started)
+            found.append([uuid.UUID(str(p.id)).int - 1 for p in response.points])
+        _report(name, latencies, _recall(found, truth))
+    finally:
+        if url:
+            await client.delete_collection(COLLECTION)
+        await client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("n", nargs="?", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--block-size", type=int, default=65536)
+    parser.add_argument("--modes", default="none,int8,binary", help="Modos de quantização do índice local.")
+    parser.add_argument("--oversampling", type=float, default=4.0)
+    parser.add_argument("--qdrant-url", default=None)
+    parser.add_argument("--qdrant-quantization", default="none")
+    parser.add_argument("--skip-qdrant", action="store_true")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    data = rng.normal(size=(args.n, args.dim)).astype(np.float32)
+    queries = rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+    truth = _exact_top_k(data, queries, args.k)
+    print(f"N={args.n} dim={args.dim} consultas={args.queries} k={args.k}")
+
+    for mode in args.modes.split(","):
+        bench_local(data, queries, args.k, args.block_size, truth, mode.strip(), args.oversampling)
+    if not args.skip_qdrant:
+        asyncio.run(bench_qdrant(
+            data, queries, args.k, args.qdrant_url, truth, args.qdrant_quantization, args.oversampling
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,40 @@
+import argparse
 import asyncio
+import json
 import os
+import sys
 import logging
-from typing import List, Dict
+from typing import Iterator, Optional
 
-import google.generativeai as genai
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, PointStruct
+# Adiciona a raiz do projeto ao PYTHONPATH
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from qdrant_client import AsyncQdrantClient
+
+from brain.config.settings import settings
+from brain.infrastructure.llm.gemini_service import GeminiService
+from brain.infrastructure.persistence.local_vector_repository import LocalKnowledgeVectorRepository
+from brain.infrastructure.persistence.embedding_projection import EmbeddingProjection, load_projection
+from brain.infrastructure.persistence.qdrant_repository import (
+    EMBEDDING_MODEL_METADATA_KEY,
+    PROJECTION_METADATA_KEY,
+    ensure_payload_indexes,
+)
+from brain.infrastructure.persistence.rag_ingestion import (
+    IngestionCheckpoint,
+    LocalIndexChunkSink,
+    QdrantChunkSink,
+    RagDocument,
+    RagIngestionPipeline,
+)
+from brain.infrastructure.persistence.reembedding import (
+    create_model_collection,
+    flip_alias,
+    resolve_alias,
+    versioned_collection_name,
+)
 
 # --- Configuração ---
 # MUDANÇA: Usa o nome do host do Docker se disponível, ou fallback para localhost
@@ -14,7 +43,10 @@ QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
 QDRANT_URL = f"http://{QDRANT_HOST}:{QDRANT_PORT}"
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-COLLECTION_NAME = "athena_knowledge"
+COLLECTION_NAME = settings.QDRANT_COLLECTION
+CHECKPOINT_PATH = os.getenv("RAG_CHECKPOINT_PATH", ".cache/rag_ingestion.sqlite3")
+# "none", "int8" ou "binary": vale só para coleções criadas por este script
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none")
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -43,86 +75,135 @@ RAW_DATA = [
     }
 ]
 
-async def generate_embedding(text: str) -> List[float]:
-    if not GEMINI_API_KEY:
-        raise ValueError("GEMINI_API_KEY não encontrada.")
-    
-    genai.configure(api_key=GEMINI_API_KEY)
-    
-    try:
-        # Usa o modelo novo de embedding
-        result = await asyncio.to_thread(
-            genai.embed_content,
-            model="models/text-embedding-004",
-            content=text,
-            task_type="retrieval_document"
+def _read_jsonl(path: str) -> Iterator[RagDocument]:
+    """Lê um documento por linha ({"topic", "text", "source"?, "subject"?, "goal"?}) sem carregar o arquivo inteiro."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            yield RagDocument(
+                topic=item["topic"],
+                text=item["text"],
+                source=item.get("source", path),
+                subject=item.get("subject"),
+                goal=item.get("goal"),
+            )
+
+
+async def _ensure_collection(client: AsyncQdrantClient, projection: Optional[EmbeddingProjection] = None) -> str:
+    """Garante a coleção atrás do alias e retorna o nome da coleção física."""
+    current = await resolve_alias(client, COLLECTION_NAME)
+    if current is not None:
+        logger.info(f"Coleção '{current}' (alias '{COLLECTION_NAME}') já existe.")
+        metadata = (await client.get_collection(current)).config.metadata or {}
+        # Vetores com outra projeção seriam comparados com consultas projetadas de outro jeito
+        stored = metadata.get(PROJECTION_METADATA_KEY)
+        if stored != (projection.version if projection is not None else None):
+            raise RuntimeError(
+                f"A coleção usa a projeção {stored or 'nenhuma'}, mas EMBEDDING_PROJECTION é "
+                f"{projection.version if projection is not None else 'nenhuma'}; use reembed_collection.py."
+            )
+        model = metadata.get(EMBEDDING_MODEL_METADATA_KEY)
+        if model and model != settings.EMBEDDING_MODEL:
+            logger.warning(
+                f"A coleção usa o modelo {model}, mas EMBEDDING_MODEL é {settings.EMBEDDING_MODEL}: "
+                "os novos chunks não serão comparáveis com os antigos."
+            )
+    else:
+        # Coleção versionada atrás do alias, pronta para uma re-embedding futura
+        current = versioned_collection_name(COLLECTION_NAME)
+        logger.info(f"Criando coleção '{current}' (quantização: {VECTOR_QUANTIZATION})...")
+        # Quantizada: códigos em RAM, vetores originais em disco para a reordenação
+        await create_model_collection(
+            client,
+            current,
+            model=settings.EMBEDDING_MODEL,
+            dim=projection.dim if projection is not None else 768,
+            quantization=VECTOR_QUANTIZATION,
+            projection=projection,
         )
-        return result['embedding']
-    except Exception as e:
-        logger.error(f"Erro ao gerar embedding: {e}")
-        return []
+        await flip_alias(client, COLLECTION_NAME, current)
+    # Também em coleções antigas, criadas antes dos índices de payload
+    await ensure_payload_indexes(client, current)
+    return current
 
-async def seed():
-    logger.info("--- Iniciando Seed RAG ---")
-    logger.info(f"Conectando ao Qdrant em: {QDRANT_URL}")
 
-    # Cliente Síncrono (Estável)
-    client = QdrantClient(url=QDRANT_URL)
+async def seed(
+    input_path: Optional[str] = None,
+    *,
+    batch_size: int = 100,
+    concurrency: int = 4,
+    requests_per_minute: Optional[float] = None,
+    checkpoint_path: str = CHECKPOINT_PATH,
+    local_index_path: Optional[str] = None,
+) -> None:
+    logger.info("--- Iniciando Seed RAG ---")
 
-    # Verifica coleção
+    client = None
+    checkpoint = IngestionCheckpoint(checkpoint_path)
     try:
-        collections = client.get_collections().collections
-        exists = any(c.name == COLLECTION_NAME for c in collections)
-        
-        if not exists:
-            logger.info(f"Criando coleção '{COLLECTION_NAME}'...")
-            client.create_collection(
-                collection_name=COLLECTION_NAME,
-                vectors_config=VectorParams(size=768, distance=Distance.COSINE)
-            )
+        projection = None
+        if settings.EMBEDDING_PROJECTION:
+            projection = load_projection(settings.EMBEDDING_PROJECTION_DIR, settings.EMBEDDING_PROJECTION)
+            logger.info(f"Projeção {projection.version}: {projection.input_dim} -> {projection.dim} dimensões.")
+        if local_index_path:
+            logger.info(f"Gravando no índice local em: {local_index_path}")
+            sink = LocalIndexChunkSink(LocalKnowledgeVectorRepository(local_index_path, projection=projection))
+            target = f"local:{os.path.abspath(local_index_path)}"
         else:
-            logger.info(f"Coleção '{COLLECTION_NAME}' já existe.")
-    except Exception as e:
-        logger.error(f"Erro ao conectar/criar coleção no Qdrant: {e}")
-        return
-
-    # Processa e insere dados
-    points = []
-    logger.info("Gerando embeddings e preparando pontos...")
-    
-    for idx, item in enumerate(RAW_DATA):
-        emb = await generate_embedding(item["text"])
-        if not emb:
-            logger.warning(f"Skipping {item['topic']} (Falha no embedding)")
-            continue
-            
-        point = PointStruct(
-            id=idx + 1,
-            vector=emb,
-            payload={
-                "topic": item["topic"],
-                "text": item["text"],
-                "source": "seed_script"
-            }
+            logger.info(f"Conectando ao Qdrant em: {QDRANT_URL}")
+            client = AsyncQdrantClient(url=QDRANT_URL)
+            # O checkpoint é da coleção física: depois de uma troca do alias
+            # (re-embedding) a coleção nova não herda o progresso da antiga
+            target = await _ensure_collection(client, projection)
+            sink = QdrantChunkSink(client, target)
+        pipeline = RagIngestionPipeline(
+            GeminiService(api_key=GEMINI_API_KEY),
+            sink,
+            checkpoint,
+            collection_name=target,
+            batch_size=batch_size,
+            concurrency=concurrency,
+            requests_per_minute=requests_per_minute,
+            projection=projection,
         )
-        points.append(point)
-        # Pausa para não estourar cota do Gemini (se necessário)
-        await asyncio.sleep(1)
-
-    if points:
-        try:
-            client.upsert(
-                collection_name=COLLECTION_NAME,
-                points=points
-            )
-            logger.info(f"Sucesso! {len(points)} documentos inseridos no RAG.")
-        except Exception as e:
-             logger.error(f"Erro ao inserir pontos: {e}")
-    else:
-        logger.warning("Nenhum ponto gerado para inserção.")
+        documents = _read_jsonl(input_path) if input_path else (RagDocument(**item) for item in RAW_DATA)
+        stats = await pipeline.run(documents)
+        logger.info(
+            f"Sucesso! {stats.embedded} chunks inseridos no RAG "
+            f"({stats.already_ingested} já existentes) a {stats.docs_per_second:.1f} docs/s."
+        )
+    except Exception as e:
+        # Lotes já gravados ficam no checkpoint: rodar de novo continua daqui
+        logger.error(f"Erro na ingestão do RAG: {e}")
+    finally:
+        checkpoint.close()
+        if client is not None:
+            await client.close()
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Ingestão dos documentos do RAG no Qdrant.")
+    parser.add_argument("--input", help="Arquivo JSONL com {topic, text, subject?, goal?}; sem ele usa os dados de exemplo.")
+    parser.add_argument("--batch-size", type=int, default=100, help="Textos por requisição de embedding.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Lotes em voo ao mesmo tempo.")
+    parser.add_argument("--rpm", type=float, default=None, help="Limite de requisições de embedding por minuto.")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH, help="Arquivo SQLite de checkpoint.")
+    parser.add_argument("--local-index", default=None, help="Grava no índice NumPy local (diretório) em vez do Qdrant.")
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
     if not GEMINI_API_KEY:
         logger.error("ERRO: GEMINI_API_KEY não definida no ambiente.")
     else:
-        asyncio.run(seed())
\ No newline at end of file
+        args = _parse_args()
+        asyncio.run(seed(
+            args.input,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            requests_per_minute=args.rpm,
+            checkpoint_path=args.checkpoint,
+            local_index_path=args.local_index,
+        ))
@@ -1,5 +1,6 @@
 # brain/tests/application/services/test_roi_analysis_service.py
 
+import pytest
 from unittest.mock import MagicMock
 import uuid
 
@@ -42,3 +43,47 @@ def test_classify_high_roi_as_veio_de_ouro():
     assert report[0]["status"] == ROIStatus.VEIO_DE_OURO
     assert "Prioridade máxima" in report[0]["recommendation"]
 
+
+
+def test_analyze_reads_scores_from_topic_stats():
+    """
+    Com agregados, o score é a média de acurácia do tópico, sem histórico.
+    """
+    from brain.domain.entities.performance_event import PerformanceMetric
+    from brain.domain.entities.student_topic_stats import StudentTopicStats
+
+    student_id = uuid.uuid4()
+    stats = [
+        StudentTopicStats(student_id, "Direito Penal", PerformanceMetric.ACCURACY, count=4, value_sum=2.0, value_sum_sq=1.1),
+        StudentTopicStats(student_id, "Direito Penal", PerformanceMetric.TIME_PER_QUESTION, count=4, value_sum=200.0),
+    ]
+    mock_student = MagicMock()
+    mock_subject = MagicMock()
+    mock_subject.id = uuid.uuid4()
+    mock_subject.name = "Direito Penal"
+    mock_student.subjects = [mock_subject]
+
+    report = ROIAnalysisService(engine=IntelligenceEngine()).analyze(student=mock_student, topic_stats=stats)
+
+    assert report[0]["roi_score"] == 0.5
+    assert report[0]["status"] == ROIStatus.PANTANO
+
+
+async def test_analyze_stream_aggregates_events_as_they_arrive():
+    from brain.domain.entities.performance_event import PerformanceMetric
+    from brain.tests.domain.fakes import fake_performance_event
+
+    async def events():
+        for value in (0.2, 0.4):
+            yield fake_performance_event(metric=PerformanceMetric.ACCURACY, topic="Direito Penal", value=value)
+
+    mock_student = MagicMock()
+    mock_subject = MagicMock()
+    mock_subject.id = uuid.uuid4()
+    mock_subject.name = "Direito Penal"
+    mock_student.subjects = [mock_subject]
+
+    report = await ROIAnalysisService(engine=IntelligenceEngine()).analyze_stream(mock_student, events())
+
+    assert report[0]["roi_score"] == pytest.approx(0.3)
+    assert report[0]["status"] == ROIStatus.ESTAGNACAO
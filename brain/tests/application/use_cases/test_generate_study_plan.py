@@ -199,4 +199,53 @@ async def test_fail_fast_when_no_ai_and_flag_false(
         mock_generator_instance.generate.return_value = mock_plan
 
         with pytest.raises(RuntimeError):
-            await use_case.execute(student_id)
\ No newline at end of file
+            await use_case.execute(student_id)
+
+@pytest.mark.asyncio
+async def test_rag_context_is_fetched_once_for_the_whole_plan(
+    mock_student_repo,
+    mock_performance_repo,
+    mock_knowledge_repo,
+    mock_study_plan_repo,
+    mock_cognitive_profile_repo,
+):
+    student_id = uuid4()
+    mock_student_repo.get_by_id.return_value = Student(id=student_id, name="Test Student", goal=StudentGoal.INSS)
+    mock_cognitive_profile_repo.get_by_student_id.return_value = CognitiveProfile(
+        id=uuid4(), student_id=student_id, retention_rate=0.5, learning_speed=0.5, stress_sensitivity=0.5
+    )
+    nodes = [SimpleNamespace(id=uuid4(), name=f"Tópico {i}", subject="Direito", difficulty=0.5) for i in range(3)]
+    mock_plan = StudyPlan(id=uuid4(), student_id=student_id, knowledge_nodes=nodes, created_at=datetime.now(timezone.utc))
+
+    vector_repo = AsyncMock()
+    vector_repo.search_context_many.side_effect = [
+        {"Tópico 0": "contexto 0", "Tópico 1": "", "Tópico 2": "contexto 2"},
+        {"Tópico 1": ""},
+    ]
+    ai_service = AsyncMock()
+    ai_service.generate_flashcard.return_value = {"pergunta": "?", "opcoes": ["A"], "correta_index": 0, "explicacao": ""}
+
+    use_case = GenerateStudyPlanUseCase(
+        student_repo=mock_student_repo,
+        performance_repo=mock_performance_repo,
+        knowledge_repo=mock_knowledge_repo,
+        study_plan_repo=mock_study_plan_repo,
+        cognitive_profile_repo=mock_cognitive_profile_repo,
+        vector_repo=vector_repo,
+        ai_service=ai_service,
+        settings=SimpleNamespace(ALLOW_FAKE_FALLBACK=False),
+    )
+
+    with patch('brain.application.use_cases.generate_study_plan.StudyPlanGenerator') as MockGenerator:
+        MockGenerator.return_value.generate.return_value = mock_plan
+        await use_case.execute(student_id)
+
+    # Uma busca em lote filtrada pelo assunto + uma sem filtro só para quem ficou sem contexto
+    assert vector_repo.search_context_many.await_args_list[0].args == (["Tópico 0", "Tópico 1", "Tópico 2"],)
+    assert vector_repo.search_context_many.await_args_list[0].kwargs["filters"] == {
+        name: {"subject": "Direito"} for name in ("Tópico 0", "Tópico 1", "Tópico 2")
+    }
+    assert vector_repo.search_context_many.await_args_list[1].args == (["Tópico 1"],)
+    vector_repo.search_context.assert_not_called()
+    contexts = [call.kwargs["context"] for call in ai_service.generate_flashcard.await_args_list]
+    assert contexts == ["contexto 0", "Conceitos de Tópico 1", "contexto 2"]
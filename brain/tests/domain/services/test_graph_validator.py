@@ -0,0 +1,41 @@
+import pytest
+from uuid import uuid4
+
+from brain.domain.entities.knowledge_node import KnowledgeNode
+from brain.domain.services.graph_validator import KnowledgeGraphValidator, GraphValidationError
+from brain.domain.value_objects.dependency_graph import DependencyGraph
+
+
+def _nodes(n):
+    return [KnowledgeNode(id=uuid4(), name=f"Nó {i}", subject="Matemática") for i in range(n)]
+
+
+def test_dependency_graph_csr_neighbours():
+    a, b, c = (uuid4() for _ in range(3))
+    graph = DependencyGraph.from_edges([(a, c), (b, c), (a, b)])
+
+    assert graph.edge_count == 3
+    assert set(graph.prerequisites_of(c)) == {a, b}
+    assert set(graph.dependents_of(a)) == {b, c}
+    assert graph.prerequisites_of(uuid4()) == []
+    # IDs em texto (como no StudyPlanGenerator) também são aceitos
+    assert graph.prerequisites_of(str(b)) == [a]
+
+
+def test_topological_order_from_bulk_adjacency():
+    nodes = _nodes(4)
+    a, b, c, isolated = nodes
+    graph = DependencyGraph.from_edges([(b.id, c.id), (a.id, b.id)])
+
+    order = KnowledgeGraphValidator.get_topological_order([c, isolated, b, a], dependency_graph=graph)
+
+    assert len(order) == 4
+    assert order.index(a) < order.index(b) < order.index(c)
+
+
+def test_topological_order_from_bulk_adjacency_detects_cycles():
+    a, b = _nodes(2)
+    graph = DependencyGraph.from_edges([(a.id, b.id), (b.id, a.id)])
+
+    with pytest.raises(GraphValidationError):
+        KnowledgeGraphValidator.get_topological_order([a, b], dependency_graph=graph)
@@ -7,6 +7,7 @@ from brain.domain.services.semantic_propagator import SemanticPropagator
 from brain.application.ports.repositories import (
     KnowledgeRepository,
     KnowledgeVectorRepository,
+    SemanticNeighborRepository,
 )
 from brain.domain.entities.knowledge_node import KnowledgeNode
 
@@ -43,10 +44,6 @@ async def test_propagate_boost_success(
         mock_node_1,
         mock_node_2,
     ]
-    mock_node_repository.update.side_effect = [
-        None,
-        None,
-    ]
 
     await semantic_propagator.propagate_boost(origin_node_id)
 
@@ -57,8 +54,8 @@ async def test_propagate_boost_success(
     mock_node_repository.get_by_id.assert_any_call(neighbor_ids[1])
     mock_node_1.apply_penalty.assert_called_once()
     mock_node_2.apply_penalty.assert_called_once()
-    mock_node_repository.update.assert_any_call(mock_node_1)
-    mock_node_repository.update.assert_any_call(mock_node_2)
+    mock_node_repository.update_many.assert_awaited_once_with([mock_node_1, mock_node_2])
+    mock_node_repository.update.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -84,3 +81,29 @@ async def test_propagate_boost_qdrant_failure(
     # Ensure no further calls are made
     semantic_propagator._node_repo.get_by_id.assert_not_called()
     semantic_propagator._node_repo.update.assert_not_called()
+    semantic_propagator._node_repo.update_many.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_propagate_boost_reads_precomputed_neighbors_first(
+    mock_node_repository, mock_vector_repository
+):
+    origin_node_id = UUID("a1a2a3a4-b1b2-c1c2-d1d2-e1e2e3e4e5e6")
+    neighbor_id = UUID("f1f2f3f4-a1b2-c1d2-e1f2-a1b2c3d4e5f6")
+    neighbor_repository = AsyncMock(spec=SemanticNeighborRepository)
+    neighbor_repository.get_neighbor_ids.return_value = [neighbor_id]
+    neighbor_node = AsyncMock(spec=KnowledgeNode)
+    mock_node_repository.get_by_id.return_value = neighbor_node
+
+    propagator = SemanticPropagator(mock_node_repository, mock_vector_repository, neighbor_repository)
+    await propagator.propagate_boost(origin_node_id)
+
+    neighbor_repository.get_neighbor_ids.assert_awaited_once_with(origin_node_id, limit=3)
+    mock_vector_repository.find_semantically_related.assert_not_called()
+    mock_node_repository.update_many.assert_awaited_once_with([neighbor_node])
+
+    # Nó ainda sem vizinhança calculada: cai no Qdrant
+    neighbor_repository.get_neighbor_ids.return_value = []
+    mock_vector_repository.find_semantically_related.return_value = []
+    await propagator.propagate_boost(origin_node_id)
+    mock_vector_repository.find_semantically_related.assert_awaited_once_with(origin_node_id, limit=3)
@@ -1,6 +1,11 @@
+from dataclasses import replace
+from uuid import uuid4
+
 from brain.domain.services.study_plan_generator import StudyPlanGenerator
 from brain.domain.entities.study_plan import StudyFocusLevel
+from brain.domain.entities.knowledge_node import KnowledgeNode
 from brain.domain.entities.performance_event import PerformanceMetric
+from brain.domain.value_objects.dependency_graph import DependencyGraph
 
 from brain.domain.policies.rules.low_accuracy_high_difficulty import (
     LowAccuracyHighDifficultyRule,
@@ -95,3 +100,46 @@ def test_overload_prevention_limits_number_of_nodes():
     )
 
     assert len(plan.knowledge_nodes) <= MAX_NODES
+
+
+def test_bulk_dependency_graph_blocks_nodes_with_unmastered_prerequisites():
+    from brain.domain.value_objects.dependency_graph import DependencyGraph
+
+    basic, advanced = fake_knowledge_node(), fake_knowledge_node()
+    generator = StudyPlanGenerator(
+        knowledge_graph=[advanced, basic],
+        adaptive_rules=[],
+        dependency_graph=DependencyGraph.from_edges([(basic.id, advanced.id)]),
+    )
+
+    plan = generator.generate(
+        student=fake_student(),
+        cognitive_profile=fake_cognitive_profile(),
+        performance_events=[],
+    )
+
+    assert plan.knowledge_nodes == [basic]
+
+
+def test_node_enters_plan_once_its_prerequisite_is_mastered():
+    base = KnowledgeNode(id=uuid4(), name="Frações", subject="Matemática")
+    dependent = KnowledgeNode(id=uuid4(), name="Equações", subject="Matemática")
+    graph = DependencyGraph.from_edges([(base.id, dependent.id)])
+    generator = StudyPlanGenerator(knowledge_graph=[base, dependent], dependency_graph=graph)
+
+    def plan_for(events):
+        plan = generator.generate(
+            student=fake_student(), cognitive_profile=fake_cognitive_profile(), performance_events=events
+        )
+        return {node.id for node in plan.knowledge_nodes}
+
+    assert plan_for([]) == {base.id}
+
+    mastered = replace(
+        fake_performance_event(metric=PerformanceMetric.ACCURACY, value=0.95), knowledge_node_id=base.id
+    )
+    assert plan_for([mastered]) == {dependent.id}
+
+    # Evento legado sem knowledge_node_id: casa pelo nome do tópico
+    legacy = fake_performance_event(metric=PerformanceMetric.ACCURACY, value=0.8, topic=base.name)
+    assert dependent.id in plan_for([legacy])
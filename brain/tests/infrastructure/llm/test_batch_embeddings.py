@@ -0,0 +1,39 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from brain.infrastructure.llm import gemini_embeddings
+from brain.infrastructure.llm.gemini_embeddings import embed_texts
+from brain.infrastructure.llm.mock_ai_service import MockAIService
+
+
+@pytest.mark.asyncio
+async def test_embed_texts_chunks_to_provider_limit_and_keeps_order(monkeypatch):
+    async def fake_embed(model, content, task_type):
+        return {"embedding": [[float(len(text))] for text in content]}
+
+    embed = AsyncMock(side_effect=fake_embed)
+    monkeypatch.setattr(gemini_embeddings.genai, "embed_content_async", embed)
+    texts = ["x" * (i % 7 + 1) for i in range(250)]
+    texts[3] = "   "
+
+    vectors = await embed_texts(texts)
+
+    # 249 textos não vazios -> lotes de 100, 100, 49
+    assert [len(call.kwargs["content"]) for call in embed.await_args_list] == [100, 100, 49]
+    assert vectors[3] == []
+    assert vectors[10] == [float(len(texts[10]))]
+    assert len(vectors) == 250
+
+
+@pytest.mark.asyncio
+async def test_mock_batch_embeddings_are_deterministic():
+    ai = MockAIService(delay_seconds=0)
+
+    first = await ai.generate_embeddings(["Álgebra", "Geometria", ""])
+    second = await ai.generate_embeddings(["Geometria"])
+
+    assert first[1] == second[0]
+    assert first[0] != first[1]
+    assert len(first[0]) == 768
+    assert sum(v * v for v in first[0]) == pytest.approx(1.0)
+    assert first[2] == []
@@ -0,0 +1,32 @@
+from datetime import datetime, timezone, timedelta
+
+from brain.infrastructure.persistence.backfill_performance_events import (
+    parse_occurred_at,
+    parse_event_metadata,
+)
+
+
+def test_parse_occurred_at_from_str_datetime():
+    original = datetime(2025, 3, 1, 12, 30, tzinfo=timezone.utc)
+    assert parse_occurred_at(str(original)) == original
+
+
+def test_parse_occurred_at_naive_is_utc():
+    parsed = parse_occurred_at("2025-03-01T12:30:00")
+    assert parsed.tzinfo is not None
+    assert parsed.utcoffset() == timedelta(0)
+
+
+def test_parse_occurred_at_invalid_returns_none():
+    assert parse_occurred_at("ontem à tarde") is None
+    assert parse_occurred_at(None) is None
+
+
+def test_parse_event_metadata_accepts_python_repr_and_json():
+    assert parse_event_metadata("{'grade_value': 3, 'grade_source': 'explicit'}") == {
+        "grade_value": 3,
+        "grade_source": "explicit",
+    }
+    assert parse_event_metadata('{"response_time": 12.5}') == {"response_time": 12.5}
+    assert parse_event_metadata(None) == {}
+    assert parse_event_metadata("lixo {") == {"raw": "lixo {"}
@@ -0,0 +1,59 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+from brain.domain.entities.knowledge_node import KnowledgeNode
+from brain.infrastructure.persistence.database import Base
+from brain.infrastructure.persistence.in_memory_repositories import InMemoryKnowledgeRepository
+from brain.infrastructure.persistence.models import node_dependencies
+from brain.infrastructure.persistence.postgres_repositories import PostgresKnowledgeRepository
+
+
+def _chain():
+    """a -> b -> c -> a (ciclo) e b -> d; e isolado."""
+    a, b, c, d, e = (KnowledgeNode(id=uuid4(), name=n, subject="Matemática") for n in "abcde")
+    edges = [(a, b), (b, c), (c, a), (b, d)]
+    return (a, b, c, d, e), edges
+
+
+@pytest.fixture
+async def session(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'closure.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as db:
+        yield db
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_recursive_closure_follows_edges_and_terminates_on_cycles(session):
+    (a, b, c, d, e), edges = _chain()
+    repo = PostgresKnowledgeRepository(session)
+    await repo.save_many([a, b, c, d, e])
+    await session.execute(
+        node_dependencies.insert(),
+        [{"parent_id": p.id, "child_id": ch.id} for p, ch in edges],
+    )
+    await session.commit()
+
+    assert await repo.get_prerequisite_closure([d.id]) == {a.id, b.id, c.id}
+    assert await repo.get_dependent_closure([c.id]) == {a.id, b.id, c.id, d.id}
+    assert await repo.get_dependent_closure([d.id]) == set()
+    assert await repo.get_prerequisite_closure([e.id]) == set()
+    assert await repo.get_prerequisite_closure([]) == set()
+
+
+@pytest.mark.asyncio
+async def test_in_memory_closure_matches_recursive_query():
+    (a, b, c, d, e), edges = _chain()
+    for parent, child in edges:
+        child.dependencies = (*child.dependencies, parent)
+    repo = InMemoryKnowledgeRepository()
+    for node in (a, b, c, d, e):
+        await repo.save(node)
+
+    assert await repo.get_prerequisite_closure([d.id]) == {a.id, b.id, c.id}
+    assert await repo.get_dependent_closure([c.id]) == {a.id, b.id, c.id, d.id}
+    assert await repo.get_dependent_closure([e.id]) == set()
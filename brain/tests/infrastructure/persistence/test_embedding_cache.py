@@ -0,0 +1,113 @@
+import sqlite3
+
+import pytest
+from unittest.mock import AsyncMock
+
+from brain.infrastructure.persistence import qdrant_repository
+from brain.infrastructure.persistence.embedding_cache import EmbeddingCache
+from brain.infrastructure.persistence.qdrant_repository import QdrantKnowledgeVectorRepository
+
+MODEL, TASK = "models/text-embedding-004", "retrieval_query"
+
+
+def test_vectors_survive_restart_packed_as_float32(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    cache = EmbeddingCache(path)
+    stored = cache.put(MODEL, TASK, "Álgebra", [0.1, 0.2, 0.3])
+    cache.close()
+
+    reopened = EmbeddingCache(path)
+    vector = reopened.get(MODEL, TASK, "Álgebra")
+    assert vector == stored
+    assert vector == pytest.approx([0.1, 0.2, 0.3], abs=1e-7)
+    # Outro task_type é outra chave
+    assert reopened.get(MODEL, "retrieval_document", "Álgebra") is None
+    assert reopened.stats()["disk_hits"] == 1
+    assert reopened.hit_ratio == pytest.approx(0.5)
+    reopened.close()
+
+
+def test_memory_lru_and_disk_eviction_are_bounded(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), max_memory_entries=2, max_entries=10, evict_fraction=0.5)
+    for i in range(11):
+        cache.put(MODEL, TASK, f"nó {i}", [float(i)])
+
+    stats = cache.stats()
+    assert stats["memory_entries"] == 2
+    assert stats["disk_entries"] == 5
+    assert stats["evictions"] == 6
+    # As mais antigas saíram; as recentes continuam no disco
+    assert cache.get(MODEL, TASK, "nó 0") is None
+    assert cache.get(MODEL, TASK, "nó 8") == [8.0]
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_warm_queries_skip_the_embedding_call(tmp_path, monkeypatch):
+    embed = AsyncMock(return_value={"embedding": [0.5, 0.25]})
+    monkeypatch.setattr(qdrant_repository.genai, "embed_content_async", embed)
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+    repo = QdrantKnowledgeVectorRepository(url="http://localhost:6333", embedding_cache=cache)
+
+    first = await repo._generate_query_embedding("Geometria")
+    second = await repo._generate_query_embedding("Geometria")
+
+    assert first == second == [0.5, 0.25]
+    embed.assert_awaited_once()
+    assert cache.memory_hits == 1
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_batch_query_embeddings_only_send_cache_misses(tmp_path, monkeypatch):
+    embed = AsyncMock(return_value={"embedding": [[0.1, 0.2]]})
+    monkeypatch.setattr(qdrant_repository.genai, "embed_content_async", embed)
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+    cache.put(qdrant_repository.QUERY_EMBEDDING_MODEL, qdrant_repository.QUERY_EMBEDDING_TASK, "Álgebra", [0.5, 0.25])
+    repo = QdrantKnowledgeVectorRepository(url="http://localhost:6333", embedding_cache=cache)
+
+    vectors = await repo._generate_query_embeddings(["Álgebra", "Geometria"])
+
+    assert vectors["Álgebra"] == [0.5, 0.25]
+    assert vectors["Geometria"] == pytest.approx([0.1, 0.2])
+    embed.assert_awaited_once()
+    assert embed.await_args.kwargs["content"] == ["Geometria"]
+    cache.close()
+
+
+def test_disk_hit_only_rewrites_recency_after_touch_interval(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    EmbeddingCache(path).put(MODEL, TASK, "Álgebra", [1.0])
+
+    cache = EmbeddingCache(path, touch_interval_seconds=3600)
+    last_used = cache._conn.execute("SELECT last_used_at FROM query_embeddings").fetchone()[0]
+    assert cache.get(MODEL, TASK, "Álgebra") == [1.0]
+    assert cache._conn.execute("SELECT last_used_at FROM query_embeddings").fetchone()[0] == last_used
+
+    stale = EmbeddingCache(path, touch_interval_seconds=0)
+    assert stale.get(MODEL, TASK, "Álgebra") == [1.0]
+    assert stale._conn.execute("SELECT last_used_at FROM query_embeddings").fetchone()[0] > last_used
+    cache.close()
+    stale.close()
+
+
+def test_locked_file_falls_through_instead_of_raising(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    cache = EmbeddingCache(path, busy_timeout_ms=0, touch_interval_seconds=0)
+    cache.put(MODEL, TASK, "Álgebra", [1.0])
+    cache._memory.clear()
+
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN EXCLUSIVE")
+    try:
+        # WAL: a leitura passa; só a recência e a escrita esbarram no lock
+        assert cache.get(MODEL, TASK, "Álgebra") == [1.0]
+        assert cache.put(MODEL, TASK, "Geometria", [2.0]) == [2.0]
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
+
+    assert cache.stats()["errors"] == 2
+    # O vetor recusado pelo disco continua servido pela memória
+    assert cache.get(MODEL, TASK, "Geometria") == [2.0]
+    cache.close()
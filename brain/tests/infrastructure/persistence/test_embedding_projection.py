@@ -0,0 +1,122 @@
+import os
+
+import numpy as np
+import pytest
+from qdrant_client import AsyncQdrantClient
+
+from brain.infrastructure.llm.mock_ai_service import MOCK_EMBEDDING_DIM, MockAIService
+from brain.infrastructure.persistence.embedding_projection import EmbeddingProjection, load_projection
+from brain.infrastructure.persistence.local_vector_repository import LocalKnowledgeVectorRepository
+from brain.infrastructure.persistence.qdrant_repository import QdrantKnowledgeVectorRepository
+from brain.infrastructure.persistence.rag_ingestion import (
+    IngestionCheckpoint,
+    LocalIndexChunkSink,
+    RagDocument,
+    RagIngestionPipeline,
+)
+from brain.infrastructure.persistence.reembedding import ReembeddingPipeline, flip_alias
+from brain.tests.infrastructure.persistence.test_reembedding import TEXTS, FakeEmbedder, _seed, _vector
+
+rng = np.random.default_rng(11)
+BASIS, _ = np.linalg.qr(rng.normal(size=(64, 64)))
+
+
+def _low_rank(n, rank=8):
+    """Variância em `rank` direções fixas de uma base aleatória, mais um pouco de ruído."""
+    return (rng.normal(size=(n, rank)) @ BASIS[:rank] + 0.01 * rng.normal(size=(n, 64))).astype(np.float32)
+
+
+def _neighbors(data, queries, k):
+    normed = data / np.linalg.norm(data, axis=1, keepdims=True)
+    return np.argsort(-(queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ normed.T, axis=1)[:, :k]
+
+
+def test_truncate_keeps_normalized_prefix():
+    projection = EmbeddingProjection.truncate(4, 2)
+    assert projection.apply_one([3.0, 4.0, 100.0, -7.0]) == pytest.approx([0.6, 0.8])
+    assert projection.version.startswith("truncate2-")
+    with pytest.raises(ValueError):
+        projection.apply([1.0, 2.0, 3.0])
+
+
+def test_pca_preserves_neighbors_of_low_rank_corpus():
+    corpus, queries = _low_rank(2000), _low_rank(50)
+    projection = EmbeddingProjection.fit_pca(corpus, 8)
+
+    truth = _neighbors(corpus, queries, 10)
+    found = _neighbors(projection.apply(corpus), projection.apply(queries), 10)
+
+    recall = np.mean([len(set(f) & set(t)) / 10 for f, t in zip(found, truth)])
+    assert recall >= 0.9
+    assert np.allclose(np.linalg.norm(projection.apply(queries), axis=1), 1.0, atol=1e-5)
+
+
+def test_saved_artifact_reloads_with_same_version_and_output(tmp_path):
+    projection = EmbeddingProjection.fit_pca(_low_rank(200), 4)
+    path = projection.save(str(tmp_path))
+
+    reloaded = load_projection(str(tmp_path), projection.version)
+    assert os.path.basename(path) == f"{projection.version}.npz"
+    assert reloaded.version == projection.version
+    sample = _low_rank(5)
+    assert np.allclose(reloaded.apply(sample), projection.apply(sample))
+    assert EmbeddingProjection.fit_pca(_low_rank(200), 4).version != projection.version
+
+    os.replace(path, tmp_path / "pca4-000000000000.npz")
+    with pytest.raises(ValueError):
+        load_projection(str(tmp_path), "pca4-000000000000")
+
+
+async def test_ingestion_and_local_queries_use_the_same_projection(tmp_path):
+    projection = EmbeddingProjection.truncate(MOCK_EMBEDDING_DIM, 64)
+    index = LocalKnowledgeVectorRepository(str(tmp_path / "index"), ai_service=MockAIService(), projection=projection)
+    checkpoint = IngestionCheckpoint(str(tmp_path / "checkpoint.sqlite3"))
+    documents = [RagDocument(topic=f"T{i}", text=f"Conteúdo do documento {i}.") for i in range(20)]
+
+    await RagIngestionPipeline(
+        MockAIService(), LocalIndexChunkSink(index), checkpoint, collection_name="idx", projection=projection
+    ).run(documents)
+    checkpoint.close()
+
+    assert index.dim == 64 and len(index) == 20
+    assert await index.search_context("Conteúdo do documento 7.", limit=1) == "Conteúdo do documento 7."
+    contexts = await index.search_context_many(["Conteúdo do documento 3."], limit=1)
+    assert contexts == {"Conteúdo do documento 3.": "Conteúdo do documento 3."}
+
+    await index.close()
+    with pytest.raises(ValueError):
+        LocalKnowledgeVectorRepository(str(tmp_path / "index"))
+    assert len(LocalKnowledgeVectorRepository(str(tmp_path / "index"), projection=projection)) == 20
+
+
+async def test_reembedding_with_projection_switches_query_projection_on_flip(tmp_path):
+    client = AsyncQdrantClient(location=":memory:")
+    await _seed(client, "athena_knowledge_v1")
+    await flip_alias(client, "athena_knowledge", "athena_knowledge_v1")
+    corpus = np.asarray([_vector(text, 16) for text in TEXTS], dtype=np.float32)
+    projection = EmbeddingProjection.fit_pca(corpus, 8)
+    projection.save(str(tmp_path))
+
+    repo = QdrantKnowledgeVectorRepository(
+        url="http://localhost:6333", model_refresh_seconds=0, projection_dir=str(tmp_path)
+    )
+    await repo._client.close()
+    repo._client = client
+
+    async def embed(text, model=None):
+        return _vector(text, 4 if model == "modelo-antigo" else 16)
+
+    repo._generate_query_embedding = embed
+    assert await repo.search_context(TEXTS[5], limit=1) == TEXTS[5]
+
+    report = await ReembeddingPipeline(
+        client, FakeEmbedder(dim=16), alias="athena_knowledge", model="modelo-novo", projection=projection
+    ).run(target="athena_knowledge_v2")
+
+    assert report.flipped
+    info = await client.get_collection("athena_knowledge")
+    assert info.config.params.vectors.size == 8
+    assert info.config.metadata["embedding_projection"] == projection.version
+    assert await repo.search_context(TEXTS[5], limit=1) == TEXTS[5]
+    assert repo._projection.version == projection.version
+    await client.close()
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+from brain.domain.entities.error_event import ErrorEvent, ErrorType
+from brain.domain.entities.knowledge_node import KnowledgeNode
+from brain.infrastructure.persistence.database import Base
+from brain.infrastructure.persistence.postgres_repositories import (
+    PostgresErrorEventRepository,
+    PostgresKnowledgeRepository,
+)
+
+
+@pytest.fixture
+async def session(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'errors.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as db:
+        yield db
+    await engine.dispose()
+
+
+def _error(student_id, node_id, minutes, error_type=ErrorType.CONTEUDO):
+    return ErrorEvent(
+        id=uuid4(),
+        student_id=student_id,
+        knowledge_node_id=node_id,
+        error_type=error_type,
+        occurred_at=datetime(2026, 3, 1, tzinfo=timezone.utc) + timedelta(minutes=minutes),
+        severity=0.8,
+    )
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_and_subject_join(session):
+    math = KnowledgeNode(id=uuid4(), name="Frações", subject="Matemática")
+    law = KnowledgeNode(id=uuid4(), name="Crimes", subject="Direito Penal")
+    await PostgresKnowledgeRepository(session).save_many([math, law])
+
+    student_id = uuid4()
+    repo = PostgresErrorEventRepository(session)
+    await repo.save_many([
+        _error(student_id, math.id, 2, ErrorType.DESATENCAO),
+        _error(student_id, law.id, 1),
+        _error(student_id, math.id, 0),
+        _error(uuid4(), math.id, 0),
+    ])
+    await session.commit()
+
+    errors = await repo.get_by_student_and_subject(student_id, "Matemática")
+
+    assert [e.error_type for e in errors] == [ErrorType.CONTEUDO, ErrorType.DESATENCAO]
+    assert all(e.knowledge_node_id == math.id for e in errors)
+    assert len(await repo.get_by_student_id(student_id)) == 3
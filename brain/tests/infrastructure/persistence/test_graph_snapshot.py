@@ -0,0 +1,157 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from brain.domain.entities.knowledge_node import KnowledgeNode
+from brain.domain.value_objects.dependency_graph import DependencyGraph
+from brain.infrastructure.persistence.graph_snapshot import GraphSnapshotCache, CachedKnowledgeRepository
+
+
+class FakeVersionedRepo:
+    def __init__(self, nodes, version=1):
+        self.nodes = list(nodes)
+        self.version = version
+        self.full_loads = 0
+        self.updated = []
+
+    async def get_graph_version(self):
+        return self.version
+
+    async def get_full_graph(self):
+        self.full_loads += 1
+        await asyncio.sleep(0)
+        return list(self.nodes)
+
+    async def get_dependency_graph(self):
+        return DependencyGraph()
+
+    async def update(self, node):
+        self.updated.append(node)
+
+
+def _node(name="Álgebra"):
+    return KnowledgeNode(id=uuid4(), name=name, subject="Matemática")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_a_single_load():
+    repo = FakeVersionedRepo([_node()])
+    cache = GraphSnapshotCache(poll_interval_seconds=60)
+
+    results = await asyncio.gather(*(cache.get(repo) for _ in range(10)))
+
+    assert repo.full_loads == 1
+    assert all(r is results[0] for r in results)
+    assert isinstance(results[0].nodes, tuple)
+
+
+@pytest.mark.asyncio
+async def test_notify_with_newer_version_reloads_and_stale_version_is_ignored():
+    repo = FakeVersionedRepo([_node()], version=5)
+    cache = GraphSnapshotCache(poll_interval_seconds=60)
+    cache.set_listening(True)
+    await cache.get(repo)
+
+    cache.invalidate(4)
+    await cache.get(repo)
+    assert repo.full_loads == 1
+
+    repo.version = 6
+    cache.invalidate(6)
+    snapshot = await cache.get(repo)
+    assert repo.full_loads == 2
+    assert snapshot.version == 6
+
+
+@pytest.mark.asyncio
+async def test_polling_fallback_reloads_only_when_version_changes():
+    repo = FakeVersionedRepo([_node()], version=1)
+    cache = GraphSnapshotCache(poll_interval_seconds=0)
+
+    await cache.get(repo)
+    await cache.get(repo)
+    assert repo.full_loads == 1
+
+    repo.version = 2
+    await cache.get(repo)
+    assert repo.full_loads == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_repository_returns_copies_and_invalidates_on_write():
+    node = _node("Geometria")
+    repo = FakeVersionedRepo([node])
+    cache = GraphSnapshotCache(poll_interval_seconds=60)
+    cache.set_listening(True)
+    cached = CachedKnowledgeRepository(repo, cache)
+
+    found = await cached.get_node_by_name("Geometria")
+    assert found == node and found is not node
+
+    found.stability = 9.0
+    await cached.update(found)
+    assert repo.updated == [found]
+
+    await cached.get_full_graph()
+    assert repo.full_loads == 2
+    assert node.stability != 9.0
+
+
+@pytest.mark.asyncio
+async def test_notify_with_same_version_reloads_snapshot_read_before_commit():
+    # A sequência já avançou para 5 antes do commit: o snapshot leu 5 com as linhas antigas
+    repo = FakeVersionedRepo([_node()], version=5)
+    cache = GraphSnapshotCache(poll_interval_seconds=60)
+    cache.set_listening(True)
+    await cache.get(repo)
+
+    repo.nodes.append(_node("Geometria"))
+    cache.invalidate(5)
+    snapshot = await cache.get(repo)
+    assert repo.full_loads == 2
+    assert len(snapshot.nodes) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_load_keeps_cache_dirty():
+    repo = FakeVersionedRepo([_node()])
+    cache = GraphSnapshotCache(poll_interval_seconds=60)
+    cache.set_listening(True)
+    await cache.get(repo)
+    cache.invalidate()
+
+    async def broken():
+        raise RuntimeError("conexão perdida")
+
+    repo.get_dependency_graph = broken
+    with pytest.raises(RuntimeError):
+        await cache.get(repo)
+
+    del repo.get_dependency_graph
+    await cache.get(repo)
+    assert repo.full_loads == 3
+
+
+@pytest.mark.asyncio
+async def test_writes_invalidate_only_after_the_session_commits():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    repo = FakeVersionedRepo([_node()])
+    cache = GraphSnapshotCache(poll_interval_seconds=60)
+    cache.set_listening(True)
+    await cache.get(repo)
+
+    async with AsyncSession(engine) as session:
+        cached = CachedKnowledgeRepository(repo, cache, session=session)
+        await session.execute(text("SELECT 1"))
+        await cached.update(_node())
+        await cached.update(_node())
+        await cached.get_full_graph()
+        assert repo.full_loads == 1
+
+        await session.commit()
+        await cached.get_full_graph()
+        assert repo.full_loads == 2
+    await engine.dispose()
@@ -0,0 +1,118 @@
+from dataclasses import replace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+from brain.application.services.node_context_service import NodeContextRefresher, NodeContextService
+from brain.domain.entities.knowledge_node import KnowledgeNode
+from brain.infrastructure.persistence.database import Base
+from brain.infrastructure.persistence.in_memory_repositories import InMemoryKnowledgeRepository
+from brain.infrastructure.persistence.postgres_repositories import PostgresNodeContextRepository
+
+
+class FakeVectorRepo:
+    def __init__(self, version="c1", empty=False):
+        self.version = version
+        self.empty = empty
+        self.calls = []
+
+    async def get_corpus_version(self):
+        return self.version
+
+    async def get_cached_corpus_version(self):
+        return self.version
+
+    async def search_context_many(self, queries, limit=3, *, filters=None):
+        self.calls.append((list(queries), filters))
+        return {q: "" if self.empty else f"contexto de {q} ({self.version})" for q in queries}
+
+
+@pytest.fixture
+async def session(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'contexts.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as db:
+        yield db
+    await engine.dispose()
+
+
+async def _graph(n=3):
+    knowledge_repo = InMemoryKnowledgeRepository()
+    nodes = [KnowledgeNode(id=uuid4(), name=f"Nó {i}", subject="Matemática") for i in range(n)]
+    for node in nodes:
+        await knowledge_repo.save(node)
+    return knowledge_repo, nodes
+
+
+@pytest.mark.asyncio
+async def test_refresh_stores_contexts_per_corpus_version(session):
+    knowledge_repo, nodes = await _graph()
+    vector_repo = FakeVectorRepo()
+    context_repo = PostgresNodeContextRepository(session)
+    refresher = NodeContextRefresher(knowledge_repo, vector_repo, context_repo, batch_size=2)
+
+    assert await refresher.refresh() is True
+    await session.commit()
+    assert await context_repo.get_version() == "c1"
+    stored = await context_repo.get_contexts([nodes[0].id, uuid4()])
+    assert list(stored) == [nodes[0].id]
+    assert stored[nodes[0].id].context == "contexto de Nó 0 (c1)"
+    assert stored[nodes[0].id].subject == "Matemática"
+    # Dois lotes, ambos filtrados pelo assunto
+    assert [len(queries) for queries, _ in vector_repo.calls] == [2, 1]
+
+    assert await refresher.refresh() is False
+    vector_repo.version = "c2"
+    assert await refresher.refresh() is True
+    await session.commit()
+    assert (await context_repo.get_contexts([nodes[2].id]))[nodes[2].id].corpus_version == "c2"
+
+
+@pytest.mark.asyncio
+async def test_refresh_keeps_previous_table_when_every_context_comes_back_empty(session):
+    knowledge_repo, nodes = await _graph()
+    context_repo = PostgresNodeContextRepository(session)
+    await NodeContextRefresher(knowledge_repo, FakeVectorRepo(), context_repo).refresh()
+    await session.commit()
+
+    assert await NodeContextRefresher(knowledge_repo, FakeVectorRepo("c2", empty=True), context_repo).refresh() is False
+    assert await context_repo.get_version() == "c1"
+
+
+@pytest.mark.asyncio
+async def test_service_serves_stored_contexts_and_searches_only_missing_or_stale_nodes(session):
+    knowledge_repo, nodes = await _graph(3)
+    context_repo = PostgresNodeContextRepository(session)
+    await NodeContextRefresher(knowledge_repo, FakeVectorRepo(), context_repo).refresh()
+    await session.commit()
+
+    renamed = replace(nodes[1], name="Nó 1 renomeado")
+    new_node = KnowledgeNode(id=uuid4(), name="Nó novo", subject="Matemática")
+    live = FakeVectorRepo("c1")
+    service = NodeContextService(live, context_repo)
+
+    contexts = await service.get_contexts([nodes[0], renamed, nodes[2], new_node])
+
+    assert contexts["Nó 0"] == "contexto de Nó 0 (c1)"
+    assert contexts["Nó 2"] == "contexto de Nó 2 (c1)"
+    assert live.calls == [(["Nó 1 renomeado", "Nó novo"], {
+        "Nó 1 renomeado": {"subject": "Matemática"},
+        "Nó novo": {"subject": "Matemática"},
+    })]
+    assert contexts["Nó novo"] == "contexto de Nó novo (c1)"
+
+
+@pytest.mark.asyncio
+async def test_service_searches_live_when_stored_contexts_are_from_an_older_corpus(session):
+    knowledge_repo, nodes = await _graph(2)
+    context_repo = PostgresNodeContextRepository(session)
+    await NodeContextRefresher(knowledge_repo, FakeVectorRepo("c1"), context_repo).refresh()
+    await session.commit()
+
+    live = FakeVectorRepo("c2")
+    contexts = await NodeContextService(live, context_repo).get_contexts(nodes)
+
+    assert [queries for queries, _ in live.calls] == [["Nó 0", "Nó 1"]]
+    assert contexts["Nó 0"] == "contexto de Nó 0 (c2)"
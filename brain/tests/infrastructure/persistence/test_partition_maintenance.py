@@ -0,0 +1,98 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+from brain.infrastructure.persistence.partition_maintenance import (
+    DEFAULT_PARTITION,
+    add_months,
+    ensure_partitions,
+    maintain_partitions,
+    partition_name,
+    partition_start,
+    partitions_to_create,
+)
+
+
+def test_add_months_crosses_year_boundary():
+    start = datetime(2025, 11, 1, tzinfo=timezone.utc)
+    assert add_months(start, 3) == datetime(2026, 2, 1, tzinfo=timezone.utc)
+    assert add_months(start, -11) == datetime(2024, 12, 1, tzinfo=timezone.utc)
+
+
+def test_partition_name_roundtrip():
+    start = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    assert partition_name(start) == "performance_events_y2025m03"
+    assert partition_start("performance_events_y2025m03") == start
+    assert partition_start("performance_events_default") is None
+
+
+def test_partitions_to_create_covers_current_and_upcoming_months():
+    now = datetime(2025, 12, 15, tzinfo=timezone.utc)
+    partitions = partitions_to_create(now, months_ahead=2)
+
+    assert [name for name, _, _ in partitions] == [
+        "performance_events_y2025m12",
+        "performance_events_y2026m01",
+        "performance_events_y2026m02",
+    ]
+    # Faixas contíguas: o fim de uma é o início da próxima
+    for (_, _, upper), (_, lower, _) in zip(partitions, partitions[1:]):
+        assert upper == lower
+
+
+def test_partitions_to_create_starts_at_oldest_event():
+    now = datetime(2025, 3, 10, tzinfo=timezone.utc)
+    oldest = datetime(2025, 1, 20, 8, 0, tzinfo=timezone.utc)
+    partitions = partitions_to_create(now, months_ahead=0, oldest=oldest)
+    assert partitions[0][1] == datetime(2025, 1, 1, tzinfo=timezone.utc)
+    assert len(partitions) == 3
+
+
+def _fake_conn(partitions, rows_in_default):
+    """Connection que registra o SQL; a default tem `rows_in_default` linhas em cada faixa."""
+    conn = MagicMock()
+    executed = []
+
+    def execute(statement, params=None):
+        sql = str(statement)
+        executed.append(sql)
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = partitions
+        result.scalar.return_value = rows_in_default if sql.startswith("SELECT count(*)") else None
+        return result
+
+    conn.execute.side_effect = execute
+    return conn, executed
+
+
+def test_ensure_partitions_moves_rows_out_of_default_before_creating_month():
+    conn, executed = _fake_conn([DEFAULT_PARTITION], rows_in_default=3)
+    created = ensure_partitions(conn, datetime(2025, 12, 15, tzinfo=timezone.utc), months_ahead=0)
+
+    assert created == ["performance_events_y2025m12"]
+    statements = [sql for sql in executed if not sql.lstrip().startswith("SELECT")]
+    assert [sql.split()[0] for sql in statements[:5]] == ["ALTER", "CREATE", "INSERT", "DELETE", "ALTER"]
+    assert "DETACH PARTITION" in statements[0] and "performance_events_y2025m12" in statements[1]
+    assert statements[4].endswith(f"ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT;")
+
+def test_ensure_partitions_creates_directly_when_default_has_no_rows_in_range():
+    conn, executed = _fake_conn([DEFAULT_PARTITION], rows_in_default=0)
+    ensure_partitions(conn, datetime(2025, 12, 15, tzinfo=timezone.utc), months_ahead=0)
+    assert not any("DETACH" in sql or "INSERT" in sql for sql in executed)
+
+
+def test_maintain_partitions_skips_when_another_process_holds_the_lock():
+    executed = []
+
+    def execute(statement, params=None):
+        sql = str(statement)
+        executed.append(sql)
+        result = MagicMock()
+        result.scalar.return_value = "p" if "relkind" in sql else False
+        return result
+
+    conn = MagicMock()
+    conn.execute.side_effect = execute
+    maintain_partitions(conn, datetime(2025, 12, 15, tzinfo=timezone.utc))
+
+    assert "pg_try_advisory_xact_lock" in executed[-1]
+    assert not any("CREATE" in sql or "DETACH" in sql for sql in executed)
@@ -0,0 +1,135 @@
+import asyncio
+import json
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from brain.domain.entities.performance_event import PerformanceMetric
+from brain.infrastructure.persistence.in_memory_repositories import InMemoryPerformanceRepository
+from brain.infrastructure.persistence.performance_event_buffer import (
+    BufferedPerformanceRepository,
+    PerformanceEventBuffer,
+)
+from brain.tests.domain.fakes import fake_performance_event
+
+
+class RecordingSink:
+    def __init__(self):
+        self.batches = []
+
+    async def __call__(self, events):
+        self.batches.append(list(events))
+
+
+def _event():
+    return fake_performance_event(metric=PerformanceMetric.ACCURACY)
+
+
+@pytest.mark.asyncio
+async def test_flushes_full_batches_by_size():
+    sink = RecordingSink()
+    buffer = PerformanceEventBuffer(sink, batch_size=3, max_age_seconds=10.0)
+
+    for _ in range(6):
+        await buffer.put(_event())
+    await asyncio.sleep(0.01)
+
+    assert [len(b) for b in sink.batches] == [3, 3]
+    await buffer.stop()
+
+
+@pytest.mark.asyncio
+async def test_flushes_partial_batch_by_age():
+    sink = RecordingSink()
+    buffer = PerformanceEventBuffer(sink, batch_size=100, max_age_seconds=0.05)
+
+    await buffer.put(_event())
+    await asyncio.sleep(0.15)
+
+    assert [len(b) for b in sink.batches] == [1]
+    await buffer.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_pending_events():
+    sink = RecordingSink()
+    buffer = PerformanceEventBuffer(sink, batch_size=100, max_age_seconds=60.0)
+
+    for _ in range(5):
+        await buffer.put(_event())
+    await buffer.stop()
+
+    assert sum(len(b) for b in sink.batches) == 5
+    assert buffer.flushed == 5
+    with pytest.raises(RuntimeError):
+        await buffer.put(_event())
+
+
+@pytest.mark.asyncio
+async def test_put_applies_backpressure_when_queue_is_full():
+    release = asyncio.Event()
+
+    async def slow_sink(events):
+        await release.wait()
+
+    buffer = PerformanceEventBuffer(slow_sink, max_size=2, batch_size=1, max_age_seconds=0.0)
+
+    # 1 evento preso no sink + 2 na fila: o próximo put precisa esperar
+    for _ in range(3):
+        await buffer.put(_event())
+        await asyncio.sleep(0)
+    blocked = asyncio.create_task(buffer.put(_event()))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    release.set()
+    await asyncio.wait_for(blocked, 1.0)
+    await buffer.stop()
+    assert buffer.flushed == 4
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_goes_to_dead_letter_file(tmp_path):
+    async def failing_sink(events):
+        raise ConnectionError("banco fora")
+
+    path = tmp_path / "dead_letter.jsonl"
+    buffer = PerformanceEventBuffer(
+        failing_sink, batch_size=10, max_age_seconds=60.0, max_retries=0, dead_letter_path=str(path)
+    )
+    events = [_event() for _ in range(2)]
+    for event in events:
+        await buffer.put(event)
+    await buffer.stop()
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [line["id"] for line in lines] == [str(event.id) for event in events]
+    assert lines[0]["metric"] == "accuracy"
+    assert (buffer.dead_lettered, buffer.dropped) == (2, 0)
+    assert buffer.pending_events(events[0].student_id) == []
+
+
+@pytest.mark.asyncio
+async def test_buffered_repository_reads_its_own_pending_writes():
+    release = asyncio.Event()
+
+    async def slow_sink(events):
+        await release.wait()
+
+    student_id, node_id = uuid4(), uuid4()
+    yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+    stored = replace(_event(), student_id=student_id, knowledge_node_id=node_id, occurred_at=yesterday)
+    inner = InMemoryPerformanceRepository()
+    await inner.save(stored)
+    buffer = PerformanceEventBuffer(slow_sink, batch_size=1, max_age_seconds=0.0)
+    repo = BufferedPerformanceRepository(inner, buffer)
+
+    pending = replace(_event(), student_id=student_id, knowledge_node_id=node_id)
+    await repo.save(pending)
+
+    assert [e.id for e in await repo.get_history(student_id, node_id)] == [stored.id, pending.id]
+    assert [e.id for e in await repo.get_recent_events(student_id, limit=1)] == [pending.id]
+    release.set()
+    await buffer.stop()
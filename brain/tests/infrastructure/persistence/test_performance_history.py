@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+from brain.domain.entities.performance_event import PerformanceMetric
+from brain.infrastructure.persistence.database import Base
+from brain.infrastructure.persistence.postgres_repositories import PostgresPerformanceRepository
+from brain.tests.domain.fakes import fake_performance_event
+
+
+@pytest.fixture
+async def session(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'history.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as db:
+        yield db
+    await engine.dispose()
+
+
+async def _seed(repo, student_id, n):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    # Pares com o mesmo occurred_at: o desempate por id precisa funcionar
+    events = [
+        fake_performance_event(
+            metric=PerformanceMetric.ACCURACY,
+            student_id=student_id,
+            occurred_at=start + timedelta(minutes=i // 2),
+        )
+        for i in range(n)
+    ]
+    await repo.save_many(events)
+    await repo.save(fake_performance_event(metric=PerformanceMetric.ACCURACY, occurred_at=start))
+    return events
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cover_history_once_in_order(session):
+    repo = PostgresPerformanceRepository(session)
+    student_id = uuid4()
+    events = await _seed(repo, student_id, 11)
+
+    seen, after = [], None
+    while True:
+        page = await repo.get_history_page(student_id, after=after, limit=4)
+        seen.extend(page)
+        if len(page) < 4:
+            break
+        after = (page[-1].occurred_at, page[-1].id)
+
+    assert sorted(e.id for e in seen) == sorted(e.id for e in events)
+    assert [e.occurred_at for e in seen] == sorted(e.occurred_at for e in seen)
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_chronological_history_since(session):
+    repo = PostgresPerformanceRepository(session)
+    student_id = uuid4()
+    events = await _seed(repo, student_id, 10)
+    since = events[4].occurred_at
+
+    streamed = [e async for e in repo.stream_history_for_student(student_id, since=since, batch_size=3)]
+
+    assert len(streamed) == 6
+    # sqlite devolve datetimes sem timezone
+    assert all(e.student_id == student_id and e.occurred_at >= since.replace(tzinfo=None) for e in streamed)
+    assert [e.occurred_at for e in streamed] == sorted(e.occurred_at for e in streamed)
+
+
+@pytest.mark.asyncio
+async def test_get_history_returns_latest_events_of_the_node_chronologically(session):
+    from dataclasses import replace
+
+    repo = PostgresPerformanceRepository(session)
+    student_id, node_id = uuid4(), uuid4()
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    node_events = [
+        replace(
+            fake_performance_event(metric=PerformanceMetric.ACCURACY, student_id=student_id, occurred_at=start + timedelta(hours=i)),
+            knowledge_node_id=node_id,
+        )
+        for i in range(5)
+    ]
+    await repo.save_many(node_events)
+    # Outro nó do mesmo aluno não entra no histórico
+    await repo.save(replace(
+        fake_performance_event(metric=PerformanceMetric.ACCURACY, student_id=student_id, occurred_at=start),
+        knowledge_node_id=uuid4(),
+    ))
+
+    history = await repo.get_history(student_id, node_id, limit=3)
+
+    assert [e.id for e in history] == [e.id for e in node_events[2:]]
+    assert all(e.knowledge_node_id == node_id for e in history)
+
+
+@pytest.mark.asyncio
+async def test_recent_events_complete_limit_with_history_before_window(session):
+    repo = PostgresPerformanceRepository(session)
+    student_id = uuid4()
+    now = datetime.now(timezone.utc)
+    def event(age):
+        return fake_performance_event(metric=PerformanceMetric.ACCURACY, student_id=student_id, occurred_at=now - age)
+
+    recent = [event(timedelta(hours=i + 1)) for i in range(2)]
+    old = [event(timedelta(days=400 + i)) for i in range(10)]
+    await repo.save_many(recent + old)
+
+    events = await repo.get_recent_events(student_id, limit=5)
+
+    assert [e.id for e in events] == [e.id for e in recent + old[:3]]
@@ -2,6 +2,7 @@ import pytest
 from uuid import uuid4
 from datetime import datetime, timezone
 from unittest.mock import MagicMock
+from sqlalchemy.dialects import postgresql
 
 from brain.infrastructure.persistence.postgres_repositories import (
     PostgresPerformanceRepository,
@@ -48,7 +49,7 @@ async def test_get_recent_events_returns_events(db_session_mock):
     )
     db_session_mock.execute.return_value.scalars.return_value.all.return_value = [mock_event_model]
     repo = PostgresPerformanceRepository(db=db_session_mock)
-    events = await repo.get_recent_events(student_id=student_id)
+    events = await repo.get_recent_events(student_id=student_id, limit=1)
     assert len(events) == 1
     assert isinstance(events[0], PerformanceEvent)
     assert events[0].id == event_id
@@ -88,10 +89,11 @@ async def test_student_repo_get_by_id_not_found(db_session_mock):
 @pytest.mark.asyncio
 async def test_knowledge_repo_get_by_id_found(db_session_mock):
     node_id = uuid4()
-    mock_node_model = KnowledgeNodeModel(
-        id=node_id, name="Test Node", subject="Test Subject", difficulty=5.0, stability=2.0
+    # Linha projetada (select Core), na ordem dos campos de KnowledgeNode
+    mock_row = (
+        node_id, "Test Node", "Test Subject", 0.0, 2.0, 5.0, 0, 0, 1.0, None, datetime.now(timezone.utc)
     )
-    db_session_mock.execute.return_value.scalars.return_value.first.return_value = mock_node_model
+    db_session_mock.execute.return_value.first.return_value = mock_row
     
     repo = PostgresKnowledgeRepository(db=db_session_mock)
     node = await repo.get_by_id(node_id)
@@ -100,6 +102,8 @@ async def test_knowledge_repo_get_by_id_found(db_session_mock):
     assert isinstance(node, KnowledgeNode)
     assert node.id == node_id
     assert node.name == "Test Node"
+    assert node.stability == 2.0
+    assert node.difficulty == 5.0
 
 # ==================================
 # Testes para PostgresStudyPlanRepository
@@ -121,4 +125,32 @@ async def test_study_plan_repo_save(db_session_mock):
     # Pega o objeto que foi passado para 'add' e verifica seus dados
     added_object = db_session_mock.add.call_args[0][0]
     assert added_object.id == plan_id
-    assert added_object.student_id == student_id
\ No newline at end of file
+    assert added_object.student_id == student_id
+
+@pytest.mark.asyncio
+async def test_knowledge_repo_update_many_single_statement(db_session_mock):
+    nodes = [
+        KnowledgeNode(id=uuid4(), name=f"Node {i}", subject="Test Subject", stability=float(i))
+        for i in range(3)
+    ]
+
+    repo = PostgresKnowledgeRepository(db=db_session_mock)
+    await repo.update_many(nodes)
+
+    # Um único UPDATE executemany, sem SELECT prévio
+    db_session_mock.execute.assert_awaited_once()
+    params = db_session_mock.execute.call_args[0][1]
+    assert [p["node_id"] for p in params] == [n.id for n in nodes]
+    assert [p["stability"] for p in params] == [0.0, 1.0, 2.0]
+
+
+@pytest.mark.asyncio
+async def test_knowledge_repo_save_is_single_upsert(db_session_mock):
+    node = KnowledgeNode(id=uuid4(), name="Test Node", subject="Test Subject")
+
+    repo = PostgresKnowledgeRepository(db=db_session_mock)
+    await repo.save(node)
+
+    db_session_mock.execute.assert_awaited_once()
+    statement = db_session_mock.execute.call_args[0][0]
+    assert "ON CONFLICT" in str(statement.compile(dialect=postgresql.dialect()))
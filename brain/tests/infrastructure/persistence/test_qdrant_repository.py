@@ -1,11 +1,14 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 from uuid import UUID
-from qdrant_client.http.models import PointStruct, ScoredPoint
+from qdrant_client.http.models import PointStruct, ScoredPoint, QueryResponse, RecommendQuery, RecommendInput
 from qdrant_client.http.exceptions import UnexpectedResponse
 
+from qdrant_client.models import ScalarType
+
 from brain.infrastructure.persistence.qdrant_repository import (
     QdrantKnowledgeVectorRepository,
+    quantization_config,
 )
 
 
@@ -24,16 +27,16 @@ def qdrant_repository(mock_qdrant_client):
 @pytest.mark.asyncio
 async def test_find_semantically_related_success(qdrant_repository, mock_qdrant_client):
     reference_node_id = UUID("a1a2a3a4-b1b2-c1c2-d1d2-e1e2e3e4e5e6")
-    mock_qdrant_client.recommend.return_value = [
+    mock_qdrant_client.query_points.return_value = QueryResponse(points=[
         ScoredPoint(id="f1f2f3f4-a1b2-c1d2-e1f2-a1b2c3d4e5f6", version=0, score=0.9, payload=None, vector=None),
         ScoredPoint(id="a1b2c3d4-e5f6-a7b8-c9d0-e1f2a3b4c5d6", version=0, score=0.8, payload=None, vector=None),
-    ]
+    ])
 
     result = await qdrant_repository.find_semantically_related(reference_node_id, limit=2)
 
-    mock_qdrant_client.recommend.assert_awaited_once_with(
+    mock_qdrant_client.query_points.assert_awaited_once_with(
         collection_name="athena_knowledge",
-        positive=[str(reference_node_id)],
+        query=RecommendQuery(recommend=RecommendInput(positive=[str(reference_node_id)])),
         limit=2,
         with_payload=False,
         with_vectors=False,
@@ -46,12 +49,12 @@ async def test_find_semantically_related_success(qdrant_repository, mock_qdrant_
 @pytest.mark.asyncio
 async def test_find_semantically_related_unexpected_response(qdrant_repository, mock_qdrant_client, caplog):
     reference_node_id = UUID("a1a2a3a4-b1b2-c1c2-d1d2-e1e2e3e4e5e6")
-    mock_qdrant_client.recommend.side_effect = UnexpectedResponse(status_code=500, reason_phrase="Test reason", content="Test content", headers={})
+    mock_qdrant_client.query_points.side_effect = UnexpectedResponse(status_code=500, reason_phrase="Test reason", content="Test content", headers={})
 
     with caplog.at_level("WARNING"):
         result = await qdrant_repository.find_semantically_related(reference_node_id)
 
-    mock_qdrant_client.recommend.assert_awaited_once()
+    mock_qdrant_client.query_points.assert_awaited_once()
     assert result == []
     assert "Qdrant respondeu de forma inesperada ao recomendar similaridade." in caplog.text
 
@@ -59,11 +62,68 @@ async def test_find_semantically_related_unexpected_response(qdrant_repository,
 @pytest.mark.asyncio
 async def test_find_semantically_related_generic_exception(qdrant_repository, mock_qdrant_client, caplog):
     reference_node_id = UUID("a1a2a3a4-b1b2-c1c2-d1d2-e1e2e3e4e5e6")
-    mock_qdrant_client.recommend.side_effect = Exception("Generic test error")
+    mock_qdrant_client.query_points.side_effect = Exception("Generic test error")
 
     with caplog.at_level("ERROR"):
         result = await qdrant_repository.find_semantically_related(reference_node_id)
 
-    mock_qdrant_client.recommend.assert_awaited_once()
+    mock_qdrant_client.query_points.assert_awaited_once()
     assert result == []
     assert "Falha crítica ao acessar Qdrant para busca semântica." in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_close_releases_the_client_pool(qdrant_repository, mock_qdrant_client):
+    await qdrant_repository.close()
+
+    mock_qdrant_client.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_compute_node_neighbors_uses_batched_queries_and_drops_self(qdrant_repository, mock_qdrant_client):
+    a = UUID("a1a2a3a4-b1b2-c1c2-d1d2-e1e2e3e4e5e6")
+    b = UUID("f1f2f3f4-a1b2-c1d2-e1f2-a1b2c3d4e5f6")
+    missing = UUID("a1b2c3d4-e5f6-a7b8-c9d0-e1f2a3b4c5d6")
+    mock_qdrant_client.retrieve.return_value = [
+        MagicMock(id=str(a), vector=[1.0, 0.0]),
+        MagicMock(id=str(b), vector=[0.9, 0.1]),
+    ]
+    mock_qdrant_client.query_batch_points.return_value = [
+        QueryResponse(points=[
+            ScoredPoint(id=str(a), version=0, score=1.0),
+            ScoredPoint(id=str(b), version=0, score=0.9),
+        ]),
+        QueryResponse(points=[
+            ScoredPoint(id=str(b), version=0, score=1.0),
+            ScoredPoint(id=str(a), version=0, score=0.9),
+        ]),
+    ]
+
+    neighbors = await qdrant_repository.compute_node_neighbors([a, b, missing], limit=1)
+
+    assert neighbors == {a: [(b, 0.9)], b: [(a, 0.9)]}
+    mock_qdrant_client.query_batch_points.assert_awaited_once()
+    assert len(mock_qdrant_client.query_batch_points.await_args.kwargs["requests"]) == 2
+    version = await qdrant_repository.get_node_vectors_version([a, b, missing])
+    assert version == await qdrant_repository.get_node_vectors_version([missing, b, a])
+
+
+@pytest.mark.asyncio
+async def test_quantized_collection_rescores_with_oversampling(mock_qdrant_client):
+    repo = QdrantKnowledgeVectorRepository(url="http://localhost:6333", quantization="int8", oversampling=3.0)
+    repo._client = mock_qdrant_client
+    mock_qdrant_client.query_points.return_value = QueryResponse(points=[])
+
+    await repo.find_semantically_related(UUID("a1a2a3a4-b1b2-c1c2-d1d2-e1e2e3e4e5e6"))
+
+    params = mock_qdrant_client.query_points.await_args.kwargs["search_params"]
+    assert params.quantization.rescore is True
+    assert params.quantization.oversampling == 3.0
+
+
+def test_quantization_config_modes():
+    assert quantization_config("none") is None
+    assert quantization_config("int8").scalar.type == ScalarType.INT8
+    assert quantization_config("binary").binary.always_ram is True
+    with pytest.raises(ValueError):
+        quantization_config("pq")
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from brain.infrastructure.llm.mock_ai_service import MockAIService
+from brain.infrastructure.persistence.rag_ingestion import (
+    IngestionCheckpoint,
+    RagDocument,
+    RagIngestionPipeline,
+    chunk_document,
+    chunk_text,
+    content_hash,
+)
+
+
+class RecordingSink:
+    def __init__(self, fail_after=None):
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_after = fail_after
+
+    async def upsert(self, chunks, vectors):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if self.fail_after is not None and len(self.batches) >= self.fail_after:
+            raise RuntimeError("Qdrant indisponível")
+        self.batches.append([chunk.point_id for chunk in chunks])
+
+
+def _documents(n):
+    return [RagDocument(topic=f"Tópico {i}", text=f"Conteúdo do documento número {i}.") for i in range(n)]
+
+
+def _pipeline(sink, checkpoint, **kwargs):
+    return RagIngestionPipeline(
+        MockAIService(delay_seconds=0), sink, checkpoint, collection_name="athena_knowledge", **kwargs
+    )
+
+
+def test_chunk_text_respects_size_and_overlaps():
+    text = " ".join(f"palavra{i}" for i in range(100))
+    chunks = chunk_text(text, max_chars=100, overlap_chars=20)
+
+    assert all(len(c) <= 100 for c in chunks)
+    assert chunks[0].split()[-1] in chunks[1].split()
+    assert chunks[-1].split()[-1] == "palavra99"
+
+
+def test_chunk_payload_carries_partition_fields_only_when_set():
+    tagged = chunk_document(RagDocument(topic="Crase", text="texto", subject="Português", goal="INSS"))[0]
+    untagged = chunk_document(RagDocument(topic="Crase", text="texto"))[0]
+
+    assert tagged.payload()["subject"] == "Português" and tagged.payload()["goal"] == "INSS"
+    assert "subject" not in untagged.payload() and "goal" not in untagged.payload()
+
+
+def test_same_text_in_another_partition_is_another_point():
+    untagged = chunk_document(RagDocument(topic="Crase", text="texto"))[0]
+    inss = chunk_document(RagDocument(topic="Crase", text="texto", subject="Português", goal="INSS"))[0]
+    tj = chunk_document(RagDocument(topic="Crase", text="texto", subject="Português", goal="TJ"))[0]
+
+    assert len({untagged.point_id, inss.point_id, tj.point_id}) == 3
+    # Chunks sem partição mantêm o id de antes (hash só do texto)
+    assert untagged.content_hash == content_hash("texto")
+
+
+@pytest.mark.asyncio
+async def test_duplicates_are_skipped_and_concurrency_is_bounded(tmp_path):
+    checkpoint = IngestionCheckpoint(str(tmp_path / "checkpoint.sqlite3"))
+    sink = RecordingSink()
+    documents = _documents(50) + _documents(5)
+
+    stats = await _pipeline(sink, checkpoint, batch_size=5, concurrency=2).run(documents)
+
+    assert stats.documents == 55
+    # Repetidos do mesmo run: pulados em voo ou, depois de gravados, pelo checkpoint
+    assert stats.duplicates + stats.already_ingested == 5
+    assert stats.embedded == 50
+    assert len(sink.batches) == 10
+    assert sink.max_in_flight <= 2
+    assert stats.docs_per_second > 0
+    checkpoint.close()
+
+
+@pytest.mark.asyncio
+async def test_rerun_resumes_from_checkpoint_after_failure(tmp_path):
+    path = str(tmp_path / "checkpoint.sqlite3")
+
+    checkpoint = IngestionCheckpoint(path)
+    with pytest.raises(RuntimeError):
+        await _pipeline(RecordingSink(fail_after=2), checkpoint, batch_size=10, concurrency=1).run(_documents(40))
+    checkpoint.close()
+
+    checkpoint = IngestionCheckpoint(path)
+    sink = RecordingSink()
+    stats = await _pipeline(sink, checkpoint, batch_size=10, concurrency=1).run(_documents(40))
+
+    assert stats.already_ingested == 20
+    assert stats.embedded == 20
+    checkpoint.close()
+
+
+@pytest.mark.asyncio
+async def test_same_text_with_another_goal_is_ingested_separately(tmp_path):
+    checkpoint = IngestionCheckpoint(str(tmp_path / "checkpoint.sqlite3"))
+    sink = RecordingSink()
+    documents = _documents(40) + [
+        RagDocument(topic="Tópico 0", text="Conteúdo do documento número 0.", subject="Português", goal=goal)
+        for goal in ("INSS", "TJ", "INSS")
+    ]
+
+    stats = await _pipeline(sink, checkpoint, batch_size=5, concurrency=2).run(documents)
+
+    # Mesmo texto com outro goal é gravado; só a repetição exata é pulada
+    assert stats.embedded == 42
+    assert stats.duplicates + stats.already_ingested == 1
+    checkpoint.close()
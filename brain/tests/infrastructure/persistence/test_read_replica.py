@@ -0,0 +1,65 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from brain.domain.entities.knowledge_node import KnowledgeNode
+from brain.infrastructure.persistence.database import Base, PrimarySession, has_writes
+from brain.infrastructure.persistence.models import KnowledgeNodeModel
+from brain.infrastructure.persistence.postgres_repositories import PostgresKnowledgeRepository
+
+
+async def _engine(path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine
+
+
+@pytest.fixture
+async def engines(tmp_path):
+    primary = await _engine(tmp_path / "primary.db")
+    replica = await _engine(tmp_path / "replica.db")
+    yield primary, replica
+    await primary.dispose()
+    await replica.dispose()
+
+
+def _node(name):
+    return KnowledgeNode(id=uuid4(), name=name, subject="Matemática")
+
+
+@pytest.mark.asyncio
+async def test_graph_reads_go_to_replica_and_writes_to_primary(engines):
+    primary, replica = engines
+    async with AsyncSession(replica) as db:
+        await PostgresKnowledgeRepository(db).save(_node("Só na réplica"))
+        await db.commit()
+
+    async with AsyncSession(primary) as db, AsyncSession(replica) as read_db:
+        repo = PostgresKnowledgeRepository(db, read_db)
+        await repo.save(_node("Escrito no primário"))
+        await db.commit()
+
+        assert [n.name for n in await repo.get_full_graph()] == ["Só na réplica"]
+        assert (await repo.get_node_by_name("Escrito no primário")) is not None
+        assert read_db.info == {}
+
+
+@pytest.mark.asyncio
+async def test_primary_session_commits_only_after_writes(engines):
+    primary, _ = engines
+    sessions = async_sessionmaker(primary, sync_session_class=PrimarySession)
+
+    async with sessions() as db:
+        await db.execute(select(KnowledgeNodeModel.id))
+        await db.execute(text("SELECT 1"))
+        assert not has_writes(db)
+
+        await PostgresKnowledgeRepository(db).save(_node("Álgebra"))
+        assert has_writes(db)
+
+    async with sessions() as db:
+        db.add(KnowledgeNodeModel(id=uuid4(), name="Geometria", subject="Matemática"))
+        assert has_writes(db)
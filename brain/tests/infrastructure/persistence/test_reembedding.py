@@ -0,0 +1,243 @@
+import hashlib
+import time
+import uuid
+
+import numpy as np
+import pytest
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from brain.infrastructure.persistence.qdrant_repository import QdrantKnowledgeVectorRepository
+from brain.infrastructure.persistence.rag_ingestion import stamp_corpus_revision
+from brain.infrastructure.persistence.reembedding import (
+    RETIRED_AT_METADATA_KEY,
+    ReembeddingPipeline,
+    create_model_collection,
+    drop_retired_collections,
+    flip_alias,
+    resolve_alias,
+)
+
+ALIAS = "athena_knowledge"
+TEXTS = [f"documento {i}" for i in range(12)]
+
+
+def _vector(text: str, dim: int) -> list:
+    """Embedding determinístico por texto: cada documento acha a si mesmo."""
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+    return np.random.default_rng(seed).normal(size=dim).tolist()
+
+
+class FakeEmbedder:
+    def __init__(self, dim: int = 8):
+        self.dim = dim
+        self.calls = []
+
+    async def __call__(self, texts, task_type):
+        self.calls.append((list(texts), task_type))
+        return [_vector(text, self.dim) for text in texts]
+
+
+@pytest.fixture
+async def client():
+    client = AsyncQdrantClient(location=":memory:")
+    yield client
+    await client.close()
+
+
+async def _seed(client, name, *, model="modelo-antigo", dim=4, without_text=0):
+    await create_model_collection(client, name, model=model, dim=dim)
+    points = [
+        PointStruct(id=str(uuid.UUID(int=i + 1)), vector=_vector(text, dim), payload={"text": text, "subject": "s"})
+        for i, text in enumerate(TEXTS)
+    ]
+    points += [
+        PointStruct(id=str(uuid.UUID(int=1000 + i)), vector=_vector(str(i), dim), payload={})
+        for i in range(without_text)
+    ]
+    await client.upsert(name, points=points, wait=True)
+
+
+async def test_reembeds_into_new_collection_and_flips_alias(client):
+    await _seed(client, "athena_knowledge_v1", without_text=2)
+    await flip_alias(client, ALIAS, "athena_knowledge_v1")
+    embed = FakeEmbedder(dim=8)
+
+    report = await ReembeddingPipeline(
+        client, embed, alias=ALIAS, model="modelo-novo", batch_size=5
+    ).run(target="athena_knowledge_v2")
+
+    assert report.verified and report.flipped
+    assert (report.copied, report.skipped, report.target_points) == (len(TEXTS), 2, len(TEXTS))
+    assert report.sample_recall == 1.0
+    assert report.retired == "athena_knowledge_v1"
+    assert await resolve_alias(client, ALIAS) == "athena_knowledge_v2"
+
+    info = await client.get_collection(ALIAS)
+    assert info.config.params.vectors.size == 8
+    assert info.config.metadata["embedding_model"] == "modelo-novo"
+    # Payload preservado; a coleção antiga continua intacta para rollback
+    record = (await client.retrieve(ALIAS, ids=[str(uuid.UUID(int=1))], with_payload=True))[0]
+    assert record.payload == {"text": TEXTS[0], "subject": "s"}
+    old = await client.get_collection("athena_knowledge_v1")
+    assert old.points_count == len(TEXTS) + 2 and RETIRED_AT_METADATA_KEY in old.config.metadata
+    assert {task for _, task in embed.calls} == {"retrieval_document", "retrieval_query"}
+
+
+async def test_failed_verification_keeps_alias(client):
+    await _seed(client, "athena_knowledge_v1")
+    await flip_alias(client, ALIAS, "athena_knowledge_v1")
+
+    class ForgetfulEmbedder(FakeEmbedder):
+        async def __call__(self, texts, task_type):
+            # Consultas caem em vetores sem relação com os documentos
+            if task_type == "retrieval_query":
+                return [_vector(text + "?", self.dim) for text in texts]
+            return await super().__call__(texts, task_type)
+
+    report = await ReembeddingPipeline(
+        client, ForgetfulEmbedder(), alias=ALIAS, model="modelo-novo", recall_k=1
+    ).run(target="athena_knowledge_v2")
+
+    assert not report.verified and not report.flipped
+    assert await resolve_alias(client, ALIAS) == "athena_knowledge_v1"
+
+
+async def test_rerun_with_same_target_resumes(client):
+    await _seed(client, "athena_knowledge_v1")
+    await flip_alias(client, ALIAS, "athena_knowledge_v1")
+    pipeline = ReembeddingPipeline(client, FakeEmbedder(), alias=ALIAS, model="modelo-novo", batch_size=5)
+    await pipeline.run(target="athena_knowledge_v2", flip=False)
+
+    embed = FakeEmbedder()
+    report = await ReembeddingPipeline(
+        client, embed, alias=ALIAS, model="modelo-novo", batch_size=5
+    ).run(target="athena_knowledge_v2")
+
+    assert (report.copied, report.already_copied) == (0, len(TEXTS))
+    assert all(task == "retrieval_query" for _, task in embed.calls)
+    assert report.flipped
+
+
+async def test_writes_to_old_collection_during_copy_are_caught_up(client):
+    await _seed(client, "athena_knowledge_v1")
+    await flip_alias(client, ALIAS, "athena_knowledge_v1")
+    late = [f"ingerido durante a cópia {i}" for i in range(3)]
+
+    class IngestingEmbedder(FakeEmbedder):
+        async def __call__(self, texts, task_type):
+            # Ingestão ao vivo escreve pelo alias, que ainda aponta para a coleção antiga
+            if task_type == "retrieval_document" and len(self.calls) < len(late):
+                i = len(self.calls)
+                point = PointStruct(id=str(uuid.UUID(int=500 + i)), vector=_vector(late[i], 4), payload={"text": late[i]})
+                await client.upsert(ALIAS, points=[point], wait=True)
+            return await super().__call__(texts, task_type)
+
+    report = await ReembeddingPipeline(
+        client, IngestingEmbedder(), alias=ALIAS, model="modelo-novo", batch_size=5
+    ).run(target="athena_knowledge_v2")
+
+    assert report.verified and report.flipped
+    assert report.target_points == len(TEXTS) + len(late)
+    assert report.caught_up > 0
+    found = await client.retrieve(ALIAS, ids=[str(uuid.UUID(int=500 + i)) for i in range(len(late))], with_payload=True)
+    assert sorted(r.payload["text"] for r in found) == late
+
+
+async def test_legacy_collection_swap_requires_flag(client):
+    await client.create_collection(ALIAS, vectors_config=VectorParams(size=4, distance=Distance.COSINE))
+    await client.upsert(ALIAS, points=[PointStruct(id=1, vector=[1.0, 0, 0, 0], payload={"text": "legado"})])
+    pipeline = ReembeddingPipeline(client, FakeEmbedder(), alias=ALIAS, model="modelo-novo")
+
+    with pytest.raises(RuntimeError):
+        await pipeline.run(target="athena_knowledge_v2")
+    assert await resolve_alias(client, ALIAS) == ALIAS
+
+    report = await pipeline.run(target="athena_knowledge_v2", replace_legacy_collection=True)
+    assert report.flipped and report.already_copied == 1
+    assert await resolve_alias(client, ALIAS) == "athena_knowledge_v2"
+
+
+async def test_drop_retired_collections_after_grace_period(client):
+    await _seed(client, "athena_knowledge_v1")
+    await _seed(client, "athena_knowledge_v2")
+    await _seed(client, "athena_knowledge_v3")
+    await flip_alias(client, ALIAS, "athena_knowledge_v1")
+    await flip_alias(client, ALIAS, "athena_knowledge_v2")
+    # v3 nunca foi servida (ex.: migração abortada): não é removida automaticamente
+    await client.update_collection(
+        "athena_knowledge_v1", metadata={RETIRED_AT_METADATA_KEY: time.time() - 3600}
+    )
+
+    assert await drop_retired_collections(client, ALIAS, grace_seconds=7200) == []
+    assert await drop_retired_collections(client, ALIAS, grace_seconds=60) == ["athena_knowledge_v1"]
+    names = {c.name for c in (await client.get_collections()).collections}
+    assert names == {"athena_knowledge_v2", "athena_knowledge_v3"}
+
+
+async def test_repository_follows_model_of_collection_behind_alias(client):
+    await _seed(client, "athena_knowledge_v1", model="modelo-antigo")
+    await flip_alias(client, ALIAS, "athena_knowledge_v1")
+    repo = QdrantKnowledgeVectorRepository(url="http://localhost:6333", model_refresh_seconds=0)
+    await repo._client.close()
+    repo._client = client
+
+    used = []
+
+    async def embed(text, model=None):
+        used.append(model)
+        return _vector(text, 4 if model == "modelo-antigo" else 8)
+
+    repo._generate_query_embedding = embed
+    assert await repo.search_context(TEXTS[3], limit=1) == TEXTS[3]
+
+    await ReembeddingPipeline(client, FakeEmbedder(dim=8), alias=ALIAS, model="modelo-novo").run(
+        target="athena_knowledge_v2"
+    )
+    assert await repo.search_context(TEXTS[3], limit=1) == TEXTS[3]
+    assert used == ["modelo-antigo", "modelo-novo"]
+
+
+async def test_corpus_version_changes_on_reembedding_with_same_ids(client):
+    await _seed(client, "athena_knowledge_v1")
+    await flip_alias(client, ALIAS, "athena_knowledge_v1")
+    repo = QdrantKnowledgeVectorRepository(url="http://localhost:6333", model_refresh_seconds=0)
+    await repo._client.close()
+    repo._client = client
+
+    before = await repo.get_corpus_version()
+    assert await repo.get_corpus_version() == before
+    await ReembeddingPipeline(client, FakeEmbedder(), alias=ALIAS, model="modelo-novo").run(
+        target="athena_knowledge_v2"
+    )
+
+    assert await repo.get_corpus_version() != before
+
+
+async def test_cached_corpus_version_skips_qdrant_and_refreshes_in_background(client):
+    await _seed(client, "athena_knowledge_v1")
+    await flip_alias(client, ALIAS, "athena_knowledge_v1")
+    repo = QdrantKnowledgeVectorRepository(url="http://localhost:6333", corpus_version_refresh_seconds=3600)
+    await repo._client.close()
+    repo._client = client
+
+    # Primeira requisição: ainda sem versão; a leitura vai para segundo plano
+    assert await repo.get_cached_corpus_version() is None
+    await repo._corpus_refresh_task
+    version = await repo.get_cached_corpus_version()
+    assert version == await repo.get_corpus_version()
+
+    # Mesmos ids, conteúdo novo: o carimbo de quem escreve muda a versão
+    point = PointStruct(id=str(uuid.UUID(int=1)), vector=_vector("x", 4), payload={"text": "x"})
+    await client.upsert(ALIAS, points=[point])
+    await stamp_corpus_revision(client, ALIAS)
+    calls = []
+    repo._client = type("CountingClient", (), {"__getattr__": lambda self, name: calls.append(name)})()
+    assert await repo.get_cached_corpus_version() == version
+    assert calls == []
+
+    repo._client = client
+    repo._corpus_checked_at -= 3600
+    assert await repo.get_cached_corpus_version() == version
+    await repo._corpus_refresh_task
+    assert await repo.get_cached_corpus_version() not in (None, version)
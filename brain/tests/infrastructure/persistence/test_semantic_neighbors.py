@@ -0,0 +1,63 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+from brain.application.services.semantic_neighbor_service import SemanticNeighborRefresher
+from brain.domain.entities.knowledge_node import KnowledgeNode
+from brain.infrastructure.persistence.database import Base
+from brain.infrastructure.persistence.in_memory_repositories import InMemoryKnowledgeRepository
+from brain.infrastructure.persistence.postgres_repositories import PostgresSemanticNeighborRepository
+
+
+class FakeVectorRepo:
+    def __init__(self, version="v1"):
+        self.version = version
+        self.computations = 0
+
+    async def get_node_vectors_version(self, node_ids):
+        return self.version
+
+    async def compute_node_neighbors(self, node_ids, *, limit=5):
+        self.computations += 1
+        ids = list(node_ids)
+        return {
+            node_id: [(other, 1.0 / (rank + 1)) for rank, other in enumerate(o for o in ids if o != node_id)][:limit]
+            for node_id in ids
+        }
+
+
+@pytest.fixture
+async def session(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'neighbors.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as db:
+        yield db
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_refresh_fills_table_and_skips_when_version_is_unchanged(session):
+    knowledge_repo = InMemoryKnowledgeRepository()
+    nodes = [KnowledgeNode(id=uuid4(), name=f"Nó {i}", subject="Matemática") for i in range(4)]
+    for node in nodes:
+        await knowledge_repo.save(node)
+    vector_repo = FakeVectorRepo()
+    neighbor_repo = PostgresSemanticNeighborRepository(session)
+    refresher = SemanticNeighborRefresher(knowledge_repo, vector_repo, neighbor_repo, neighborhood_size=2)
+
+    assert await refresher.refresh() is True
+    await session.commit()
+    assert await neighbor_repo.get_version() == "v1"
+    assert await neighbor_repo.get_neighbor_ids(nodes[0].id, limit=2) == [nodes[1].id, nodes[2].id]
+    assert await neighbor_repo.get_neighbor_ids(nodes[0].id, limit=1) == [nodes[1].id]
+
+    assert await refresher.refresh() is False
+    assert vector_repo.computations == 1
+
+    vector_repo.version = "v2"
+    assert await refresher.refresh() is True
+    await session.commit()
+    assert await neighbor_repo.get_version() == "v2"
+    assert len(await neighbor_repo.get_neighbor_ids(nodes[3].id)) == 2
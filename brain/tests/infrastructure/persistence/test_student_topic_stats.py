@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+from brain.domain.entities.performance_event import PerformanceMetric
+from brain.infrastructure.persistence.database import Base
+from brain.infrastructure.persistence.postgres_repositories import PostgresPerformanceRepository
+from brain.tests.domain.fakes import fake_performance_event
+
+
+@pytest.fixture
+async def session(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stats.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as db:
+        yield db
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_save_maintains_topic_stats_incrementally(session):
+    student_id = uuid4()
+    now = datetime.now(timezone.utc)
+    repo = PostgresPerformanceRepository(session)
+
+    await repo.save_many([
+        fake_performance_event(metric=PerformanceMetric.ACCURACY, student_id=student_id, topic="Álgebra", value=0.5, occurred_at=now),
+        fake_performance_event(metric=PerformanceMetric.ACCURACY, student_id=student_id, topic="Álgebra", value=0.7, occurred_at=now - timedelta(days=2)),
+    ])
+    # Evento atrasado (mais antigo) não deve sobrescrever o último valor
+    await repo.save(fake_performance_event(
+        metric=PerformanceMetric.ACCURACY, student_id=student_id, topic="Álgebra", value=0.9, occurred_at=now - timedelta(days=1),
+    ))
+    await repo.save(fake_performance_event(
+        metric=PerformanceMetric.TIME_PER_QUESTION, student_id=student_id, topic="Álgebra", value=40.0, occurred_at=now,
+    ))
+    await session.commit()
+
+    stats = {s.metric: s for s in await repo.get_topic_stats(student_id)}
+
+    accuracy = stats[PerformanceMetric.ACCURACY]
+    assert accuracy.count == 3
+    assert accuracy.mean == pytest.approx(0.7)
+    assert accuracy.variance == pytest.approx(((0.5 - 0.7) ** 2 + (0.9 - 0.7) ** 2) / 3)
+    assert accuracy.last_value == 0.5
+    assert stats[PerformanceMetric.TIME_PER_QUESTION].count == 1
+    assert await repo.get_topic_stats(uuid4()) == []
@@ -0,0 +1,282 @@
+"""
+Contrato comum dos adaptadores de KnowledgeVectorRepository: o índice NumPy
+local e o Qdrant (cliente em memória do qdrant-client) precisam responder igual.
+"""
+
+import uuid
+
+import numpy as np
+import pytest
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from brain.infrastructure.persistence.local_vector_repository import LocalKnowledgeVectorRepository, top_k
+from brain.infrastructure.persistence.qdrant_repository import QdrantKnowledgeVectorRepository, ensure_payload_indexes
+from brain.infrastructure.persistence.rag_ingestion import stamp_corpus_revision
+
+DIM = 16
+rng = np.random.default_rng(7)
+NODE_IDS = [uuid.UUID(int=i + 1) for i in range(6)]
+NODE_VECTORS = rng.normal(size=(len(NODE_IDS), DIM)).astype(np.float32)
+CHUNK_IDS = [str(uuid.UUID(int=1000 + i)) for i in range(4)]
+CHUNK_VECTORS = rng.normal(size=(len(CHUNK_IDS), DIM)).astype(np.float32)
+CHUNK_TEXTS = [f"chunk {i}" for i in range(len(CHUNK_IDS))]
+CHUNK_PAYLOADS = [{"text": text, "subject": "par" if i % 2 == 0 else "ímpar"} for i, text in enumerate(CHUNK_TEXTS)]
+# Consulta "q<i>" embute perto do chunk i
+QUERY_VECTORS = {f"q{i}": (v + 0.05 * rng.normal(size=DIM)).tolist() for i, v in enumerate(CHUNK_VECTORS)}
+
+
+class _QueryEmbedder:
+    async def generate_embeddings(self, texts, task_type="retrieval_document"):
+        return [QUERY_VECTORS[text] for text in texts]
+
+
+def _cosine_ranking(reference: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    normed = candidates / np.linalg.norm(candidates, axis=1, keepdims=True)
+    return np.argsort(-(normed @ (reference / np.linalg.norm(reference))), kind="stable")
+
+
+async def _local_repo(tmp_path):
+    repo = LocalKnowledgeVectorRepository(str(tmp_path / "index"), dim=DIM, ai_service=_QueryEmbedder())
+    repo.upsert(NODE_IDS, NODE_VECTORS)
+    repo.upsert(CHUNK_IDS, CHUNK_VECTORS, CHUNK_PAYLOADS)
+    return repo
+
+
+async def _qdrant_repo(tmp_path):
+    repo = QdrantKnowledgeVectorRepository(url="http://localhost:6333")
+    await repo._client.close()
+    repo._client = AsyncQdrantClient(location=":memory:")
+    await repo._client.create_collection("athena_knowledge", vectors_config=VectorParams(size=DIM, distance=Distance.COSINE))
+    points = [PointStruct(id=str(i), vector=v.tolist()) for i, v in zip(NODE_IDS, NODE_VECTORS)]
+    points += [
+        PointStruct(id=i, vector=v.tolist(), payload=p) for i, v, p in zip(CHUNK_IDS, CHUNK_VECTORS, CHUNK_PAYLOADS)
+    ]
+    await repo._client.upsert("athena_knowledge", points=points, wait=True)
+    await ensure_payload_indexes(repo._client, "athena_knowledge")
+
+    async def embed(text, model=None):
+        return QUERY_VECTORS[text]
+
+    async def embed_many(texts, model=None):
+        return {text: QUERY_VECTORS[text] for text in texts}
+
+    repo._generate_query_embedding = embed
+    repo._generate_query_embeddings = embed_many
+    return repo
+
+
+@pytest.fixture(params=["local", "qdrant"])
+async def vector_repo(request, tmp_path):
+    repo = await (_local_repo if request.param == "local" else _qdrant_repo)(tmp_path)
+    yield repo
+    await repo.close()
+
+
+async def test_search_context_returns_nearest_chunk_texts(vector_repo):
+    context = await vector_repo.search_context("q2", limit=1)
+    assert context == "chunk 2"
+
+
+async def test_search_context_many_returns_context_per_query(vector_repo):
+    contexts = await vector_repo.search_context_many(["q0", "q3", "", "q0"], limit=1)
+    assert contexts == {"q0": "chunk 0", "q3": "chunk 3", "": ""}
+
+
+async def test_search_context_filters_by_payload(vector_repo):
+    # q1 está perto do chunk 1 ("ímpar"); filtrando por "par" só sobram os chunks 0 e 2
+    context = await vector_repo.search_context("q1", limit=2, filters={"subject": "par"})
+    assert set(context.split("\n\n")) == {"chunk 0", "chunk 2"}
+    assert await vector_repo.search_context("q1", limit=1, filters={"subject": "inexistente"}) == ""
+
+
+async def test_search_context_many_applies_filters_per_query(vector_repo):
+    contexts = await vector_repo.search_context_many(
+        ["q1", "q3"], limit=1, filters={"q1": {"subject": "ímpar"}, "q3": {"subject": "par"}}
+    )
+    assert contexts["q1"] == "chunk 1"
+    assert contexts["q3"] in {"chunk 0", "chunk 2"}
+
+
+async def test_search_context_empty_query(vector_repo):
+    assert await vector_repo.search_context("") == ""
+
+
+async def test_find_semantically_related_excludes_reference_and_orders_by_similarity(vector_repo):
+    everything = np.vstack([NODE_VECTORS, CHUNK_VECTORS])
+    all_ids = [str(i) for i in NODE_IDS] + CHUNK_IDS
+    expected = [all_ids[r] for r in _cosine_ranking(NODE_VECTORS[0], everything) if r != 0][:3]
+
+    related = await vector_repo.find_semantically_related(NODE_IDS[0], limit=3)
+
+    assert [str(r) for r in related] == expected
+
+
+async def test_find_semantically_related_unknown_node(vector_repo):
+    assert await vector_repo.find_semantically_related(uuid.uuid4()) == []
+
+
+async def test_compute_node_neighbors_only_links_nodes(vector_repo):
+    neighbors = await vector_repo.compute_node_neighbors(NODE_IDS, limit=2)
+
+    assert set(neighbors) == set(NODE_IDS)
+    for node_id, scored in neighbors.items():
+        ids = [n for n, _ in scored]
+        assert len(ids) == 2 and node_id not in ids
+        assert set(ids) <= set(NODE_IDS)
+        assert scored[0][1] >= scored[1][1]
+
+
+async def test_node_vectors_version_is_stable_and_ignores_missing_nodes(vector_repo):
+    version = await vector_repo.get_node_vectors_version(NODE_IDS)
+    assert await vector_repo.get_node_vectors_version(list(reversed(NODE_IDS)) + [uuid.uuid4()]) == version
+    assert await vector_repo.get_node_vectors_version(NODE_IDS[:3]) != version
+
+
+async def test_corpus_version_changes_when_points_are_added(vector_repo):
+    version = await vector_repo.get_corpus_version()
+    assert await vector_repo.get_corpus_version() == version
+
+    new_id, vector = str(uuid.uuid4()), rng.normal(size=DIM).astype(np.float32)
+    if isinstance(vector_repo, LocalKnowledgeVectorRepository):
+        vector_repo.upsert([new_id], [vector], [{"text": "novo"}])
+    else:
+        await vector_repo._client.upsert(
+            "athena_knowledge", points=[PointStruct(id=new_id, vector=vector.tolist(), payload={"text": "novo"})]
+        )
+    assert await vector_repo.get_corpus_version() != version
+
+
+async def test_corpus_version_changes_when_a_point_is_overwritten(vector_repo):
+    version = await vector_repo.get_corpus_version()
+    vector = rng.normal(size=DIM).astype(np.float32)
+    if isinstance(vector_repo, LocalKnowledgeVectorRepository):
+        vector_repo.upsert([CHUNK_IDS[0]], [vector], [{"text": "chunk 0 revisado"}])
+    else:
+        await vector_repo._client.upsert(
+            "athena_knowledge",
+            points=[PointStruct(id=CHUNK_IDS[0], vector=vector.tolist(), payload={"text": "chunk 0 revisado"})],
+        )
+        # Quem escreve carimba a revisão (como o QdrantChunkSink)
+        await stamp_corpus_revision(vector_repo._client, "athena_knowledge")
+    assert await vector_repo.get_corpus_version() != version
+
+
+# ==============================
+# Específicos do índice local
+# ==============================
+
+async def test_local_index_persists_and_reopens(tmp_path):
+    repo = await _local_repo(tmp_path)
+    expected = await repo.find_semantically_related(NODE_IDS[1], limit=4)
+    await repo.close()
+
+    reopened = LocalKnowledgeVectorRepository(str(tmp_path / "index"), ai_service=_QueryEmbedder())
+    assert reopened.dim == DIM and len(reopened) == len(NODE_IDS) + len(CHUNK_IDS)
+    assert await reopened.find_semantically_related(NODE_IDS[1], limit=4) == expected
+    assert await reopened.search_context("q3", limit=1) == "chunk 3"
+
+
+async def test_local_index_grows_and_upserts_in_place(tmp_path):
+    repo = LocalKnowledgeVectorRepository(str(tmp_path / "index"), dim=DIM, initial_capacity=2)
+    repo.upsert(NODE_IDS, NODE_VECTORS)
+    repo.upsert([NODE_IDS[0]], [NODE_VECTORS[5]])
+
+    assert len(repo) == len(NODE_IDS)
+    hits = repo.search_vector(NODE_VECTORS[5], 2)
+    assert {row for row, _ in hits} == {0, 5}
+    assert hits[0][1] == pytest.approx(1.0, abs=1e-5)
+
+
+async def test_reader_does_not_erase_rows_written_by_another_process(tmp_path):
+    path = str(tmp_path / "index")
+    writer = await _local_repo(tmp_path)
+    await writer.close()
+    api = LocalKnowledgeVectorRepository(path, ai_service=_QueryEmbedder(), read_only=True)
+    with pytest.raises(RuntimeError):
+        api.upsert([uuid.uuid4()], [NODE_VECTORS[0]])
+
+    seeder = LocalKnowledgeVectorRepository(path)
+    seeder.upsert(["novo"], [CHUNK_VECTORS[3] + 0.01], [{"text": "chunk novo"}])
+    await seeder.close()
+    await api.close()
+
+    reopened = LocalKnowledgeVectorRepository(path)
+    assert len(reopened) == len(NODE_IDS) + len(CHUNK_IDS) + 1
+    # A API recarrega quando o meta.json muda
+    context = await api.search_context("q3", limit=2)
+    assert set(context.split("\n\n")) == {"chunk novo", "chunk 3"}
+
+
+async def test_writer_refuses_to_overwrite_index_changed_on_disk(tmp_path):
+    path = str(tmp_path / "index")
+    first = await _local_repo(tmp_path)
+    await first.close()
+    stale = LocalKnowledgeVectorRepository(path)
+    await stale.close()  # sem escrita: não toca no meta.json
+
+    other = LocalKnowledgeVectorRepository(path)
+    other.upsert(["outro"], [NODE_VECTORS[1]])
+    await other.close()
+
+    with pytest.raises(RuntimeError):
+        stale.upsert(["atrasado"], [NODE_VECTORS[2]])
+    assert len(LocalKnowledgeVectorRepository(path)) == len(NODE_IDS) + len(CHUNK_IDS) + 1
+
+
+def test_blocked_search_matches_brute_force(tmp_path):
+    data = rng.normal(size=(1000, DIM)).astype(np.float32)
+    repo = LocalKnowledgeVectorRepository(str(tmp_path / "index"), dim=DIM, block_size=64)
+    repo.upsert(list(range(len(data))), data)
+    query = rng.normal(size=DIM)
+
+    rows = [row for row, _ in repo.search_vector(query, 10)]
+
+    assert rows == _cosine_ranking(query, data)[:10].tolist()
+
+
+def test_top_k_handles_k_larger_than_scores():
+    assert top_k(np.array([0.1, 0.9, 0.5]), 5).tolist() == [1, 2, 0]
+
+
+# ==============================
+# Quantização + reordenação
+# ==============================
+
+@pytest.mark.parametrize("mode, oversampling, min_recall", [("int8", 2.0, 0.95), ("binary", 10.0, 0.5)])
+def test_quantized_search_rescores_to_high_recall(tmp_path, mode, oversampling, min_recall):
+    data = rng.normal(size=(2000, 64)).astype(np.float32)
+    queries = rng.normal(size=(20, 64)).astype(np.float32)
+    repo = LocalKnowledgeVectorRepository(
+        str(tmp_path / mode), dim=64, block_size=512, quantization=mode, oversampling=oversampling
+    )
+    repo.upsert(list(range(len(data))), data)
+
+    found = 0
+    for query in queries:
+        hits = repo.search_vector(query, 10)
+        truth = set(_cosine_ranking(query, data)[:10].tolist())
+        found += len(truth & {row for row, _ in hits})
+        # Scores finais são os da reordenação em float32, em ordem decrescente
+        rows = [row for row, _ in hits]
+        exact = repo.vectors[rows] @ (query / np.linalg.norm(query))
+        assert [score for _, score in hits] == pytest.approx(exact.tolist(), abs=1e-5)
+        assert rows == [rows[i] for i in np.argsort(-exact, kind="stable")]
+
+    assert found / (10 * len(queries)) >= min_recall
+    assert repo.search_memory_bytes < len(data) * 64 * 4
+
+
+async def test_quantized_codes_are_rebuilt_on_reopen(tmp_path):
+    repo = LocalKnowledgeVectorRepository(str(tmp_path / "index"), dim=DIM, quantization="int8")
+    repo.upsert(NODE_IDS, NODE_VECTORS)
+    expected = await repo.find_semantically_related(NODE_IDS[2], limit=3)
+    await repo.close()
+
+    reopened = LocalKnowledgeVectorRepository(str(tmp_path / "index"), quantization="int8")
+    assert await reopened.find_semantically_related(NODE_IDS[2], limit=3) == expected
+
+
+def test_unknown_quantization_mode(tmp_path):
+    with pytest.raises(ValueError):
+        LocalKnowledgeVectorRepository(str(tmp_path / "index"), quantization="pq")
@@ -9,7 +9,8 @@ from brain.domain.services.intelligence_engine import IntelligenceEngine
 from brain.domain.services.semantic_propagator import SemanticPropagator
 from brain.infrastructure.persistence.in_memory_repositories import (
     InMemoryKnowledgeRepository,
-    InMemoryPerformanceRepository
+    InMemoryPerformanceRepository,
+    InMemorySemanticNeighborRepository,
 )
 
 # ==============================================================================
@@ -52,6 +53,7 @@ def record_review_use_case(
         node_repo=knowledge_repository,
         performance_repo=performance_repository,
         intelligence_engine=IntelligenceEngine(),
+        semantic_propagator=propagator,
     )
 
 # ==============================================================================
@@ -96,4 +98,34 @@ async def test_python_prepares_state_for_go_worker(
     assert updated_node.weight >= GO_INTERVENTION_WEIGHT_THRESHOLD, \
         f"Peso {updated_node.weight} abaixo do gatilho do Worker ({GO_INTERVENTION_WEIGHT_THRESHOLD})"
 
-    print(f"\n✅ Contrato Python cumprido: Node {node_id} está 'marcado' para o Worker.")
\ No newline at end of file
+    print(f"\n✅ Contrato Python cumprido: Node {node_id} está 'marcado' para o Worker.")
+
+
+@pytest.mark.asyncio
+async def test_failed_review_boosts_precomputed_neighbors_only_on_again(
+    knowledge_repository,
+    performance_repository,
+):
+    origin = KnowledgeNode(id=uuid4(), name="Goroutines", subject="Go Concurrency")
+    neighbor = KnowledgeNode(id=uuid4(), name="Channels", subject="Go Concurrency", weight=1.0)
+    await knowledge_repository.save(origin)
+    await knowledge_repository.save(neighbor)
+    neighbor_repo = InMemorySemanticNeighborRepository()
+    await neighbor_repo.replace_all("v1", {origin.id: [(neighbor.id, 0.9)]})
+
+    class UnusedVectorRepo:
+        async def find_semantically_related(self, node_id, limit=5):
+            raise AssertionError("a vizinhança deveria vir da tabela pré-calculada")
+
+    use_case = RecordReviewUseCase(
+        node_repo=knowledge_repository,
+        performance_repo=performance_repository,
+        intelligence_engine=IntelligenceEngine(),
+        semantic_propagator=SemanticPropagator(knowledge_repository, UnusedVectorRepo(), neighbor_repo),
+    )
+
+    await use_case.execute(student_id=uuid4(), node_id=origin.id, success=True, response_time_seconds=30.0)
+    assert (await knowledge_repository.get_by_id(neighbor.id)).weight == 1.0
+
+    await use_case.execute(student_id=uuid4(), node_id=origin.id, success=False, response_time_seconds=30.0)
+    assert (await knowledge_repository.get_by_id(neighbor.id)).weight > 1.0